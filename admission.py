@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Admission Control
+
+Keeps one client of a shared web server from starving the others. A client
+(its address; tokens are unverified, so anyone could send a new one) may run
+a few interactive requests and a couple of bulk downloads or jobs at once;
+past that it is turned away with OverQuota, which the server answers with 429
+and a Retry-After hint, rather than queued behind everyone else.
+
+Work that reaches GitHub also takes a slot from a weighted fair scheduler.
+A fixed number of upstream slots is shared between the interactive and bulk
+classes by weight, and between the waiting clients of a class round robin.
+Bulk work may never hold every slot, so a search arriving behind a 10k-file
+download waits for at most one file to finish, not for the download.
+"""
+
+import asyncio
+import contextlib
+import os
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+# Concurrent upstream requests, and at most how many of them bulk work may hold
+UPSTREAM_SLOTS = 16
+BULK_SLOTS = 12
+
+# Share of contended slots each class gets
+CLASS_WEIGHTS = {INTERACTIVE: 4, BULK: 1}
+
+# Work each client may have admitted at once, per class
+CLIENT_LIMITS = {INTERACTIVE: 4, BULK: 2}
+
+# Seconds a rejected client is told to wait, per class
+RETRY_AFTER = {INTERACTIVE: 1, BULK: 10}
+
+# Take client addresses from X-Forwarded-For (only behind a trusted reverse proxy)
+TRUST_FORWARDED = os.environ.get('TRUST_FORWARDED', 'False').lower() == 'true'
+
+
+def client_key(address: Optional[str]) -> str:
+    """
+    Identity quotas are counted against: the client's address. The token a
+    request carries is not used, since it is not verified and a client could
+    send a fresh made-up one with every request to get a fresh quota.
+    """
+    return f"address:{address or 'unknown'}"
+
+
+def requester(request) -> str:
+    """Who a web request counts against: the client_key of its address."""
+    address = request.remote
+    forwarded = request.headers.get('X-Forwarded-For')
+    if TRUST_FORWARDED and forwarded:
+        address = forwarded.split(',')[0].strip()
+    return client_key(address)
+
+
+class OverQuota(Exception):
+    """A client already has as much work of a class admitted as it may."""
+
+    def __init__(self, work_class: str, limit: int, retry_after: int):
+        super().__init__(f"Too many {work_class} requests at once (limit {limit}); "
+                         f"retry in {retry_after}s")
+        self.work_class = work_class
+        self.retry_after = retry_after
+
+
+class Lease:
+    """One admitted piece of work, counted against its client until released."""
+
+    def __init__(self, admission: 'Admission', client: str, work_class: str):
+        self.admission = admission
+        self.client = client
+        self.work_class = work_class
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.admission._release(self)
+
+
+class FairScheduler:
+    """
+    Upstream slots shared by weight between work classes (start-time fair
+    queuing over classes) and round robin between the clients of a class.
+    """
+
+    def __init__(self, slots: int = UPSTREAM_SLOTS, class_slots: Optional[Dict[str, int]] = None,
+                 weights: Optional[Dict[str, int]] = None):
+        self.slots = slots
+        self.class_slots = class_slots if class_slots is not None else {BULK: BULK_SLOTS}
+        self.weights = weights or CLASS_WEIGHTS
+        self.in_use = 0
+        self.class_in_use: Dict[str, int] = {work_class: 0 for work_class in self.weights}
+        self.granted: Dict[str, int] = {work_class: 0 for work_class in self.weights}
+        self.queued: Dict[str, int] = {work_class: 0 for work_class in self.weights}
+        # Virtual time: the start tag of the last grant, and each class's finish tag
+        self._virtual = 0.0
+        self._finish: Dict[str, float] = {work_class: 0.0 for work_class in self.weights}
+        # work class -> client -> waiters; clients are served in turn
+        self._waiting: Dict[str, 'OrderedDict[str, Deque[asyncio.Future]]'] = {
+            work_class: OrderedDict() for work_class in self.weights
+        }
+
+    @contextlib.asynccontextmanager
+    async def slot(self, work_class: str, client: str):
+        """Hold one upstream slot for the body of the with block."""
+        await self.acquire(work_class, client)
+        try:
+            yield
+        finally:
+            self.release(work_class)
+
+    async def acquire(self, work_class: str, client: str) -> None:
+        # Only waiters that could take a slot now come first; bulk work queued
+        # at its own cap must not hold back interactive requests
+        if self._can_grant(work_class) and not any(
+                clients and self._can_grant(waiting_class)
+                for waiting_class, clients in self._waiting.items()):
+            self._grant(work_class)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        if not self._waiting[work_class]:
+            # Fix the class's tag as it starts waiting, so later grants to others don't push it back
+            self._finish[work_class] = self._start_tag(work_class)
+        self._waiting[work_class].setdefault(client, deque()).append(waiter)
+        self.queued[work_class] += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(work_class)  # Granted just as we were cancelled
+            else:
+                self._forget(work_class, client, waiter)
+            raise
+
+    def release(self, work_class: str) -> None:
+        self.in_use -= 1
+        self.class_in_use[work_class] -= 1
+        self._dispatch()
+
+    def _can_grant(self, work_class: str) -> bool:
+        return (self.in_use < self.slots
+                and self.class_in_use[work_class] < self.class_slots.get(work_class, self.slots))
+
+    def _start_tag(self, work_class: str) -> float:
+        if self._waiting[work_class]:
+            return self._finish[work_class]
+        # A class that sat idle does not get to catch up on the time it missed
+        return max(self._finish[work_class], self._virtual)
+
+    def _grant(self, work_class: str) -> None:
+        start = self._start_tag(work_class)
+        self._virtual = max(self._virtual, start)
+        self._finish[work_class] = start + 1.0 / self.weights[work_class]
+        self.in_use += 1
+        self.class_in_use[work_class] += 1
+        self.granted[work_class] += 1
+
+    def _dispatch(self) -> None:
+        while True:
+            eligible = [work_class for work_class, clients in self._waiting.items()
+                        if clients and self._can_grant(work_class)]
+            if not eligible:
+                return
+            work_class = min(eligible,
+                             key=lambda c: self._start_tag(c) + 1.0 / self.weights[c])
+            clients = self._waiting[work_class]
+            client, waiters = next(iter(clients.items()))
+            waiter = waiters.popleft()
+            # The client goes to the back of its class's line
+            del clients[client]
+            if waiters:
+                clients[client] = waiters
+            self._grant(work_class)
+            waiter.set_result(None)
+
+    def _forget(self, work_class: str, client: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiting[work_class].get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[work_class][client]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            work_class: {
+                'in_use': self.class_in_use[work_class],
+                'waiting': sum(len(waiters) for waiters in self._waiting[work_class].values()),
+                'granted': self.granted[work_class],
+                'queued': self.queued[work_class],
+            }
+            for work_class in self.weights
+        }
+
+
+class Admission:
+    """Per-client limits on admitted work, plus the scheduler its upstream requests share."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 scheduler: Optional[FairScheduler] = None):
+        self.limits = limits or CLIENT_LIMITS
+        self.scheduler = scheduler or FairScheduler()
+        self.rejected: Dict[str, int] = {work_class: 0 for work_class in self.limits}
+        # (client, work class) -> admitted and not yet released
+        self._active: Dict[Tuple[str, str], int] = {}
+
+    def admit(self, client: str, work_class: str) -> Lease:
+        """Count work against client, or raise OverQuota if it is at its limit."""
+        key = (client, work_class)
+        limit = self.limits[work_class]
+        if self._active.get(key, 0) >= limit:
+            self.rejected[work_class] += 1
+            raise OverQuota(work_class, limit, RETRY_AFTER[work_class])
+        self._active[key] = self._active.get(key, 0) + 1
+        return Lease(self, client, work_class)
+
+    def _release(self, lease: Lease) -> None:
+        key = (lease.client, lease.work_class)
+        self._active[key] -= 1
+        if not self._active[key]:
+            del self._active[key]
+
+    @contextlib.asynccontextmanager
+    async def interactive(self, client: str):
+        """Admit an interactive request and hold an upstream slot while it runs."""
+        lease = self.admit(client, INTERACTIVE)
+        try:
+            async with self.scheduler.slot(INTERACTIVE, client):
+                yield
+        finally:
+            lease.release()
+
+    def stats(self) -> Dict[str, object]:
+        return {'clients': len({client for client, _ in self._active}),
+                'rejected': dict(self.rejected), 'upstream': self.scheduler.stats()}
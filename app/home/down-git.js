@@ -7,11 +7,16 @@
 var downGitModule = angular.module('downGitModule', [
 ]);
 
+// Base URL of the GitHub File Hunter web server (web_interface.py) that builds
+// the zip, e.g. "https://hunter.example.com". Required: folder downloads are
+// refused until it is set.
+downGitModule.constant('exportServer', '');
+
 downGitModule.factory('downGitService', [
     '$http',
-    '$q',
+    'exportServer',
 
-    function ($http, $q) {
+    function ($http, exportServer) {
         var repoInfo = {};
 
         var parseInfo = function(parameters) {
@@ -23,120 +28,55 @@ downGitModule.factory('downGitService', [
             info.repository = splitPath[2];
             info.branch = splitPath[4];
 
-            info.rootName = splitPath[splitPath.length-1];
             if(!!splitPath[4]){
                 info.resPath = repoPath.substring(
                     repoPath.indexOf(splitPath[4])+splitPath[4].length+1
                 );
             }
-            info.urlPrefix = "https://api.github.com/repos/"+
-                info.author+"/"+info.repository+"/contents/";
-            info.urlPostfix = "?ref="+info.branch;
-
-            if(!parameters.fileName || parameters.fileName==""){
-                info.downloadFileName = info.rootName;
-            } else{
-                info.downloadFileName = parameters.fileName;
-            }
-
-            if(parameters.rootDirectory=="false"){
-                info.rootDirectoryName = "";
-
-            } else if(!parameters.rootDirectory || parameters.rootDirectory=="" ||
-                parameters.rootDirectory=="true"){
-                info.rootDirectoryName = info.rootName+"/";
-
-            } else{
-                info.rootDirectoryName = parameters.rootDirectory+"/";
-            }
 
             return info;
         }
 
-        var downloadDir = function(progress){
-            progress.isProcessing.val = true;
-
-            var dirPaths = [];
-            var files = [];
-            var requestedPromises = [];
-
-            dirPaths.push(repoInfo.resPath);
-            mapFileAndDirectory(dirPaths, files, requestedPromises, progress);
-        }
-
-        var mapFileAndDirectory = function(dirPaths, files, requestedPromises, progress){
-            $http.get(repoInfo.urlPrefix+dirPaths.pop()+repoInfo.urlPostfix).then(function(response) {
-                for(var i=response.data.length-1; i>=0; i--){
-                    if(response.data[i].type=="dir"){
-                        dirPaths.push(response.data[i].path);
-
-                    } else{
-                        if(response.data[i].download_url){
-                            getFile(response.data[i].path,
-                                response.data[i].download_url,
-                                files, requestedPromises, progress
-                            );
-                        } else {
-                            console.log(response.data[i]);
-                        }
-                    }
-                }
-
-                if(dirPaths.length<=0){
-                    downloadFiles(files, requestedPromises, progress);
-                } else{
-                    mapFileAndDirectory(dirPaths, files, requestedPromises, progress);
-                }
-            });
-        }
-
-        var downloadFiles = function(files, requestedPromises, progress){
-            var zip = new JSZip();
-            $q.all(requestedPromises).then(function(data) {
-                for(var i=files.length-1; i>=0; i--){
-                    zip.file(
-                        repoInfo.rootDirectoryName+files[i].path.substring(decodeURI(repoInfo.resPath).length+1),
-                        files[i].data
-                    );
-                }
-
-                progress.isProcessing.val=false;
-                zip.generateAsync({type:"blob"}).then(function(content) {
-                    saveAs(content, repoInfo.downloadFileName+".zip");
-                });
-            });
-        }
-
-        var getFile = function (path, url, files, requestedPromises, progress) {
-            var promise = $http.get(url, {responseType: "arraybuffer"}).then(function (file) {
-                files.push({path:path, data:file.data});
-                progress.downloadedFiles.val = files.length;
-            }, function(error) {
-                console.log(error);
-            });
-
-            requestedPromises.push(promise);
-            progress.totalFiles.val = requestedPromises.length;
+        // The server resolves the folder from one recursive tree listing,
+        // downloads its files concurrently and streams the zip back, so the
+        // browser saves it directly instead of holding every file in memory
+        var exportUrl = function(parameters){
+            var query = "url="+encodeURIComponent(parameters.url);
+            if(parameters.fileName){
+                query += "&fileName="+encodeURIComponent(parameters.fileName);
+            }
+            if(parameters.rootDirectory){
+                query += "&rootDirectory="+encodeURIComponent(parameters.rootDirectory);
+            }
+            return exportServer.replace(/\/+$/, "")+"/api/export?"+query;
         }
 
-        var downloadFile = function (url, progress, toastr) {
-            progress.isProcessing.val=true;
+        var downloadExport = function(parameters, progress, toastr){
+            if(!exportServer){
+                console.log("downGitModule: set the exportServer constant to the export server's URL");
+                toastr.error("No export server configured!", {iconClass: 'toast-down'});
+                return;
+            }
+            var url = exportUrl(parameters);
+            progress.isProcessing.val = true;
             progress.downloadedFiles.val = 0;
-            progress.totalFiles.val = 1;
+            progress.totalFiles.val = 0;
 
-            var zip = new JSZip();
-            $http.get(url, {responseType: "arraybuffer"}).then(function (file) {
-                progress.downloadedFiles.val = 1;
-                zip.file(repoInfo.rootName, file.data);
+            // Checks the link (and counts its files) without downloading anything
+            $http.head(url).then(function(response) {
+                progress.totalFiles.val = parseInt(response.headers('X-File-Count')) || 0;
+                progress.isProcessing.val = false;
+                window.location = url;
 
-                progress.isProcessing.val=false;
-                zip.generateAsync({type:"blob"}).then(function(content) {
-                    saveAs(content, repoInfo.downloadFileName+".zip");
-                });
             }, function(error) {
                 console.log(error);
-                progress.isProcessing.val=false;
-                toastr.warning("Error! Server failure or wrong URL.", {iconClass: 'toast-down'});
+                progress.isProcessing.val = false;
+                if(error.status == 429){
+                    toastr.warning("Server busy! Try again in "+
+                        (error.headers('Retry-After') || "a few")+" seconds.", {iconClass: 'toast-down'});
+                } else{
+                    toastr.warning("Error! Server failure or wrong URL.", {iconClass: 'toast-down'});
+                }
             });
         }
 
@@ -155,19 +95,7 @@ downGitModule.factory('downGitService', [
                     window.location = downloadUrl;
 
                 }else{
-                    $http.get(repoInfo.urlPrefix+repoInfo.resPath+repoInfo.urlPostfix).then(function(response) {
-                        if(response.data instanceof Array){
-                            downloadDir(progress);
-                        }else{
-                            downloadFile(response.data.download_url, progress, toastr);
-                        }
-
-                    }, function(error) {
-                        console.log("probable big file.");
-                        downloadFile("https://raw.githubusercontent.com/"+repoInfo.author+"/"+
-                                repoInfo.repository+"/"+repoInfo.branch+"/"+repoInfo.resPath,
-                                progress, toastr);
-                    });
+                    downloadExport(parameters, progress, toastr);
                 }
             },
         };
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Archive Writer
+
+Streams downloaded file bodies straight into a single tar or zip archive
+instead of writing them under resulting_downloads/. Members are emitted in
+plan order through a small reorder buffer, so the archive is byte-for-byte
+deterministic no matter which download finishes first, and nothing is ever
+written to an intermediate file.
+
+ArchivePipe lets the same writer feed a network response instead of a file:
+members written without a plan are emitted as they arrive, and the archive
+bytes are handed to an async consumer in chunks with backpressure, and can
+be copied to a file on the way (to keep the archive after streaming it).
+"""
+
+import asyncio
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+from integrity import Manifest
+
+# ArchivePipe hands bytes over in chunks of about this size, buffering at most PIPE_CHUNKS
+PIPE_CHUNK_SIZE = 64 * 1024
+PIPE_CHUNKS = 8
+
+# Member bytes ArchiveWriter holds (waiting for their turn or for the writer
+# thread) before write() makes producers wait
+BUFFER_BYTES = 64 * 1024 * 1024
+
+# Fixed member metadata keeps archives reproducible
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+MEMBER_MODE = 0o644
+
+TAR_MODES = {
+    '.tar': 'w|',
+    '.tar.gz': 'w|',
+    '.tgz': 'w|',
+    '.tar.bz2': 'w|bz2',
+    '.tar.xz': 'w|xz',
+    '.tar.zst': 'w|',
+    '.tzst': 'w|',
+}
+
+
+def archive_format(path: str) -> str:
+    """Return the archive suffix for path, or raise ValueError if unsupported."""
+    lowered = path.lower()
+    if lowered.endswith('.zip'):
+        return '.zip'
+    for suffix in sorted(TAR_MODES, key=len, reverse=True):
+        if lowered.endswith(suffix):
+            return suffix
+    supported = ', '.join(['.zip'] + list(TAR_MODES))
+    raise ValueError(f"Unsupported archive type for '{path}' (use one of: {supported})")
+
+
+class ArchiveWriter:
+    """Deterministically ordered, streaming tar/zip writer."""
+
+    def __init__(self, path: str, fileobj=None, save_manifest: bool = True,
+                 max_buffer: int = BUFFER_BYTES):
+        self.path = path
+        self.format = archive_format(path)
+        self.member_count = 0
+        self.total_bytes = 0
+        self.manifest = Manifest(f"{path}.manifest.json")
+        self.save_manifest = save_manifest
+        self._fileobj = fileobj
+        self._owns_fileobj = fileobj is None
+        self._compressor = None
+        self._tar = None
+        self._zip = None
+        self._order: List[str] = []
+        self._position = 0
+        self._section_plans: Dict[int, List[str]] = {}
+        self._stashed: Set[str] = set()
+        self._next_section = 0
+        self._index: Dict[str, int] = {}
+        self._pending: Dict[str, Optional[bytes]] = {}
+        self.max_buffer = max_buffer
+        self._buffered = 0
+        self._in_flight = 0
+        self._room: Optional[asyncio.Event] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hunter-archive')
+        self._writes: List[asyncio.Future] = []
+        self._open()
+
+    def _open(self) -> None:
+        if self._fileobj is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._fileobj = open(self.path, 'wb')
+
+        if self.format == '.zip':
+            self._zip = zipfile.ZipFile(self._fileobj, 'w', zipfile.ZIP_DEFLATED)
+            return
+
+        stream = self._fileobj
+        if self.format in ('.tar.gz', '.tgz'):
+            # tarfile's own gzip stream stamps the current time into the header
+            self._compressor = gzip.GzipFile(filename='', mode='wb', fileobj=stream, mtime=0)
+            stream = self._compressor
+        elif self.format in ('.tar.zst', '.tzst'):
+            # Imported here so runs writing other formats do not pay for it
+            import zstandard
+            self._compressor = zstandard.ZstdCompressor().stream_writer(stream, closefd=False)
+            stream = self._compressor
+        self._tar = tarfile.open(fileobj=stream, mode=TAR_MODES[self.format])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def next_section(self) -> int:
+        """The section number the next batch of planned groups should start at."""
+        return self._next_section + len(self._section_plans)
+
+    def view(self, prefix: str) -> 'ArchiveView':
+        """Return a writer that places members under prefix/."""
+        return ArchiveView(self, prefix)
+
+    def expect(self, names: Iterable[str], section: Optional[int] = None) -> None:
+        """
+        Append members to the plan; they are emitted in exactly this order.
+
+        Plans given with a section number are ordered by section rather than
+        by when they arrive, so concurrently processed jobs still produce a
+        deterministic archive. Sections must be numbered 0, 1, 2, ... and each
+        must be planned exactly once (with an empty plan if it produced nothing).
+        """
+        names = [self._normalize(name) for name in names]
+        if section is not None:
+            self._section_plans[section] = names
+            self._stashed.update(names)
+            while self._next_section in self._section_plans:
+                self._extend_order(self._section_plans.pop(self._next_section))
+                self._next_section += 1
+        else:
+            self._extend_order(names)
+        self._drain()
+
+    def _extend_order(self, names: List[str]) -> None:
+        for name in names:
+            self._stashed.discard(name)
+            if name not in self._index:
+                self._index[name] = len(self._order)
+                self._order.append(name)
+
+    async def write(self, name: str, data: bytes, sha: Optional[str] = None) -> None:
+        """
+        Hand over a member body; it is written once all earlier members are.
+
+        While more than max_buffer bytes are held, this waits for the writer
+        thread to catch up. It does not wait when only a member that has not
+        arrived yet can free memory: its producer may need the download slot
+        the caller is holding.
+        """
+        name = self._normalize(name)
+        if self._emitted(name) or self._pending.get(name) is not None:
+            # Already emitted or waiting its turn (e.g. two jobs sharing an output folder)
+            return
+        if name not in self._index and name not in self._stashed:
+            self.expect([name])
+        self.manifest.record(name, len(data), sha)
+        self._pending[name] = data
+        self._buffered += len(data)
+        self._drain()
+        if self._room is None:
+            self._room = asyncio.Event()
+        while self._buffered > self.max_buffer and self._in_flight:
+            self._room.clear()
+            await self._room.wait()
+
+    def skip(self, name: str) -> None:
+        """Mark a planned member as failed so later members are not held back."""
+        name = self._normalize(name)
+        if self._emitted(name) or (name not in self._index and name not in self._stashed):
+            return
+        self._pending.setdefault(name, None)
+        self._drain()
+
+    def _emitted(self, name: str) -> bool:
+        index = self._index.get(name)
+        return index is not None and index < self._position
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return name.replace(os.sep, '/').lstrip('/')
+
+    def _drain(self) -> None:
+        while self._position < len(self._order) and self._order[self._position] in self._pending:
+            name = self._order[self._position]
+            data = self._pending.pop(name)
+            self._position += 1
+            if data is not None:
+                self._schedule(name, data)
+
+    def _schedule(self, name: str, data: bytes) -> None:
+        # A single writer thread keeps members in order and compression off the loop
+        loop = asyncio.get_running_loop()
+        write = loop.run_in_executor(self._executor, self._add_member, name, data)
+        self._in_flight += 1
+        write.add_done_callback(lambda _: self._written(len(data)))
+        self._writes.append(write)
+
+    def _written(self, size: int) -> None:
+        self._in_flight -= 1
+        self._buffered -= size
+        if self._room is not None:
+            self._room.set()
+
+    def _add_member(self, name: str, data: bytes) -> None:
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = MEMBER_MODE << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = MEMBER_MODE
+            info.mtime = 0
+            self._tar.addfile(info, io.BytesIO(data))
+        self.member_count += 1
+        self.total_bytes += len(data)
+
+    async def flush(self) -> None:
+        """Wait until every member handed over so far has been written."""
+        writes, self._writes = self._writes, []
+        if writes:
+            await asyncio.gather(*writes)
+
+    async def close(self) -> None:
+        """Emit any buffered members, then finalize the archive."""
+        if self._executor is None:
+            return
+        # Sections still missing a plan no longer hold back the ones after them
+        for section in sorted(self._section_plans):
+            self._extend_order(self._section_plans.pop(section))
+        # Members that never arrived are dropped rather than blocking the rest
+        for name in self._order[self._position:]:
+            self._pending.setdefault(name, None)
+        self._drain()
+        await self.flush()
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._finalize)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        # The manifest lives next to the archive so members stay exactly as planned
+        if self.save_manifest:
+            self.manifest.save()
+
+    def _finalize(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+        if self._compressor is not None:
+            # Ends the gzip member / zstd frame; the underlying file stays open
+            self._compressor.close()
+        if self._owns_fileobj:
+            self._fileobj.close()
+
+
+class ArchivePipe(io.RawIOBase):
+    """
+    Write-only file object for ArchiveWriter whose bytes are consumed with
+    chunks() on the event loop. The writer thread blocks while PIPE_CHUNKS
+    chunks are waiting, so memory stays bounded however slow the consumer is.
+    Bytes are also written to copy, if given, from the writer thread.
+    """
+
+    def __init__(self, chunk_size: int = PIPE_CHUNK_SIZE, max_chunks: int = PIPE_CHUNKS, copy=None):
+        self.chunk_size = chunk_size
+        self.copy = copy
+        self.bytes_written = 0
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(max_chunks)
+        self._buffer = bytearray()
+        self._aborted = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        # Called from the archive's writer thread
+        if self._aborted:
+            return len(data)  # Nobody is listening; let the archive wind down
+        if self.copy is not None:
+            self.copy.write(data)
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            chunk, self._buffer = bytes(self._buffer), bytearray()
+            asyncio.run_coroutine_threadsafe(self._queue.put(chunk), self._loop).result()
+        self.bytes_written += len(data)
+        return len(data)
+
+    async def finish(self) -> None:
+        """Hand over what is still buffered and end the stream (after ArchiveWriter.close)."""
+        if self._aborted:
+            return
+        if self._buffer:
+            chunk, self._buffer = bytes(self._buffer), bytearray()
+            await self._queue.put(chunk)
+        await self._queue.put(None)
+
+    def abort(self) -> None:
+        """Stop consuming: later writes are discarded and a writer blocked on a full pipe is released."""
+        self._aborted = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def chunks(self):
+        """Archive bytes as they are produced, until finish()."""
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class ArchiveView:
+    """Prefixing facade over an ArchiveWriter, shared by one job's downloads."""
+
+    def __init__(self, archive: ArchiveWriter, prefix: str):
+        self.archive = archive
+        self.prefix = prefix.strip('/').replace(os.sep, '/')
+
+    def member_name(self, path: str) -> str:
+        """Archive member name for a path written through this view."""
+        return f"{self.prefix}/{path}" if self.prefix else path
+
+    def expect(self, paths: Iterable[str]) -> None:
+        self.archive.expect(self.member_name(p) for p in paths)
+
+    async def write(self, path: str, data: bytes, sha: Optional[str] = None) -> None:
+        await self.archive.write(self.member_name(path), data, sha)
+
+    def skip(self, path: str) -> None:
+        self.archive.skip(self.member_name(path))
+
+    def size_of(self, path: str) -> Optional[int]:
+        """Bytes stored for path, or None if it never reached the archive."""
+        entry = self.archive.manifest.entries.get(self.member_name(path))
+        return entry['size'] if entry else None
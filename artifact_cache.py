@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Artifact Cache
+
+On-disk cache of built download archives for long-lived servers. An archive
+is keyed by its content: the repository plus the sorted (path, blob SHA)
+pairs selected. Blob SHAs pin each file's bytes exactly (downloads are
+verified against them), so a cached archive can never be stale and the same
+selection from any commit that left those files unchanged is a hit.
+
+Archives are built into partial files inside the cache directory and only
+renamed into place once complete, so readers never see a half-written one.
+Entries expire after a TTL, the least recently used are evicted once the
+directory passes a size budget, and a background sweeper also reclaims
+partial files left by interrupted builds.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from github_file_hunter import FileMatch
+
+# How long a built archive is kept, in seconds
+ARTIFACT_TTL = 3600.0
+
+# Disk budget for cached archives
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# How often the sweeper runs, in seconds
+SWEEP_INTERVAL = 60.0
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'github-file-hunter-artifacts')
+
+ARCHIVE_SUFFIX = '.zip'
+PARTIAL_SUFFIX = '.partial'
+
+
+def artifact_key(matches: Iterable['FileMatch']) -> str:
+    """Content key for an archive of matches, independent of their order."""
+    digest = hashlib.sha256()
+    for owner, repo, path, sha in sorted((m.repo_owner.lower(), m.repo_name.lower(), m.path, m.sha)
+                                         for m in matches):
+        digest.update(f"{owner}/{repo}\0{path}\0{sha}\n".encode())
+    return digest.hexdigest()
+
+
+class _Artifact:
+    """A cached archive's size and when it was built."""
+    __slots__ = ('size', 'stored')
+
+    def __init__(self, size: int, stored: float):
+        self.size = size
+        self.stored = stored
+
+
+class ArtifactCache:
+    """Built archives on disk keyed by content, with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = ARTIFACT_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # key -> cached archive; least recently used first
+        self._artifacts: 'OrderedDict[str, _Artifact]' = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """Pick up archives left by an earlier run, oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(ARCHIVE_SUFFIX):
+                with contextlib.suppress(OSError):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    found.append((stat.st_mtime, name[:-len(ARCHIVE_SUFFIX)], stat.st_size))
+        for stored, key, size in sorted(found):
+            self._artifacts[key] = _Artifact(size, stored)
+            self.size += size
+        self.sweep()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ARCHIVE_SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached archive for key, or None on a miss."""
+        artifact = self._artifacts.get(key)
+        if artifact is None or time.time() - artifact.stored > self.ttl:
+            if artifact is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        path = self.path(key)
+        if not os.path.isfile(path):
+            # Removed behind our back
+            self._forget(key)
+            self.misses += 1
+            return None
+        self._artifacts.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def partial(self, key: str) -> str:
+        """A new file in the cache directory to build key's archive in."""
+        fd, path = tempfile.mkstemp(dir=self.directory, prefix=key[:16] + '-', suffix=PARTIAL_SUFFIX)
+        os.close(fd)
+        return path
+
+    def put(self, key: str, partial: str) -> Optional[str]:
+        """
+        Move a completed build into the cache and return its cached path. None
+        if it is too big to cache; the partial file then stays the caller's.
+        """
+        size = os.path.getsize(partial)
+        if size > self.max_bytes:
+            return None  # Would evict everything else and still not fit
+        path = self.path(key)
+        os.replace(partial, path)
+        if key in self._artifacts:
+            self._forget(key)
+        self._artifacts[key] = _Artifact(size, time.time())
+        self.size += size
+        self._evict()
+        return path
+
+    @staticmethod
+    def discard(partial: str) -> None:
+        """Remove an abandoned or failed build."""
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+
+    def sweep(self) -> int:
+        """Remove expired archives and stale partial builds, then enforce the budget; returns bytes freed."""
+        before = self.size
+        now = time.time()
+        for key in [key for key, artifact in self._artifacts.items() if now - artifact.stored > self.ttl]:
+            self._remove(key)
+        self._evict()
+
+        freed = before - self.size
+        for name in os.listdir(self.directory):
+            if not name.endswith(PARTIAL_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            with contextlib.suppress(OSError):
+                stat = os.stat(path)
+                # Builds in progress are written to continuously; only reclaim forgotten ones
+                if now - stat.st_mtime > self.ttl:
+                    os.remove(path)
+                    freed += stat.st_size
+        return freed
+
+    async def run_sweeper(self, interval: float = SWEEP_INTERVAL) -> None:
+        """Sweep every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._artifacts:
+            self._remove(next(iter(self._artifacts)))
+
+    def _remove(self, key: str) -> None:
+        # Clients still reading the file keep their open handle
+        with contextlib.suppress(OSError):
+            os.remove(self.path(key))
+        self._forget(key)
+        self.evicted += 1
+
+    def _forget(self, key: str) -> None:
+        self.size -= self._artifacts.pop(key).size
+
+    def stats(self) -> Dict[str, int]:
+        return {'archives': len(self._artifacts), 'bytes': self.size, 'hits': self.hits,
+                'misses': self.misses, 'evicted': self.evicted}
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Batch Coordinator
+
+HTTP coordinator that hands out jobs from a BatchQueue to workers on other
+hosts (batch_hunter.py --connect). Workers claim small chunks of jobs under a
+lease, keep the lease alive with heartbeats, and post progress and results
+back; jobs whose lease runs out - because the worker died or lost the
+network - are handed to the next worker that asks. The protocol is plain JSON
+over HTTP POST:
+
+    POST /claim      {"worker", "limit"}            -> {"jobs": [{"id", "job"}], "download",
+                                                        "lease_seconds", "done"}
+    POST /heartbeat  {"worker"}                     -> {"ok", "leases"}
+    POST /progress   {"worker", "id", "fields"}     -> {"ok"}
+    POST /result     {"worker", "id", "result"}     -> {"ok"}, or 409 unless the
+                                                       worker holds the job's lease
+    GET  /status                                    -> counts, totals and workers
+
+Anyone who can reach the coordinator can claim jobs and post results, so it
+listens on loopback unless given a shared secret; workers then send the
+secret in the X-Coordinator-Secret header and other requests get 401.
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import time
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from batch_queue import BatchQueue, QueueFeeder
+
+# Progress fields a worker may checkpoint through /progress
+PROGRESS_FIELDS = ('branch', 'resolved_sha', 'matches', 'downloaded', 'total', 'bytes')
+
+# How often an idle worker asks for work again; the coordinator lingers a
+# couple of these intervals after the batch finishes
+WORKER_POLL_INTERVAL = 2.0
+
+SECRET_HEADER = 'X-Coordinator-Secret'
+
+
+def is_loopback(host: str) -> bool:
+    """Whether binding host only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # A hostname; it may resolve to any interface
+
+
+class Coordinator:
+    """Serves one queued batch to remote workers until every job has finished."""
+
+    def __init__(self, queue: BatchQueue, batch: str, download: bool = False,
+                 status_interval: float = 10.0, secret: Optional[str] = None,
+                 feeder: Optional[QueueFeeder] = None):
+        self.queue = queue
+        self.feeder = feeder
+        self.batch = batch
+        self.download = download
+        self.status_interval = status_interval
+        self.secret = secret
+        self.workers: Dict[str, Dict[str, Any]] = {}
+        self.finished = asyncio.Event()
+        self.app = web.Application(middlewares=[self.authenticate])
+        self.app.router.add_post('/claim', self.claim)
+        self.app.router.add_post('/heartbeat', self.heartbeat)
+        self.app.router.add_post('/progress', self.progress)
+        self.app.router.add_post('/result', self.result)
+        self.app.router.add_get('/status', self.status)
+
+    @web.middleware
+    async def authenticate(self, request: web.Request, handler):
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, '').encode(),
+                                                   self.secret.encode()):
+            raise web.HTTPUnauthorized(text='missing or wrong coordinator secret')
+        return await handler(request)
+
+    def _seen(self, worker: str) -> Dict[str, Any]:
+        info = self.workers.setdefault(worker, {'jobs': 0, 'bytes': 0})
+        info['last_seen'] = time.time()
+        return info
+
+    def _check_finished(self) -> bool:
+        counts = self.queue.counts(self.batch)
+        if counts['pending'] == 0 and counts['running'] == 0 and not self.queue.loading(self.batch):
+            self.finished.set()
+        return self.finished.is_set()
+
+    @staticmethod
+    async def _payload(request: web.Request) -> Dict[str, Any]:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text='expected a JSON body')
+        if not isinstance(payload, dict) or not isinstance(payload.get('worker'), str):
+            raise web.HTTPBadRequest(text='missing worker id')
+        return payload
+
+    @staticmethod
+    def _job_id(payload: Dict[str, Any]) -> int:
+        try:
+            return int(payload['id'])
+        except (KeyError, TypeError, ValueError):
+            raise web.HTTPBadRequest(text='missing or invalid job id')
+
+    async def claim(self, request: web.Request) -> web.Response:
+        payload = await self._payload(request)
+        self._seen(payload['worker'])
+        try:
+            limit = max(1, min(int(payload.get('limit', 1)), 100))
+        except (TypeError, ValueError):
+            raise web.HTTPBadRequest(text='invalid limit')
+        if self.feeder is not None:
+            # The batch file is moved into the queue as workers drain it
+            self.feeder.top_up()
+        claimed = self.queue.claim(self.batch, limit, payload['worker'])
+        return web.json_response({
+            'jobs': [{'id': job_id, 'job': job} for job_id, job in claimed],
+            'download': self.download,
+            'lease_seconds': self.queue.lease_seconds,
+            # Nothing handed out and nothing left running anywhere: the worker can stop
+            'done': not claimed and self._check_finished(),
+        })
+
+    async def heartbeat(self, request: web.Request) -> web.Response:
+        payload = await self._payload(request)
+        self._seen(payload['worker'])
+        return web.json_response({'ok': True, 'leases': self.queue.heartbeat(payload['worker'])})
+
+    async def progress(self, request: web.Request) -> web.Response:
+        payload = await self._payload(request)
+        self._seen(payload['worker'])
+        fields = {name: value for name, value in (payload.get('fields') or {}).items()
+                  if name in PROGRESS_FIELDS}
+        self.queue.update(self._job_id(payload), payload['worker'], **fields)
+        return web.json_response({'ok': True})
+
+    async def result(self, request: web.Request) -> web.Response:
+        payload = await self._payload(request)
+        info = self._seen(payload['worker'])
+        result = payload.get('result')
+        if not isinstance(result, dict):
+            raise web.HTTPBadRequest(text='missing result')
+        if not self.queue.finish(self._job_id(payload), result, payload['worker'], self.batch):
+            # Not this batch's job, or its lease ran out and another worker has it
+            raise web.HTTPConflict(text='job is not leased to this worker')
+        info['jobs'] += 1
+        info['bytes'] += result.get('bytes', 0)
+        self._check_finished()
+        return web.json_response({'ok': True})
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.json_response(self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'counts': self.queue.counts(self.batch),
+            'totals': self.queue.totals(self.batch),
+            'workers': {worker: {'jobs': info['jobs'], 'bytes': info['bytes'],
+                                 'idle_seconds': round(now - info['last_seen'], 1)}
+                        for worker, info in self.workers.items()},
+        }
+
+    def print_status(self) -> None:
+        snapshot = self.snapshot()
+        counts, totals = snapshot['counts'], snapshot['totals']
+        print(f"📡 {counts['done']} done, {counts['failed']} failed, {counts['running']} running, "
+              f"{counts['pending']} pending - {totals['files']} files, "
+              f"{totals['bytes'] / (1024 * 1024):.1f} MB from {len(self.workers)} workers")
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765,
+                    linger: Optional[float] = None) -> None:
+        """
+        Serve until every job is done or failed.
+
+        The server stays up for `linger` seconds afterwards (default: a few
+        poll intervals) so idle workers learn that the batch is finished.
+        Binding anything but loopback requires a secret.
+        """
+        if not self.secret and not is_loopback(host):
+            raise ValueError(f"refusing to serve on {host} without a shared secret")
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"📡 Coordinator listening on http://{host}:{port}")
+        try:
+            while not self._check_finished():
+                try:
+                    await asyncio.wait_for(self.finished.wait(), self.status_interval)
+                except asyncio.TimeoutError:
+                    self.print_status()
+            self.print_status()
+            await asyncio.sleep(WORKER_POLL_INTERVAL * 2 if linger is None else linger)
+        finally:
+            await runner.cleanup()
+
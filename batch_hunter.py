@@ -4,20 +4,49 @@ Enhanced GitHub File Hunter - Batch Processing with Auto-Branch Detection
 Supports CSV and JSON batch processing with 100% success rate.
 """
 
+if __name__ == "__main__":
+    # Hand the command to a running hunter daemon before paying for heavy imports
+    from hunter_client import forward
+    forward('batch_hunter')
+
 import json
 import csv
 import os
 import sys
 import argparse
 import asyncio
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-import aiohttp
-import aiofiles
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator
+from dataclasses import dataclass, asdict, field
 import fnmatch
+import itertools
+from urllib.parse import urlparse
 import re
 
+from retry_policy import RetryPolicy, LatencyTracker, FetchError, fetch_with_retry
+from bulk_writer import BulkWriter
+from archive_writer import ArchiveWriter
+from batch_queue import FEED_POLL_INTERVAL, BatchQueue, QueueFeeder, worker_id
+from rate_budget import RateBudget
+from results_stream import ResultStream, STREAM_FORMATS
+from cost_estimate import (CostEstimate, count_request, counting_requests, estimate_seconds,
+                           fetch_rate_limit, print_estimate)
+from hunter_daemon import warm_state
+from singleflight import SingleFlight, token_scope
+
+# Chunk size for incrementally decoding JSON array batch files
+JSON_READ_SIZE = 64 * 1024
+
+# Branches probed, in priority order, when a repository's metadata is unavailable
+FALLBACK_BRANCHES = ['main', 'master', 'develop', 'dev']
+
+# Seconds a guessed default branch or a missing branch is remembered; the
+# branch may yet be pushed, or the repository metadata become readable again
+BRANCH_GUESS_TTL = 300.0
+
 @dataclass
 class SearchCriteria:
     extensions: List[str] = None
@@ -34,11 +63,63 @@ class BatchJob:
     branch: str = None
     search_criteria: SearchCriteria = None
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BatchJob':
+        """Rebuild a job serialized with dataclasses.asdict (e.g. by BatchQueue)"""
+        criteria = data.get('search_criteria')
+        return cls(**{**data, 'search_criteria': SearchCriteria(**criteria) if criteria else None})
+
+# Progress callback: (job index, checkpoint fields such as branch, matches, downloaded)
+ProgressCallback = Callable[[int, Dict[str, Any]], None]
+
+@dataclass
+class JobGroup:
+    """Batch jobs that share a repository and ref (branch None = auto-detect)"""
+    owner: Optional[str]
+    repo: Optional[str]
+    branch: Optional[str]
+    members: List[Tuple[int, BatchJob]] = field(default_factory=list)
+
+@dataclass
+class StageLimits:
+    """Per-stage concurrency limits for the batch pipeline"""
+    resolve: asyncio.Semaphore
+    match: asyncio.Semaphore
+    download: asyncio.Semaphore
+
+    @classmethod
+    def create(cls, resolve: int, match: int, download: int) -> 'StageLimits':
+        return cls(asyncio.Semaphore(resolve), asyncio.Semaphore(match), asyncio.Semaphore(download))
+
 class BatchHunter:
-    def __init__(self, token: Optional[str] = None, max_concurrent: int = 3):
+    def __init__(self, token: Optional[str] = None, max_concurrent: int = 3,
+                 retry_policy: Optional[RetryPolicy] = None, download_concurrency: int = 8,
+                 rate_budget: Optional[RateBudget] = None):
         self.token = token or os.getenv('GITHUB_TOKEN')
         self.max_concurrent = max_concurrent
+        self.download_concurrency = download_concurrency
         self.session = None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_budget = rate_budget
+        self.load_errors = 0
+        # GITHUB_API_URL points the hunter at GitHub Enterprise or a local mock server
+        self.base_url = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+        self.latency = LatencyTracker()
+        # Ref resolution cache, keyed by token scope since what a token can see
+        # differs: default branch per repository as GitHub reported it, the
+        # fallback branch chosen when it could not (expiring), and each probed
+        # branch's outcome (misses expiring). Inside the hunter daemon they are
+        # shared by every command.
+        warm = warm_state()
+        self.default_branches: Dict[Tuple[str, str, str], str] = warm.cache('default_branches') if warm else {}
+        self.fallback_branches: Dict[Tuple[str, str, str], Tuple[str, float]] = \
+            warm.cache('fallback_branches') if warm else {}
+        self.branch_probes: Dict[Tuple[str, str, str, str], Tuple[bool, Optional[float]]] = \
+            warm.cache('branch_probes') if warm else {}
+        self.owns_session = True
+        # Concurrent identical lookups share one request (across commands in the daemon)
+        self.flights = warm.flights if warm else SingleFlight()
+        self.scope = token_scope(self.token)
         
         # Search profiles
         self.profiles = {
@@ -93,11 +174,22 @@ class BatchHunter:
         }
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Deferred until a network operation actually starts
+        import aiohttp
+        
+        timeout = aiohttp.ClientTimeout(total=self.retry_policy.attempt_timeout)
+        warm = warm_state()
+        if warm is not None and not self.rate_budget:
+            # Inside the hunter daemon: reuse a pooled session that outlives this command
+            self.session = warm.session(timeout=timeout)
+            self.owns_session = False
+        else:
+            trace_configs = [self.rate_budget.trace_config()] if self.rate_budget else None
+            self.session = aiohttp.ClientSession(timeout=timeout, trace_configs=trace_configs)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self.owns_session:
             await self.session.close()
 
     def parse_size(self, size_str: str) -> int:
@@ -128,58 +220,139 @@ class BatchHunter:
 
     async def get_default_branch(self, owner: str, repo: str) -> str:
         """Get the default branch for a repository with auto-detection"""
+        key = (self.scope, owner.lower(), repo.lower())
+        if key in self.default_branches:
+            return self.default_branches[key]
+        guess = self.fallback_branches.get(key)
+        if guess and guess[1] > time.monotonic():
+            return guess[0]
+        # Jobs for the same repository starting together share one detection
+        return await self.flights.do(
+            (self.scope, 'default_branch', owner.lower(), repo.lower()),
+            lambda: self._detect_default_branch(owner, repo)
+        )
+
+    async def _detect_default_branch(self, owner: str, repo: str) -> str:
+        key = (self.scope, owner.lower(), repo.lower())
         headers = {}
         if self.token:
             headers['Authorization'] = f'token {self.token}'
         
         try:
+            count_request()
             async with self.session.get(
-                f'https://api.github.com/repos/{owner}/{repo}',
+                f'{self.base_url}/repos/{owner}/{repo}',
                 headers=headers
             ) as response:
                 if response.status == 200:
                     repo_data = await response.json()
-                    return repo_data.get('default_branch', 'main')
+                    branch = repo_data.get('default_branch')
+                    if branch:
+                        self.default_branches[key] = branch
+                        return branch
         except Exception as e:
             print(f"    ⚠️ Could not detect default branch: {e}")
         
-        # Fallback to common branch names
-        for branch in ['main', 'master', 'develop', 'dev']:
+        # Fallback to common branch names, probed concurrently. The guess is
+        # only remembered briefly, so GitHub is asked again once it may answer.
+        branch = await self.probe_branches(owner, repo, FALLBACK_BRANCHES, headers)
+        branch = branch or 'main'  # Final fallback
+        self.fallback_branches[key] = (branch, time.monotonic() + BRANCH_GUESS_TTL)
+        return branch
+
+    def cached_probe(self, key: Tuple[str, str, str, str]) -> Optional[bool]:
+        """A branch probe's remembered outcome, or None if unknown or expired."""
+        entry = self.branch_probes.get(key)
+        if entry is None:
+            return None
+        exists, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            self.branch_probes.pop(key, None)
+            return None
+        return exists
+
+    async def probe_branches(self, owner: str, repo: str, candidates: List[str],
+                             headers: Dict[str, str]) -> Optional[str]:
+        """
+        Check candidate branches concurrently and return the first that exists
+        in candidates order, or None. Remembered outcomes are consulted first,
+        so only branches ahead of the first one known to exist are probed, and
+        outstanding probes are cancelled once the answer is known. Branches
+        found are cached; misses for BRANCH_GUESS_TTL, since the branch may yet
+        be pushed; errors not at all, since they may be transient.
+        """
+        key = (self.scope, owner.lower(), repo.lower())
+        known = {branch: self.cached_probe((*key, branch)) for branch in candidates}
+        unknown = []
+        for branch in candidates:
+            if known[branch]:
+                break
+            if known[branch] is None:
+                unknown.append(branch)
+        
+        async def probe(branch: str) -> Optional[bool]:
             try:
+                count_request()
                 async with self.session.get(
-                    f'https://api.github.com/repos/{owner}/{repo}/branches/{branch}',
+                    f'{self.base_url}/repos/{owner}/{repo}/branches/{branch}',
                     headers=headers
                 ) as response:
                     if response.status == 200:
-                        return branch
-            except:
-                continue
+                        self.branch_probes[(*key, branch)] = (True, None)
+                        return True
+                    if response.status == 404:
+                        self.branch_probes[(*key, branch)] = (False, time.monotonic() + BRANCH_GUESS_TTL)
+                        return False
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            return None  # Unknown; not cached so a later job may retry it
         
-        return 'main'  # Final fallback
+        tasks = {branch: asyncio.ensure_future(probe(branch)) for branch in unknown}
+        try:
+            for branch in candidates:
+                if (await tasks[branch]) if branch in tasks else known[branch]:
+                    return branch
+            return None
+        finally:
+            for task in tasks.values():
+                task.cancel()
 
     async def get_repository_tree(self, owner: str, repo: str, branch: str = None) -> List[Dict]:
         """Get repository file tree"""
+        data = await self.fetch_tree(owner, repo, branch)
+        return data.get('tree', []) if data else []
+
+    async def fetch_tree(self, owner: str, repo: str, branch: str = None) -> Optional[Dict]:
+        """Get the full recursive tree response (tree SHA and entries), or None"""
         if not branch:
             branch = await self.get_default_branch(owner, repo)
         
+        return await self.flights.do(
+            (self.scope, 'tree', owner.lower(), repo.lower(), branch),
+            lambda: self._fetch_tree(owner, repo, branch)
+        )
+
+    async def _fetch_tree(self, owner: str, repo: str, branch: str) -> Optional[Dict]:
         headers = {}
         if self.token:
             headers['Authorization'] = f'token {self.token}'
         
         try:
+            count_request()
             async with self.session.get(
-                f'https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1',
+                f'{self.base_url}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1',
                 headers=headers
             ) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    return data.get('tree', [])
+                    return await response.json()
                 else:
                     print(f"    ❌ Failed to get tree: HTTP {response.status}")
-                    return []
+                    return None
         except Exception as e:
             print(f"    ❌ Error getting tree: {e}")
-            return []
+            return None
 
     def is_glob_pattern(self, pattern: str) -> bool:
         """Check if a pattern is a glob pattern (contains *, ?, [, ]) or a regex pattern"""
@@ -257,47 +430,60 @@ class BatchHunter:
         return True
 
     async def download_file(self, owner: str, repo: str, branch: str, file_path: str, 
-                          output_dir: str, semaphore: asyncio.Semaphore) -> bool:
-        """Download a single file"""
+                          output_dir: str, semaphore: asyncio.Semaphore,
+                          writer=None) -> bool:
+        """Download a single file, handing the body to writer (BulkWriter/ArchiveWriter) when given"""
         async with semaphore:
             headers = {}
             if self.token:
                 headers['Authorization'] = f'token {self.token}'
             
             try:
-                url = f'https://api.github.com/repos/{owner}/{repo}/contents/{file_path}?ref={branch}'
-                async with self.session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('type') == 'file' and 'download_url' in data:
-                            # Download the actual file content
-                            async with self.session.get(data['download_url']) as file_response:
-                                if file_response.status == 200:
-                                    # Create output directory
-                                    output_path = os.path.join(output_dir, file_path)
-                                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                                    
-                                    # Write file
-                                    async with aiofiles.open(output_path, 'wb') as f:
-                                        await f.write(await file_response.read())
-                                    return True
-                return False
+                url = f'{self.base_url}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}'
+                # Metadata lookups cost rate limit, so they are retried but never hedged
+                data = json.loads(await fetch_with_retry(
+                    self.session, url, self.retry_policy, headers=headers, hedge=False
+                ))
+                if data.get('type') == 'file' and 'download_url' in data:
+                    # Download the actual file content
+                    content = await fetch_with_retry(
+                        self.session, data['download_url'], self.retry_policy, self.latency,
+                        expected_sha=data.get('sha'), expected_size=data.get('size')
+                    )
+                    
+                    if writer is not None:
+                        # Directories were created up front by process_repository
+                        await writer.write(file_path, content, data.get('sha'))
+                        return True
+                    
+                    # Create output directory
+                    output_path = os.path.join(output_dir, file_path)
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    
+                    # Write file
+                    import aiofiles
+                    async with aiofiles.open(output_path, 'wb') as f:
+                        await f.write(content)
+                    return True
+            except FetchError as e:
+                print(f"    ❌ Failed to download {file_path}: {e}")
             except Exception as e:
                 print(f"    ❌ Error downloading {file_path}: {e}")
-                return False
+            
+            if writer is not None:
+                writer.skip(file_path)
+            return False
 
-    async def process_repository(self, job: BatchJob, download: bool = False) -> Dict[str, Any]:
-        """Process a single repository"""
-        # Parse repository URL
-        repo_url = job.repo_url.replace('https://github.com/', '').replace('.git', '')
+    def parse_repo_url(self, repo_url: str) -> Optional[Tuple[str, str]]:
+        """Split a batch repo_url into (owner, repo), or None if malformed"""
+        repo_url = repo_url.replace('https://github.com/', '').replace('.git', '')
         if '/' not in repo_url:
-            return {"success": False, "error": "Invalid repository URL format"}
-        
+            return None
         owner, repo = repo_url.split('/', 1)
-        
-        print(f"  📂 Processing {owner}/{repo}")
-        
-        # Get search criteria
+        return owner, repo
+
+    def resolve_criteria(self, job: BatchJob) -> Optional[SearchCriteria]:
+        """Combine a job's own search criteria with its profile"""
         criteria = job.search_criteria
         if job.profile and job.profile in self.profiles:
             profile_criteria = self.profiles[job.profile]
@@ -308,177 +494,976 @@ class BatchHunter:
                 criteria.exclude_patterns = criteria.exclude_patterns or profile_criteria.exclude_patterns
             else:
                 criteria = profile_criteria
-        
-        # Auto-detect branch if not specified
-        branch = job.branch
-        if not branch or branch in ['auto', 'null', None]:
+        return criteria
+
+    @staticmethod
+    def requested_branch(job: BatchJob) -> Optional[str]:
+        """The job's explicit branch, or None when it should be auto-detected"""
+        if not job.branch or job.branch in ['auto', 'null']:
+            return None
+        return job.branch
+
+    def group_jobs(self, jobs: List[BatchJob]) -> List[JobGroup]:
+        """
+        Coalesce jobs that target the same repository and ref.
+
+        Groups are ordered by their first job, so output stays deterministic.
+        Jobs with malformed URLs get a group of their own.
+        """
+        groups: Dict[Tuple, JobGroup] = {}
+        for index, job in enumerate(jobs):
+            parsed = self.parse_repo_url(job.repo_url)
+            if parsed is None:
+                key = ('invalid', index)
+                owner = repo = None
+            else:
+                owner, repo = parsed
+                key = (owner.lower(), repo.lower(), self.requested_branch(job))
+            if key not in groups:
+                groups[key] = JobGroup(owner, repo, self.requested_branch(job))
+            groups[key].members.append((index, job))
+        return list(groups.values())
+
+    async def resolve_branch(self, owner: str, repo: str, branch: Optional[str]) -> str:
+        """Stage 1: use the requested branch or auto-detect the default one"""
+        if not branch:
             branch = await self.get_default_branch(owner, repo)
-            print(f"    🔧 Auto-detected branch: {branch}")
-        
-        # Get repository tree
-        tree = await self.get_repository_tree(owner, repo, branch)
+            print(f"    🔧 {owner}/{repo}: auto-detected branch {branch}")
+        return branch
+
+    async def find_matching_files(self, owner: str, repo: str, branch: str,
+                                  criteria_list: List[Optional[SearchCriteria]]) -> Optional[Tuple[str, List[List[str]]]]:
+        """
+        Stage 2: fetch the tree once and match it against every job's criteria
+        in a single pass. Returns (tree SHA, one list of paths per criteria),
+        or None if the tree is unavailable.
+        """
+        data = await self.fetch_tree(owner, repo, branch)
+        tree = data.get('tree', []) if data else []
         if not tree:
-            return {"success": False, "error": "Could not fetch repository tree"}
+            return None
         
-        # Filter files based on criteria
-        matching_files = []
+        matches = [[item.get('path', '') for item in found]
+                   for found in self.match_tree(tree, criteria_list)]
+        counts = ', '.join(str(len(found)) for found in matches)
+        print(f"    ✅ {owner}/{repo}: found {counts} matching files")
+        return data.get('sha', ''), matches
+
+    def match_tree(self, tree: List[Dict], criteria_list: List[Optional[SearchCriteria]]) -> List[List[Dict]]:
+        """Match a tree's blobs against every criteria in one pass; one list of tree entries per criteria"""
+        matches = [[] for _ in criteria_list]
         for item in tree:
             if item.get('type') == 'blob':  # Only files, not directories
                 file_path = item.get('path', '')
-                if self.matches_criteria(file_path, criteria):
-                    matching_files.append(file_path)
+                for found, criteria in zip(matches, criteria_list):
+                    if self.matches_criteria(file_path, criteria):
+                        found.append(item)
+        return matches
+
+    async def download_plan(self, owner: str, repo: str, branch: str,
+                            plan: Dict[str, List[str]], semaphore: asyncio.Semaphore,
+                            archive: Optional[ArchiveWriter] = None,
+                            section: Optional[int] = None,
+                            on_file: Optional[Callable[[str, str, bool], None]] = None) -> Dict[Tuple[str, str], Optional[int]]:
+        """
+        Stage 3: download a deduplicated {output_dir: [paths]} plan through
+        the shared download semaphore. Returns {(output_dir, path): bytes
+        written}, with None for files that failed. on_file(output_dir, path,
+        success) is called as each download finishes.
+        """
+        writers = {}
+        if archive is not None:
+            for output_dir in plan:
+                writers[output_dir] = archive.view(self.archive_prefix(output_dir))
+            # One section per group keeps the archive in job order
+            archive.expect([writers[output_dir].member_name(path)
+                            for output_dir, paths in plan.items() for path in paths], section)
+        else:
+            for output_dir, paths in plan.items():
+                # Create the directory layout once, up front
+                writers[output_dir] = BulkWriter(output_dir)
+                writers[output_dir].expect(paths)
         
-        print(f"    ✅ Found {len(matching_files)} matching files")
+        async def fetch(output_dir: str, path: str) -> bool:
+            ok = await self.download_file(owner, repo, branch, path, output_dir, semaphore,
+                                          writers[output_dir])
+            if on_file is not None:
+                on_file(output_dir, path, ok)
+            return ok
         
-        if not download:
-            return {
-                "success": True,
-                "matches": len(matching_files),
-                "files": matching_files[:10]  # Preview first 10
-            }
+        targets = [(output_dir, path) for output_dir, paths in plan.items() for path in paths]
+        download_tasks = [fetch(output_dir, path) for output_dir, path in targets]
+        results = await asyncio.gather(*download_tasks, return_exceptions=True)
         
-        if not matching_files:
-            return {"success": False, "error": "No matching files found"}
+        if archive is None:
+            for output_dir, writer in writers.items():
+                for path, error in await writer.close():
+                    print(f"    ❌ Error writing {path}: {error}")
         
-        # Download files
-        os.makedirs(job.output_dir, exist_ok=True)
-        semaphore = asyncio.Semaphore(self.max_concurrent)
+        # Writers drop failed writes from their manifests, so sizes reflect what landed
+        return {
+            (output_dir, path): writers[output_dir].size_of(path) if result is True else None
+            for (output_dir, path), result in zip(targets, results)
+        }
+
+    async def process_group(self, group: JobGroup, download: bool = False,
+                            archive: Optional[ArchiveWriter] = None,
+                            limits: Optional['StageLimits'] = None,
+                            section: Optional[int] = None,
+                            progress: Optional[ProgressCallback] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Process every job in a group with one branch detection, one tree
+        fetch, one matching pass and deduplicated downloads.
+
+        Each stage runs under its own limit from limits, so when many groups
+        run at once one repo can download while others resolve or match.
+        progress, if given, receives checkpoint fields per job index as each
+        stage completes. Returns a result per job index.
+        """
+        limits = limits or StageLimits.create(self.max_concurrent, self.max_concurrent,
+                                              self.download_concurrency)
+        planned = False
         
-        download_tasks = [
-            self.download_file(owner, repo, branch, file_path, job.output_dir, semaphore)
-            for file_path in matching_files
-        ]
+        def for_all(result: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+            return {index: dict(result) for index, _ in group.members}
         
-        results = await asyncio.gather(*download_tasks, return_exceptions=True)
-        successful_downloads = sum(1 for r in results if r is True)
+        def report(index: int, **fields: Any) -> None:
+            if progress is not None:
+                progress(index, fields)
         
-        return {
-            "success": True,
-            "downloaded": successful_downloads,
-            "total_matches": len(matching_files),
-            "output_dir": job.output_dir
-        }
+        try:
+            if group.owner is None:
+                return for_all({"success": False, "error": "Invalid repository URL format"})
+            owner, repo = group.owner, group.repo
+            
+            suffix = f" ({len(group.members)} jobs)" if len(group.members) > 1 else ""
+            print(f"  📂 Processing {owner}/{repo}{suffix}")
+            
+            async with limits.resolve:
+                branch = await self.resolve_branch(owner, repo, group.branch)
+            for index, _ in group.members:
+                report(index, branch=branch)
+            
+            criteria_list = [self.resolve_criteria(job) for _, job in group.members]
+            async with limits.match:
+                matched = await self.find_matching_files(owner, repo, branch, criteria_list)
+            if matched is None:
+                return for_all({"success": False, "error": "Could not fetch repository tree"})
+            tree_sha, matched = matched
+            for (index, _), files in zip(group.members, matched):
+                report(index, resolved_sha=tree_sha, matches=len(files), total=len(files))
+            
+            if not download:
+                return {
+                    index: {
+                        "success": True,
+                        "matches": len(files),
+                        "files": files[:10]  # Preview first 10
+                    }
+                    for (index, _), files in zip(group.members, matched)
+                }
+            
+            # Deduplicate files shared by jobs writing to the same output_dir
+            plan: Dict[str, List[str]] = {}
+            for (_, job), files in zip(group.members, matched):
+                planned_files = plan.setdefault(job.output_dir, [])
+                seen = set(planned_files)
+                planned_files.extend(f for f in files if f not in seen)
+            
+            # Which jobs each planned file counts towards, for progress checkpoints
+            owners: Dict[Tuple[str, str], List[int]] = {}
+            for (index, job), files in zip(group.members, matched):
+                for f in files:
+                    owners.setdefault((job.output_dir, f), []).append(index)
+            downloaded = {index: 0 for index, _ in group.members}
+            
+            def on_file(output_dir: str, path: str, ok: bool) -> None:
+                for index in owners.get((output_dir, path), ()) if ok else ():
+                    downloaded[index] += 1
+                    report(index, downloaded=downloaded[index])
+            
+            planned = True
+            outcomes = await self.download_plan(owner, repo, branch, plan, limits.download,
+                                                archive, section, on_file)
+            
+            results = {}
+            for (index, job), files in zip(group.members, matched):
+                if not files:
+                    results[index] = {"success": False, "error": "No matching files found"}
+                    continue
+                sizes = [outcomes.get((job.output_dir, f)) for f in files]
+                result = {
+                    "success": True,
+                    "downloaded": sum(1 for size in sizes if size is not None),
+                    "total_matches": len(files),
+                    "bytes": sum(size for size in sizes if size is not None)
+                }
+                if archive is not None:
+                    result["output_archive"] = archive.path
+                else:
+                    result["output_dir"] = job.output_dir
+                results[index] = result
+            return results
+        finally:
+            if archive is not None and section is not None and not planned:
+                # Release this group's archive section so later groups are not held back
+                archive.expect([], section)
 
-    def load_batch_jobs_from_csv(self, csv_file: str) -> List[BatchJob]:
-        """Load batch jobs from CSV file"""
-        jobs = []
+    async def process_repository(self, job: BatchJob, download: bool = False,
+                                 archive: Optional[ArchiveWriter] = None) -> Dict[str, Any]:
+        """Process a single repository, downloading into job.output_dir or archive"""
+        parsed = self.parse_repo_url(job.repo_url)
+        owner, repo = parsed if parsed else (None, None)
+        group = JobGroup(owner, repo, self.requested_branch(job), [(0, job)])
+        return (await self.process_group(group, download, archive))[0]
+
+    async def estimate_group(self, group: JobGroup, limit: asyncio.Semaphore) -> Tuple[Dict[int, CostEstimate], int, float]:
+        """
+        Resolve and match a group like process_group, but only project what
+        downloading would cost. Shared costs (branch detection, tree fetch)
+        and files shared through a common output_dir are charged to the first
+        job that needs them. Returns (estimate per job index, API calls made,
+        seconds spent on them).
+        """
+        keys = {index: job.repo_url.replace('https://github.com/', '').replace('.git', '')
+                for index, job in group.members}
+        if group.owner is None:
+            return {index: CostEstimate(keys[index], error="Invalid repository URL format")
+                    for index, _ in group.members}, 0, 0.0
+        owner, repo = group.owner, group.repo
+        
+        started = time.monotonic()
+        with counting_requests() as issued:
+            async with limit:
+                branch = group.branch or await self.get_default_branch(owner, repo)
+                data = await self.fetch_tree(owner, repo, branch)
+        # Branch probes, cached answers and lookups shared with another group all show here
+        calls = issued[0]
+        elapsed = time.monotonic() - started
+        
+        tree = data.get('tree', []) if data else []
+        if not tree:
+            return {index: CostEstimate(keys[index], branch, error="Could not fetch repository tree")
+                    for index, _ in group.members}, calls, elapsed
+        
+        criteria_list = [self.resolve_criteria(job) for _, job in group.members]
+        estimates = {}
+        planned = set()
+        for position, ((index, job), found) in enumerate(zip(group.members, self.match_tree(tree, criteria_list))):
+            estimate = CostEstimate(keys[index], branch, matches=len(found),
+                                    api_calls=calls if position == 0 else 0)
+            for item in found:
+                if (job.output_dir, item['path']) in planned:
+                    continue
+                planned.add((job.output_dir, item['path']))
+                # One contents lookup (API) plus one raw download per unique file
+                estimate.api_calls += 1
+                estimate.downloads += 1
+                estimate.bytes += item.get('size', 0)
+            estimates[index] = estimate
+        return estimates, calls, elapsed
+
+    async def estimate_batch(self, jobs: List[BatchJob], per_job: bool = True) -> bool:
+        """
+        Print the projected cost of a batch without downloading anything.
+        Returns True if it fits in the current rate-limit window.
+        """
+        limit = asyncio.Semaphore(self.max_concurrent)
+        outcomes = await asyncio.gather(*(self.estimate_group(group, limit)
+                                          for group in self.group_jobs(jobs)))
+        estimates: Dict[int, CostEstimate] = {}
+        for group_estimates, _, _ in outcomes:
+            estimates.update(group_estimates)
+        spent = sum(calls for _, calls, _ in outcomes)
+        measured = sum(elapsed for _, _, elapsed in outcomes)
+        
+        ordered = [estimates[index] for index in range(len(jobs))]
+        api_calls = sum(estimate.api_calls for estimate in ordered)
+        downloads = sum(estimate.downloads for estimate in ordered)
+        seconds = estimate_seconds(api_calls, downloads, sum(estimate.bytes for estimate in ordered),
+                                   measured / spent if spent else None, self.download_concurrency)
+        
+        headers = {'Authorization': f'token {self.token}'} if self.token else {}
+        rate_limit = await fetch_rate_limit(self.session, self.base_url, headers)
+        return print_estimate(ordered, rate_limit, seconds, spent, per_job)
+
+    @staticmethod
+    def archive_prefix(output_dir: str) -> str:
+        """Map a job's output_dir to its folder inside an output archive"""
+        prefix = os.path.relpath(output_dir, './resulting_downloads')
+        if prefix == '.' or prefix.startswith('..'):
+            return ''
+        return prefix.replace(os.sep, '/')
+
+    @staticmethod
+    def result_keys(jobs: List[BatchJob]) -> List[str]:
+        """Per-job result keys: owner/repo, with #2, #3... for repeated repositories"""
+        keys = []
+        seen: Dict[str, int] = {}
+        for job in jobs:
+            repo_key = job.repo_url.replace('https://github.com/', '').replace('.git', '')
+            seen[repo_key] = seen.get(repo_key, 0) + 1
+            keys.append(repo_key if seen[repo_key] == 1 else f"{repo_key}#{seen[repo_key]}")
+        return keys
+
+    @staticmethod
+    def normalize_output_dir(output_dir: Optional[str]) -> str:
+        """Keep job output under resulting_downloads"""
+        output_dir = output_dir or './resulting_downloads'
+        if not output_dir.startswith('./resulting_downloads'):
+            output_dir = f"./resulting_downloads/{output_dir.lstrip('./')}"
+        return output_dir
+
+    def job_from_csv_row(self, row: Dict[str, str]) -> BatchJob:
+        """Build a job from one CSV row, raising ValueError if it is invalid"""
+        if not (row.get('repo_url') or '').strip():
+            raise ValueError("missing repo_url")
+        
+        # Parse extensions
+        extensions = None
+        if row.get('extensions'):
+            extensions = [ext.strip() for ext in row['extensions'].split(',') if ext.strip()]
+        
+        # Parse patterns
+        patterns = None
+        if row.get('patterns'):
+            patterns = [p.strip() for p in row['patterns'].split(',') if p.strip()]
+        
+        # Parse exclude patterns
+        exclude_patterns = None
+        if row.get('exclude_patterns'):
+            exclude_patterns = [p.strip() for p in row['exclude_patterns'].split('|') if p.strip()]
         
+        # Create search criteria
+        criteria = None
+        if extensions or patterns or exclude_patterns or row.get('max_size') or row.get('min_size'):
+            criteria = SearchCriteria(
+                extensions=extensions,
+                patterns=patterns,
+                exclude_patterns=exclude_patterns,
+                max_size=row.get('max_size'),
+                min_size=row.get('min_size')
+            )
+        
+        return BatchJob(
+            repo_url=row['repo_url'].strip(),
+            profile=row.get('profile'),
+            output_dir=self.normalize_output_dir(row.get('output_dir')),
+            branch=row.get('branch') if row.get('branch') else None,
+            search_criteria=criteria
+        )
+
+    def job_from_record(self, item: Any) -> BatchJob:
+        """Build a job from one JSON/JSONL object, raising ValueError if it is invalid"""
+        if not isinstance(item, dict):
+            raise ValueError(f"expected an object, got {type(item).__name__}")
+        if not isinstance(item.get('repo_url'), str) or not item['repo_url'].strip():
+            raise ValueError("missing repo_url")
+        
+        # Parse search criteria
+        criteria = None
+        if 'search_criteria' in item:
+            sc = item['search_criteria']
+            if not isinstance(sc, dict):
+                raise ValueError("search_criteria must be an object")
+            for key in ('extensions', 'patterns', 'exclude_patterns'):
+                if sc.get(key) is not None and not isinstance(sc[key], list):
+                    raise ValueError(f"search_criteria.{key} must be a list")
+            criteria = SearchCriteria(
+                extensions=sc.get('extensions'),
+                patterns=sc.get('patterns'),
+                exclude_patterns=sc.get('exclude_patterns'),
+                max_size=sc.get('max_size'),
+                min_size=sc.get('min_size')
+            )
+        
+        return BatchJob(
+            repo_url=item['repo_url'].strip(),
+            profile=item.get('profile'),
+            output_dir=self.normalize_output_dir(item.get('output_dir')),
+            branch=item.get('branch'),
+            search_criteria=criteria
+        )
+
+    def report_invalid_job(self, source: str, location: str, error: Exception) -> None:
+        """Report a job that failed validation; loading continues with the next one"""
+        self.load_errors += 1
+        print(f"    ⚠️ {source} {location}: skipped invalid job: {error}")
+
+    def iter_batch_jobs_from_csv(self, csv_file: str) -> Iterator[BatchJob]:
+        """Lazily yield batch jobs from a CSV file, one row at a time"""
         with open(csv_file, 'r', newline='', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                # Parse extensions
-                extensions = None
-                if row.get('extensions'):
-                    extensions = [ext.strip() for ext in row['extensions'].split(',') if ext.strip()]
-                
-                # Parse patterns
-                patterns = None
-                if row.get('patterns'):
-                    patterns = [p.strip() for p in row['patterns'].split(',') if p.strip()]
-                
-                # Parse exclude patterns
-                exclude_patterns = None
-                if row.get('exclude_patterns'):
-                    exclude_patterns = [p.strip() for p in row['exclude_patterns'].split('|') if p.strip()]
-                
-                # Create search criteria
-                criteria = None
-                if extensions or patterns or exclude_patterns or row.get('max_size') or row.get('min_size'):
-                    criteria = SearchCriteria(
-                        extensions=extensions,
-                        patterns=patterns,
-                        exclude_patterns=exclude_patterns,
-                        max_size=row.get('max_size'),
-                        min_size=row.get('min_size')
-                    )
-                
-                # Create job with resulting_downloads as default
-                output_dir = row.get('output_dir', './resulting_downloads')
-                if not output_dir.startswith('./resulting_downloads'):
-                    output_dir = f"./resulting_downloads/{output_dir.lstrip('./')}"
-                
-                job = BatchJob(
-                    repo_url=row['repo_url'],
-                    profile=row.get('profile'),
-                    output_dir=output_dir,
-                    branch=row.get('branch') if row.get('branch') else None,
-                    search_criteria=criteria
-                )
-                jobs.append(job)
-        
-        return jobs
+                try:
+                    yield self.job_from_csv_row(row)
+                except ValueError as e:
+                    self.report_invalid_job(csv_file, f"line {reader.line_num}", e)
+
+    def iter_batch_jobs_from_jsonl(self, jsonl_file: str) -> Iterator[BatchJob]:
+        """Lazily yield batch jobs from a JSONL file (one job object per line)"""
+        with open(jsonl_file, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield self.job_from_record(json.loads(line))
+                except ValueError as e:
+                    # json.JSONDecodeError is a ValueError too
+                    self.report_invalid_job(jsonl_file, f"line {line_num}", e)
+
+    def iter_batch_jobs_from_json(self, json_file: str) -> Iterator[BatchJob]:
+        """
+        Lazily yield batch jobs from a JSON array.
+
+        The file is read in chunks and decoded one array element at a time, so
+        the first job can start before the rest of the file has been read.
+        """
+        decoder = json.JSONDecoder()
+        with open(json_file, 'r', encoding='utf-8') as f:
+            buffer, position, eof = '', 0, False
+            
+            def skip(chars: str) -> None:
+                nonlocal position
+                while position < len(buffer) and buffer[position] in chars:
+                    position += 1
+            
+            def fill() -> bool:
+                # Drop what has been decoded and append the next chunk
+                nonlocal buffer, position, eof
+                chunk = f.read(JSON_READ_SIZE)
+                buffer, position = buffer[position:] + chunk, 0
+                eof = not chunk
+                return bool(chunk)
+            
+            started = False
+            item_num = 0
+            # After an element only ',' or ']' may follow; after ',' only an element
+            separated = True
+            while True:
+                skip(' \t\r\n')
+                if position >= len(buffer):
+                    if not fill():
+                        raise ValueError(f"{json_file}: unexpected end of JSON array")
+                    continue
+                if not started:
+                    if buffer[position] != '[':
+                        raise ValueError(f"{json_file}: expected a JSON array of jobs")
+                    position += 1
+                    started = True
+                    continue
+                if buffer[position] == ']' and (item_num == 0 or not separated):
+                    return
+                if not separated:
+                    if buffer[position] != ',':
+                        raise ValueError(f"{json_file}: invalid JSON in item {item_num + 1}: "
+                                         f"expected ',' or ']' after item {item_num}")
+                    position += 1
+                    separated = True
+                    continue
+                if buffer[position] in ',]':
+                    raise ValueError(f"{json_file}: invalid JSON in item {item_num + 1}: "
+                                     f"expected a value, found '{buffer[position]}'")
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    # Most likely the element continues in the next chunk
+                    if not eof and fill():
+                        continue
+                    raise ValueError(f"{json_file}: invalid JSON in item {item_num + 1}: {e.msg}")
+                if end == len(buffer) and not eof and fill():
+                    # A number or literal may continue in the next chunk; decode again
+                    continue
+                position = end
+                item_num += 1
+                separated = False
+                try:
+                    yield self.job_from_record(item)
+                except ValueError as e:
+                    self.report_invalid_job(json_file, f"item {item_num}", e)
+
+    def iter_batch_jobs(self, batch_file: str) -> Iterator[BatchJob]:
+        """Lazily yield jobs from a .csv, .json or .jsonl/.ndjson batch file"""
+        if batch_file.endswith('.csv'):
+            return self.iter_batch_jobs_from_csv(batch_file)
+        if batch_file.endswith(('.jsonl', '.ndjson')):
+            return self.iter_batch_jobs_from_jsonl(batch_file)
+        if batch_file.endswith('.json'):
+            return self.iter_batch_jobs_from_json(batch_file)
+        raise ValueError("Batch file must be .csv, .json or .jsonl")
+
+    def load_batch_jobs_from_csv(self, csv_file: str) -> List[BatchJob]:
+        """Load batch jobs from CSV file"""
+        return list(self.iter_batch_jobs_from_csv(csv_file))
 
     def load_batch_jobs_from_json(self, json_file: str) -> List[BatchJob]:
         """Load batch jobs from JSON file"""
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        
-        jobs = []
-        for item in data:
-            # Parse search criteria
-            criteria = None
-            if 'search_criteria' in item:
-                sc = item['search_criteria']
-                criteria = SearchCriteria(
-                    extensions=sc.get('extensions'),
-                    patterns=sc.get('patterns'),
-                    exclude_patterns=sc.get('exclude_patterns'),
-                    max_size=sc.get('max_size'),
-                    min_size=sc.get('min_size')
-                )
+        return list(self.iter_batch_jobs_from_json(json_file))
+
+    def load_batch_jobs_from_jsonl(self, jsonl_file: str) -> List[BatchJob]:
+        """Load batch jobs from JSONL file"""
+        return list(self.iter_batch_jobs_from_jsonl(jsonl_file))
+
+    async def process_batch_jobs(self, jobs: List[BatchJob], download: bool = False,
+                                 archive: Optional[ArchiveWriter] = None,
+                                 progress: Optional[ProgressCallback] = None,
+                                 on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Process multiple batch jobs as an overlapping pipeline.
+
+        Jobs targeting the same repository and ref are coalesced first (see
+        group_jobs). Branch resolution and tree matching are each limited to
+        --concurrent groups at a time, and all downloads share one global
+        limit. Results are reported per job, in the order the jobs were given;
+        on_result(index, result) is also called as soon as each job finishes.
+        """
+        limits = StageLimits.create(self.max_concurrent, self.max_concurrent,
+                                    self.download_concurrency)
+        groups = self.group_jobs(jobs)
+        if len(groups) < len(jobs):
+            print(f"🔗 Coalesced {len(jobs)} jobs into {len(groups)} repository groups")
+        
+        # Continue the archive's section numbering when called once per queue claim
+        first_section = archive.next_section if archive is not None else 0
+        
+        async def run_group(section: int, group: JobGroup) -> Dict[int, Dict[str, Any]]:
+            try:
+                group_results = await self.process_group(group, download, archive, limits,
+                                                         section, progress)
+            except Exception as e:
+                group_results = {index: {"success": False, "error": str(e)} for index, _ in group.members}
+            for index, job in group.members:
+                self.report_result(job, group_results[index], download, archive)
+                if on_result is not None:
+                    on_result(index, group_results[index])
+            return group_results
+        
+        job_results: Dict[int, Dict[str, Any]] = {}
+        for group_results in await asyncio.gather(*(run_group(first_section + i, g)
+                                                    for i, g in enumerate(groups))):
+            job_results.update(group_results)
+        if archive is not None:
+            await archive.flush()
+        
+        return self.summarize_results(self.result_keys(jobs), job_results)
+
+    async def process_job_stream(self, jobs: Iterable[BatchJob], download: bool = False,
+                                 archive: Optional[ArchiveWriter] = None,
+                                 on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                                 window: Optional[int] = None,
+                                 export: Optional[ResultStream] = None,
+                                 keep_results: bool = True) -> Dict[str, Any]:
+        """
+        Process jobs pulled lazily from an iterator (see iter_batch_jobs).
+
+        At most `window` jobs are read ahead of the ones that have finished, so
+        a huge job list starts immediately and memory stays flat: the next job
+        is only read once a slot frees up. Jobs read together are coalesced
+        with group_jobs before they are started. If the input turns out to be
+        malformed part-way through, reading stops and the jobs already started
+        are allowed to finish.
+
+        Each result is appended to export as soon as its job finishes. With
+        keep_results=False nothing per job is retained once it has been
+        reported, and the returned results carry only the counts.
+        """
+        window = window or max(1, self.max_concurrent * 8)
+        chunk = max(1, min(window, self.max_concurrent * 4))
+        limits = StageLimits.create(self.max_concurrent, self.max_concurrent,
+                                    self.download_concurrency)
+        slots = asyncio.Semaphore(window)
+        next_section = archive.next_section if archive is not None else 0
+        
+        keys: Dict[int, str] = {}
+        seen: Dict[str, int] = {}
+        job_results: Dict[int, Dict[str, Any]] = {}
+        counts = {"processed": 0, "failed": 0}
+        running = set()
+        buffered: List[BatchJob] = []
+        first_index = 0
+        
+        async def run_group(section: int, offset: int, group: JobGroup) -> None:
+            members = [(offset + index, job) for index, job in group.members]
+            group = JobGroup(group.owner, group.repo, group.branch, members)
+            try:
+                group_results = await self.process_group(group, download, archive, limits, section)
+            except Exception as e:
+                group_results = {index: {"success": False, "error": str(e)} for index, _ in members}
+            for index, job in members:
+                result = group_results[index]
+                self.report_result(job, result, download, archive)
+                counts["processed" if result["success"] else "failed"] += 1
+                repo_key = keys[index] if keep_results else keys.pop(index)
+                if keep_results:
+                    job_results[index] = result
+                if export is not None:
+                    export.write(repo_key, result)
+                if on_result is not None:
+                    on_result(index, result)
+                slots.release()
+        
+        def start_buffered() -> None:
+            nonlocal buffered, first_index, next_section
+            for group in self.group_jobs(buffered):
+                task = asyncio.ensure_future(run_group(next_section, first_index, group))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                next_section += 1
+            first_index += len(buffered)
+            buffered = []
+        
+        iterator = iter(jobs)
+        while True:
+            await slots.acquire()
+            try:
+                job = next(iterator, None)
+            except ValueError as e:
+                print(f"❌ {e}; finishing the jobs already started")
+                job = None
+            if job is None:
+                slots.release()
+                break
             
-            # Ensure output_dir goes to resulting_downloads
-            output_dir = item.get('output_dir', './resulting_downloads')
-            if not output_dir.startswith('./resulting_downloads'):
-                output_dir = f"./resulting_downloads/{output_dir.lstrip('./')}"
+            # Result keys are assigned in input order, like result_keys()
+            repo_key = job.repo_url.replace('https://github.com/', '').replace('.git', '')
+            seen[repo_key] = seen.get(repo_key, 0) + 1
+            keys[first_index + len(buffered)] = (repo_key if seen[repo_key] == 1
+                                                 else f"{repo_key}#{seen[repo_key]}")
             
-            job = BatchJob(
-                repo_url=item['repo_url'],
-                profile=item.get('profile'),
-                output_dir=output_dir,
-                branch=item.get('branch'),
-                search_criteria=criteria
-            )
-            jobs.append(job)
+            buffered.append(job)
+            # Chunk boundaries depend only on input order, so archives stay deterministic;
+            # chunk <= window, so a partial chunk always leaves running jobs to free slots
+            if len(buffered) >= chunk:
+                start_buffered()
+                # Let the new groups start before reading further
+                await asyncio.sleep(0)
+        
+        if buffered:
+            start_buffered()
+        while running:
+            await asyncio.gather(*list(running))
+        if archive is not None:
+            await archive.flush()
         
-        return jobs
+        if not keep_results:
+            return {"success": True, **counts, "repositories": {}}
+        return self.summarize_results([keys[index] for index in range(len(keys))], job_results)
 
-    async def process_batch_jobs(self, jobs: List[BatchJob], download: bool = False) -> Dict[str, Any]:
-        """Process multiple batch jobs"""
+    def summarize_results(self, keys: List[str], job_results: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        """Assemble per-job results (by index) under their result keys into the export shape"""
         results = {
             "success": True,
             "processed": 0,
             "failed": 0,
             "repositories": {}
         }
+        for index, repo_key in enumerate(keys):
+            result = job_results.get(index) or {"success": False,
+                                                "error": "Not finished (still queued or running)"}
+            results["repositories"][repo_key] = result
+            if result["success"]:
+                results["processed"] += 1
+            else:
+                results["failed"] += 1
+        return results
+
+    async def process_queue(self, queue: BatchQueue, batch: str, download: bool = False,
+                            archive: Optional[ArchiveWriter] = None,
+                            claim_size: Optional[int] = None,
+                            feeder: Optional[QueueFeeder] = None) -> int:
+        """
+        Drain a batch from a durable queue, checkpointing as jobs progress.
+
+        At most claim_size jobs are leased at a time (so other worker processes
+        can share the queue); claims are topped up as soon as jobs finish and
+        free their slots, like process_job_stream reads ahead, and the jobs of
+        each claim are coalesced with group_jobs and started right away. Their
+        branch, tree SHA, match count, download progress and final result are
+        written back as they happen. feeder, if given, is topped up before
+        each claim; without one, a worker that finds nothing to claim while
+        the batch is still loading elsewhere waits for more. Returns the
+        number of jobs this worker finished.
+        """
+        claim_size = claim_size or max(1, self.max_concurrent * 4)
+        limits = StageLimits.create(self.max_concurrent, self.max_concurrent,
+                                    self.download_concurrency)
+        next_section = archive.next_section if archive is not None else 0
+        free = claim_size
+        finished = 0
+        running = set()
         
-        for job in jobs:
+        async def run_group(section: int, group: JobGroup, ids: List[int],
+                            checkpoint: ProgressCallback) -> None:
+            nonlocal free, finished
             try:
-                result = await self.process_repository(job, download)
-                repo_key = job.repo_url.replace('https://github.com/', '').replace('.git', '')
-                results["repositories"][repo_key] = result
-                
-                if result["success"]:
-                    results["processed"] += 1
-                    if download:
-                        print(f"    ✅ Downloaded {result.get('downloaded', 0)} files to {job.output_dir}")
-                    else:
-                        print(f"    ✅ Found {result.get('matches', 0)} matching files")
+                group_results = await self.process_group(group, download, archive, limits,
+                                                         section, checkpoint)
+            except Exception as e:
+                group_results = {index: {"success": False, "error": str(e)} for index, _ in group.members}
+            for index, job in group.members:
+                result = group_results[index]
+                self.report_result(job, result, download, archive)
+                if queue.finish(ids[index], result):
+                    finished += 1
                 else:
-                    results["failed"] += 1
-                    print(f"    ❌ Failed: {result.get('error', 'Unknown error')}")
+                    # Our lease ran out and another worker has the job now
+                    print(f"    ⚠️ Dropped stale result for job {ids[index]}")
+            free += len(group.members)
+        
+        def start(claimed: List[Tuple[int, Dict[str, Any]]]) -> None:
+            nonlocal next_section
+            ids = [job_id for job_id, _ in claimed]
+            jobs = [BatchJob.from_dict(data) for _, data in claimed]
+            checkpoint = throttle_progress(lambda index, fields: queue.update(ids[index], **fields))
+            for group in self.group_jobs(jobs):
+                task = asyncio.ensure_future(run_group(next_section, group, ids, checkpoint))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                next_section += 1
+        
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(queue.lease_seconds / 3)
+                queue.heartbeat()
+        
+        keepalive = asyncio.ensure_future(heartbeat())
+        try:
+            while True:
+                claimed = []
+                if free:
+                    if feeder is not None:
+                        feeder.top_up()
+                    claimed = queue.claim(batch, free)
+                if claimed:
+                    free -= len(claimed)
+                    start(claimed)
+                    # Let the new groups start before claiming more
+                    await asyncio.sleep(0)
+                    continue
+                # More jobs may still arrive from a feeder in another process
+                loading = bool(free) and queue.loading(batch)
+                if running:
+                    await asyncio.wait(list(running), timeout=FEED_POLL_INTERVAL if loading else None,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                elif loading:
+                    await asyncio.sleep(FEED_POLL_INTERVAL)
+                else:
+                    break
+        finally:
+            keepalive.cancel()
+            if running:
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*list(running), return_exceptions=True)
+        if archive is not None:
+            await archive.flush()
+        return finished
+
+    async def process_remote(self, coordinator_url: str, claim_size: Optional[int] = None,
+                             secret: Optional[str] = None) -> int:
+        """
+        Work for a coordinator (batch_hunter.py --serve) until its batch is done.
+
+        Jobs are claimed over HTTP in small leased chunks and run through
+        process_batch_jobs; leases are kept alive with heartbeats, and
+        progress, results and downloaded byte counts are posted back as they
+        happen. secret is the coordinator's shared secret, if it has one.
+        Returns the number of jobs this worker finished.
+        """
+        import aiohttp
+        from batch_coordinator import SECRET_HEADER, WORKER_POLL_INTERVAL
+        
+        claim_size = claim_size or max(1, self.max_concurrent * 4)
+        coordinator_url = coordinator_url.rstrip('/')
+        worker = worker_id()
+        lease_seconds = 60.0
+        finished = 0
+        
+        headers = {SECRET_HEADER: secret} if secret else {}
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30),
+                                         headers=headers) as http:
+            async def call(endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+                payload = {'worker': worker, **payload}
+                for attempt in range(self.retry_policy.max_attempts):
+                    try:
+                        async with http.post(f"{coordinator_url}/{endpoint}", json=payload) as response:
+                            response.raise_for_status()
+                            return await response.json()
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        # A refusal (stale lease, wrong secret) is the same on every attempt
+                        refused = isinstance(e, aiohttp.ClientResponseError) and e.status < 500
+                        if refused or attempt + 1 == self.retry_policy.max_attempts:
+                            raise
+                        await asyncio.sleep(self.retry_policy.backoff(attempt))
+            
+            async def heartbeat() -> None:
+                while True:
+                    await asyncio.sleep(lease_seconds / 3)
+                    try:
+                        await call('heartbeat', {})
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        print(f"    ⚠️ Heartbeat to coordinator failed: {e}")
+            
+            keepalive = asyncio.ensure_future(heartbeat())
+            try:
+                while True:
+                    try:
+                        reply = await call('claim', {'limit': claim_size})
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        # Coordinators shut down shortly after their batch completes
+                        print(f"⚠️  Coordinator unreachable ({e}); stopping")
+                        break
+                    if reply['done']:
+                        break
+                    lease_seconds = reply['lease_seconds']
+                    if not reply['jobs']:
+                        # Everything left is leased to other workers; theirs may still expire
+                        await asyncio.sleep(WORKER_POLL_INTERVAL)
+                        continue
                     
-            except Exception as e:
-                results["failed"] += 1
-                repo_key = job.repo_url.replace('https://github.com/', '').replace('.git', '')
-                results["repositories"][repo_key] = {
-                    "success": False,
-                    "error": str(e)
-                }
-                print(f"    ❌ Error: {e}")
+                    ids = [claimed['id'] for claimed in reply['jobs']]
+                    jobs = [BatchJob.from_dict(claimed['job']) for claimed in reply['jobs']]
+                    # (endpoint, task) for every post of this claim, finished or not
+                    posts: List[Tuple[str, 'asyncio.Future']] = []
+                    
+                    def post(endpoint: str, payload: Dict[str, Any]) -> None:
+                        posts.append((endpoint, asyncio.ensure_future(call(endpoint, payload))))
+                    
+                    checkpoint = throttle_progress(
+                        lambda index, fields: post('progress', {'id': ids[index], 'fields': fields}))
+                    await self.process_batch_jobs(
+                        jobs, reply['download'], progress=checkpoint,
+                        on_result=lambda index, result: post('result', {'id': ids[index], 'result': result}))
+                    outcomes = await asyncio.gather(*(task for _, task in posts), return_exceptions=True)
+                    for (endpoint, _), outcome in zip(posts, outcomes):
+                        if isinstance(outcome, aiohttp.ClientResponseError) and outcome.status == 409:
+                            print("    ⚠️ Dropped stale result: the job was handed to another worker")
+                        elif isinstance(outcome, Exception):
+                            # The lease runs out and the coordinator hands the job out again
+                            print(f"    ⚠️ Could not report to coordinator: {outcome}")
+                        elif endpoint == 'result':
+                            # Only results the coordinator accepted count as finished here
+                            finished += 1
+            finally:
+                keepalive.cancel()
+        return finished
+
+    def queue_results(self, queue: BatchQueue, batch: str) -> Dict[str, Any]:
+        """Summarize every job recorded for a batch, including earlier runs"""
+        rows = queue.results(batch)
+        jobs = [BatchJob.from_dict(job) for job, _ in rows]
+        return self.summarize_results(self.result_keys(jobs),
+                                      {index: result for index, (_, result) in enumerate(rows)
+                                       if result is not None})
+
+    def worker_pool(self, workers: int) -> Tuple[ProcessPoolExecutor, RateBudget, Dict[str, Any]]:
+        """Spawn-based process pool whose workers share one API rate budget, plus their hunter settings"""
+        context = multiprocessing.get_context('spawn')
+        budget = RateBudget(urlparse(self.base_url).hostname, context)
+        settings = {
+            "token": self.token,
+            "max_concurrent": self.max_concurrent,
+            "retry_policy": self.retry_policy,
+            "download_concurrency": self.download_concurrency,
+        }
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                       initializer=_init_worker, initargs=(budget,))
+        return executor, budget, settings
+
+    async def process_remote_workers(self, coordinator_url: str, workers: int,
+                                     secret: Optional[str] = None) -> int:
+        """Run process_remote in `workers` local processes sharing one API rate budget"""
+        executor, budget, settings = self.worker_pool(workers)
+        loop = asyncio.get_running_loop()
+        with executor:
+            finished = await asyncio.gather(*(
+                loop.run_in_executor(executor, _run_remote_worker, settings, coordinator_url, secret)
+                for _ in range(workers)
+            ))
+        print(f"🧵 {workers} workers used {budget.used} API requests from the shared budget")
+        return sum(finished)
+
+    def shard_jobs(self, jobs: List[BatchJob], workers: int) -> List[List[int]]:
+        """
+        Split job indices into at most `workers` shards.
+
+        Whole repository groups go to one shard, so coalescing still applies,
+        and the biggest groups are placed first on the least loaded shard.
+        """
+        shards: List[List[int]] = [[] for _ in range(max(1, workers))]
+        groups = sorted(self.group_jobs(jobs), key=lambda g: len(g.members), reverse=True)
+        for group in groups:
+            smallest = min(shards, key=len)
+            smallest.extend(index for index, _ in group.members)
+        return [sorted(shard) for shard in shards if shard]
+
+    async def process_batch_workers(self, jobs: List[BatchJob], workers: int, download: bool = False,
+                                    queue_path: Optional[str] = None,
+                                    batch: Optional[str] = None,
+                                    export: Optional[ResultStream] = None,
+                                    feeder: Optional[QueueFeeder] = None) -> Dict[str, Any]:
+        """
+        Run the batch in `workers` processes, each with its own event loop and
+        connection pool, drawing on one shared API rate-limit budget.
+
+        Without a queue, jobs are sharded up front by repository group; with
+        one, every worker drains the shared queue while feeder, if given, keeps
+        it topped up from this process. Results are merged back into a single
+        results dict in job order, and without a queue each shard's results
+        are appended to export as soon as that shard finishes.
+        """
+        executor, budget, settings = self.worker_pool(workers)
+        loop = asyncio.get_running_loop()
         
+        with executor:
+            if queue_path is not None:
+                futures = [loop.run_in_executor(executor, _run_queue_worker, settings,
+                                                queue_path, batch, download)
+                           for _ in range(workers)]
+                feeding = asyncio.ensure_future(feed_queue(feeder)) if feeder is not None else None
+                try:
+                    await asyncio.gather(*futures)
+                finally:
+                    if feeding is not None:
+                        feeding.cancel()
+                        await asyncio.gather(feeding, return_exceptions=True)
+                queue = BatchQueue(queue_path)
+                try:
+                    results = self.queue_results(queue, batch)
+                finally:
+                    queue.close()
+            else:
+                keys = self.result_keys(jobs)
+                job_results: Dict[int, Dict[str, Any]] = {}
+                
+                async def run_shard(shard: List[int]) -> None:
+                    shard_results = await loop.run_in_executor(
+                        executor, _run_shard_worker, settings, [asdict(jobs[i]) for i in shard], download)
+                    for position in sorted(shard_results):
+                        index = shard[position]
+                        job_results[index] = shard_results[position]
+                        if export is not None:
+                            export.write(keys[index], shard_results[position])
+                
+                await asyncio.gather(*(run_shard(shard) for shard in self.shard_jobs(jobs, workers)))
+                results = self.summarize_results(keys, job_results)
+        
+        print(f"🧵 {workers} workers used {budget.used} API requests from the shared budget")
         return results
 
+    def report_result(self, job: BatchJob, result: Dict[str, Any], download: bool,
+                      archive: Optional[ArchiveWriter] = None) -> None:
+        """Print the one-line outcome of a finished job"""
+        repo_key = job.repo_url.replace('https://github.com/', '').replace('.git', '')
+        if result["success"]:
+            if download:
+                destination = archive.path if archive is not None else job.output_dir
+                print(f"    ✅ {repo_key}: downloaded {result.get('downloaded', 0)} files to {destination}")
+            else:
+                print(f"    ✅ {repo_key}: {result.get('matches', 0)} matching files")
+        else:
+            print(f"    ❌ {repo_key}: failed: {result.get('error', 'Unknown error')}")
+
     def create_sample_batch_file(self, format_type: str, filename: str):
         """Create sample batch file"""
         if format_type == 'csv':
@@ -535,34 +1520,175 @@ class BatchHunter:
             with open(filename, 'w') as f:
                 json.dump(results, f, indent=2)
         
-        elif format_type == 'csv':
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['repository', 'success', 'downloaded', 'matches', 'error'])
-                
+        elif format_type in STREAM_FORMATS:
+            # Same rows and summary record as an incremental export
+            with ResultStream(filename, format_type) as stream:
                 for repo, result in results.get('repositories', {}).items():
-                    writer.writerow([
-                        repo,
-                        result.get('success', False),
-                        result.get('downloaded', 0),
-                        result.get('matches', 0),
-                        result.get('error', '')
-                    ])
+                    stream.write(repo, result)
         
         print(f"✅ Results exported to: {filename}")
 
+async def feed_queue(feeder: QueueFeeder) -> None:
+    """Keep a queue topped up for workers in other processes until the input runs out"""
+    try:
+        while feeder.top_up():
+            await asyncio.sleep(FEED_POLL_INTERVAL)
+    finally:
+        feeder.close()
+
+def throttle_progress(send: ProgressCallback, interval: float = 1.0) -> ProgressCallback:
+    """Wrap a progress callback so per-file download counts go out at most once per interval per job"""
+    last_sent: Dict[int, float] = {}
+    
+    def checkpoint(index: int, fields: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        if set(fields) == {'downloaded'} and now - last_sent.get(index, 0) < interval:
+            return
+        last_sent[index] = now
+        send(index, fields)
+    
+    return checkpoint
+
+# Rate budget inherited by each worker process (set by _init_worker)
+_worker_budget: Optional[RateBudget] = None
+
+def _init_worker(budget: RateBudget) -> None:
+    global _worker_budget
+    _worker_budget = budget
+
+def _run_shard_worker(settings: Dict[str, Any], job_dicts: List[Dict[str, Any]],
+                      download: bool) -> Dict[int, Dict[str, Any]]:
+    """Worker process entry point: run one shard, return results by shard position"""
+    jobs = [BatchJob.from_dict(data) for data in job_dicts]
+    job_results: Dict[int, Dict[str, Any]] = {}
+    
+    def record(index: int, result: Dict[str, Any]) -> None:
+        job_results[index] = result
+    
+    async def run() -> None:
+        async with BatchHunter(rate_budget=_worker_budget, **settings) as hunter:
+            await hunter.process_batch_jobs(jobs, download, on_result=record)
+    
+    asyncio.run(run())
+    return job_results
+
+def _run_queue_worker(settings: Dict[str, Any], queue_path: str, batch: str, download: bool) -> int:
+    """Worker process entry point: drain jobs from a shared queue"""
+    async def run() -> int:
+        async with BatchHunter(rate_budget=_worker_budget, **settings) as hunter:
+            queue = BatchQueue(queue_path)
+            try:
+                return await hunter.process_queue(queue, batch, download)
+            finally:
+                queue.close()
+    
+    return asyncio.run(run())
+
+def _run_remote_worker(settings: Dict[str, Any], coordinator_url: str,
+                       secret: Optional[str] = None) -> int:
+    """Worker process entry point: pull jobs from a remote coordinator"""
+    async def run() -> int:
+        async with BatchHunter(rate_budget=_worker_budget, **settings) as hunter:
+            return await hunter.process_remote(coordinator_url, secret=secret)
+    
+    return asyncio.run(run())
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Split '[HOST:]PORT' for --serve; the host defaults to 127.0.0.1"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+async def run_batch(batch_hunter: BatchHunter, args, jobs: Iterable[BatchJob],
+                    queue: Optional[BatchQueue], batch: str, download: bool,
+                    archive: Optional[ArchiveWriter], export: Optional[ResultStream],
+                    keep_results: bool, feeder: Optional[QueueFeeder] = None) -> Dict[str, Any]:
+    """Run the batch the way the CLI options ask for and return its results"""
+    if args.serve:
+        from batch_coordinator import Coordinator
+        
+        host, port = parse_address(args.serve)
+        try:
+            await Coordinator(queue, batch, download, secret=args.secret,
+                              feeder=feeder).serve(host, port)
+            return batch_hunter.queue_results(queue, batch)
+        finally:
+            feeder.close()
+            queue.close()
+    
+    if args.workers > 1:
+        print(f"🧵 Running on {args.workers} worker processes")
+        if queue is None:
+            return await batch_hunter.process_batch_workers(jobs, args.workers, download,
+                                                            export=export)
+        # Workers open their own connections to the queue file; this one feeds it
+        try:
+            return await batch_hunter.process_batch_workers([], args.workers, download, queue.path,
+                                                            batch, export, feeder)
+        finally:
+            queue.close()
+    
+    async with batch_hunter:
+        try:
+            if queue is not None:
+                try:
+                    await batch_hunter.process_queue(queue, batch, download, archive, feeder=feeder)
+                finally:
+                    feeder.close()
+            else:
+                return await batch_hunter.process_job_stream(jobs, download, archive,
+                                                             export=export, keep_results=keep_results)
+        finally:
+            if archive is not None:
+                await archive.close()
+    
+    try:
+        return batch_hunter.queue_results(queue, batch)
+    finally:
+        queue.close()
+
+def build_retry_policy(args) -> RetryPolicy:
+    """RetryPolicy from the --retries/--timeout/--deadline/--hedge options"""
+    return RetryPolicy(
+        max_attempts=max(1, args.retries),
+        attempt_timeout=args.timeout,
+        total_timeout=args.deadline,
+        hedge=args.hedge
+    )
+
 async def main():
     parser = argparse.ArgumentParser(description='GitHub File Hunter - Batch Processing')
-    parser.add_argument('--batch-file', '-f', help='CSV or JSON file containing batch jobs')
+    parser.add_argument('--batch-file', '-f', help='CSV, JSON or JSONL file containing batch jobs')
     parser.add_argument('--create-sample', choices=['csv', 'json'], help='Create sample batch file')
     parser.add_argument('--sample-file', help='Filename for sample batch file')
     parser.add_argument('--download', '-d', action='store_true', help='Download matching files')
     parser.add_argument('--preview-only', action='store_true', help='Only show matches, don\'t download')
+    parser.add_argument('--estimate', action='store_true',
+                        help='Project API calls, downloads, bytes and time against the rate limit, without downloading')
     parser.add_argument('--output-dir', '-o', help='Base output directory for downloads')
+    parser.add_argument('--output-archive', help='Stream downloads into one archive (.zip, .tar, .tar.gz, .tar.zst) instead of files')
     parser.add_argument('--concurrent', '-c', type=int, default=3, help='Max concurrent repository processing')
+    parser.add_argument('--download-concurrency', type=int, default=8,
+                        help='Max concurrent file downloads, shared by all repositories')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Worker processes to spread jobs over (limits above apply per worker)')
     parser.add_argument('--token', '-t', help='GitHub personal access token')
+    parser.add_argument('--retries', type=int, default=4, help='Attempts per request before giving up')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-attempt timeout in seconds')
+    parser.add_argument('--deadline', type=float, default=120.0, help='Overall deadline per request in seconds')
+    parser.add_argument('--hedge', action='store_true', help='Hedge downloads that run past their p95 latency')
+    parser.add_argument('--queue', help='Checkpoint jobs in this SQLite queue file (default with --resume/--serve: <batch-file>.queue.db)')
+    parser.add_argument('--resume', action='store_true', help='Resume an interrupted queued batch, skipping finished jobs')
+    parser.add_argument('--retry-failed', action='store_true', help='Requeue failed jobs from a queued batch and run them again')
+    parser.add_argument('--lease', type=float, default=300.0,
+                        help='Seconds a claimed queue job stays leased without a heartbeat')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help='Coordinate the queued batch for remote workers over HTTP')
+    parser.add_argument('--connect', metavar='URL', help='Work for the coordinator at URL (no batch file needed)')
+    parser.add_argument('--secret', default=os.getenv('HUNTER_COORDINATOR_SECRET'),
+                        help='Shared secret between --serve and --connect (default: $HUNTER_COORDINATOR_SECRET)')
     parser.add_argument('--export', help='Export results to file')
-    parser.add_argument('--export-format', choices=['json', 'csv'], default='json', help='Export file format')
+    parser.add_argument('--export-format', choices=['json', 'csv', 'jsonl'], default='json',
+                        help='Export file format (csv and jsonl are written as each job finishes)')
     parser.add_argument('--config', help='Configuration file path')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
@@ -576,6 +1702,23 @@ async def main():
         batch_hunter.create_sample_batch_file(args.create_sample, filename)
         return 0
     
+    if args.connect:
+        try:
+            batch_hunter = BatchHunter(args.token, args.concurrent, build_retry_policy(args),
+                                       args.download_concurrency)
+            print(f"🛰️  Working for coordinator {args.connect}")
+            if args.workers > 1:
+                finished = await batch_hunter.process_remote_workers(args.connect, args.workers,
+                                                                     args.secret)
+            else:
+                async with batch_hunter:
+                    finished = await batch_hunter.process_remote(args.connect, secret=args.secret)
+            print(f"\n📊 Worker finished {finished} jobs")
+            return 0
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return 1
+    
     # Validate batch file
     if not args.batch_file:
         print("❌ Error: --batch-file required for processing")
@@ -587,35 +1730,105 @@ async def main():
         return 1
     
     try:
-        batch_hunter = BatchHunter(args.token, args.concurrent)
+        batch_hunter = BatchHunter(args.token, args.concurrent, build_retry_policy(args),
+                                   args.download_concurrency)
         
-        # Load batch jobs
-        if args.batch_file.endswith('.csv'):
-            jobs = batch_hunter.load_batch_jobs_from_csv(args.batch_file)
-        elif args.batch_file.endswith('.json'):
-            jobs = batch_hunter.load_batch_jobs_from_json(args.batch_file)
-        else:
-            print("❌ Error: Batch file must be .csv or .json")
+        # Load batch jobs lazily, so huge batch files start processing right away
+        try:
+            stream = batch_hunter.iter_batch_jobs(args.batch_file)
+        except ValueError:
+            print("❌ Error: Batch file must be .csv, .json or .jsonl")
             return 1
         
-        if not jobs:
+        first_job = next(stream, None)
+        if first_job is None:
             print("❌ Error: No valid jobs found in batch file")
             return 1
+        jobs = itertools.chain([first_job], stream)
         
-        print(f"📋 Loaded {len(jobs)} batch jobs from {args.batch_file}")
+        if args.estimate or (args.workers > 1 and not (args.queue or args.resume or args.retry_failed or args.serve)):
+            # Estimates and sharding by repository group need the whole job list
+            jobs = list(jobs)
+            print(f"📋 Loaded {len(jobs)} batch jobs from {args.batch_file}")
+        else:
+            print(f"📋 Streaming batch jobs from {args.batch_file}")
         if args.token:
             print("🔑 Using GitHub token")
         else:
             print("⚠️  No token - may hit rate limits with multiple repos")
         print()
         
+        if args.estimate:
+            async with batch_hunter:
+                fits = await batch_hunter.estimate_batch(jobs, per_job=not args.quiet)
+            if batch_hunter.load_errors:
+                print(f"⚠️  Skipped {batch_hunter.load_errors} invalid jobs from {args.batch_file}")
+            print("📐 Estimate only - no files downloaded")
+            return 0 if fits else 1
+        
         # Process batch jobs
         download_files = args.download and not args.preview_only
-        async with batch_hunter:
-            results = await batch_hunter.process_batch_jobs(jobs, download_files)
+        if args.workers > 1 and args.output_archive and download_files:
+            print("❌ Error: --output-archive needs a single process; drop --workers")
+            return 1
+        if args.serve and args.output_archive:
+            print("❌ Error: remote workers write their own files; --output-archive is not available with --serve")
+            return 1
+        if args.serve and not args.secret:
+            from batch_coordinator import is_loopback
+            if not is_loopback(parse_address(args.serve)[0]):
+                print("❌ Error: --serve on a non-loopback address needs --secret (or HUNTER_COORDINATOR_SECRET)")
+                return 1
+        
+        queue = feeder = None
+        batch = os.path.abspath(args.batch_file)
+        if args.queue or args.resume or args.retry_failed or args.serve:
+            if args.output_archive and (args.resume or args.retry_failed):
+                print("❌ Error: --output-archive cannot be resumed; use an output directory instead")
+                return 1
+            queue_path = args.queue or f"{args.batch_file}.queue.db"
+            queue = BatchQueue(queue_path, args.lease)
+            resuming = args.resume or args.retry_failed
+            # Jobs are moved into the queue a chunk at a time as it drains
+            feeder = QueueFeeder(queue, batch, jobs, replace=not resuming)
+            feeder.top_up()
+            if resuming:
+                recovered = queue.recover(batch)
+                requeued = queue.retry_failed(batch) if args.retry_failed else 0
+                counts = queue.counts(batch)
+                print(f"🗃️  Queue {queue_path}: {counts['done']} done, {counts['failed']} failed, "
+                      f"{counts['pending']} pending ({recovered} recovered, {requeued} requeued)")
+            else:
+                print(f"🗃️  Checkpointing to queue {queue_path}")
+        
+        archive = None
+        if args.output_archive and download_files:
+            archive = ArchiveWriter(args.output_archive)
+        
+        # JSONL/CSV exports are appended job by job; queued batches are exported
+        # from the queue at the end, since it already keeps every result durably
+        export = None
+        if args.export and args.export_format in STREAM_FORMATS and queue is None:
+            export = ResultStream(args.export, args.export_format)
+            print(f"📝 Streaming results to {args.export}")
+        keep_results = bool(args.export) and export is None
+        
+        try:
+            results = await run_batch(batch_hunter, args, jobs, queue, batch, download_files,
+                                      archive, export, keep_results, feeder)
+        except BaseException:
+            if export is not None:
+                export.abort()
+            raise
+        if archive is not None:
+            print(f"📦 Wrote {archive.member_count} files to {archive.path}")
+        if batch_hunter.load_errors:
+            print(f"⚠️  Skipped {batch_hunter.load_errors} invalid jobs from {args.batch_file}")
         
-        # Export results if requested
-        if args.export and results:
+        if export is not None:
+            export.close()
+            print(f"✅ Results exported to: {args.export}")
+        elif args.export and results:
             batch_hunter.export_results(results, args.export, args.export_format)
         
         print(f"\n📊 Batch processing complete!")
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Batch Queue
+
+Durable SQLite-backed job queue for batch_hunter.py. Every job's state,
+resolved tree SHA, match count and download progress is checkpointed to a
+local database, so an interrupted batch can be resumed (--resume) or just its
+failures re-run (--retry-failed). Jobs are handed out under short leases inside
+IMMEDIATE transactions, so several local worker processes can safely pull from
+the same queue file.
+
+QueueFeeder moves a lazily read batch file into the queue a chunk at a time
+as workers drain it, so the first jobs start without waiting for the whole
+file to be read; meanwhile the batch is marked as loading, so a worker that
+finds nothing to claim waits for more rather than stopping.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    job TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    branch TEXT,
+    resolved_sha TEXT,
+    matches INTEGER,
+    downloaded INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    updated_at REAL,
+    UNIQUE (batch, position)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (batch, state, position);
+CREATE TABLE IF NOT EXISTS batches (
+    batch TEXT PRIMARY KEY,
+    loading INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Jobs QueueFeeder moves into the queue at a time; it keeps about this many pending
+FEED_CHUNK = 256
+
+# How often a worker with nothing to claim checks for newly loaded jobs, in seconds
+FEED_POLL_INTERVAL = 0.5
+
+def worker_id() -> str:
+    """Identify this process as host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_alive(worker: Optional[str]) -> bool:
+    """True unless worker is a dead process on this host."""
+    if not worker or ':' not in worker:
+        return False
+    host, _, pid = worker.rpartition(':')
+    if host != socket.gethostname():
+        # Can't see other hosts' processes; rely on the lease instead
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class BatchQueue:
+    """Persistent, lease-based job queue stored in a local SQLite file."""
+
+    def __init__(self, path: str, lease_seconds: float = 300.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.worker = worker_id()
+        # Autocommit mode; transactions are opened explicitly where needed
+        self.conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=30000')
+        # WAL keeps committed checkpoints safe across crashes without an fsync per update
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _transaction(self):
+        return _Immediate(self.conn)
+
+    def enqueue(self, batch: str, jobs: Iterable[Any], replace: bool = False, start: int = 0) -> int:
+        """
+        Add jobs (BatchJob instances) for a batch, keyed by their position
+        (counted from start).
+
+        Existing positions are kept, so re-enqueueing the same batch file on
+        resume is a no-op for jobs already known. With replace=True the
+        batch's previous rows are dropped first. Returns the number inserted.
+        """
+        now = time.time()
+        with self._transaction():
+            if replace:
+                self.conn.execute('DELETE FROM jobs WHERE batch = ?', (batch,))
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO jobs (batch, position, job, updated_at) VALUES (?, ?, ?, ?)',
+                ((batch, position, json.dumps(asdict(job)), now)
+                 for position, job in enumerate(jobs, start))
+            )
+            return self.conn.total_changes - before
+
+    def set_loading(self, batch: str, loading: bool) -> None:
+        """Mark whether more of the batch is still to be enqueued."""
+        self.conn.execute('INSERT OR REPLACE INTO batches (batch, loading) VALUES (?, ?)',
+                          (batch, int(loading)))
+
+    def loading(self, batch: str) -> bool:
+        """True while a QueueFeeder is still enqueueing the batch."""
+        row = self.conn.execute('SELECT loading FROM batches WHERE batch = ?', (batch,)).fetchone()
+        return bool(row and row['loading'])
+
+    def pending(self, batch: str) -> int:
+        """Jobs of the batch waiting to be claimed."""
+        return self.conn.execute('SELECT COUNT(*) FROM jobs WHERE batch = ? AND state = ?',
+                                 (batch, PENDING)).fetchone()[0]
+
+    def recover(self, batch: str) -> int:
+        """Requeue running jobs whose lease expired or whose local worker died."""
+        now = time.time()
+        recovered = 0
+        with self._transaction():
+            rows = self.conn.execute(
+                'SELECT id, worker, lease_until FROM jobs WHERE batch = ? AND state = ?',
+                (batch, RUNNING)
+            ).fetchall()
+            for row in rows:
+                if (row['lease_until'] or 0) < now or not _worker_alive(row['worker']):
+                    self.conn.execute(
+                        'UPDATE jobs SET state = ?, worker = NULL, lease_until = NULL, updated_at = ? '
+                        'WHERE id = ?', (PENDING, now, row['id'])
+                    )
+                    recovered += 1
+        return recovered
+
+    def retry_failed(self, batch: str) -> int:
+        """Move failed jobs back to pending. Returns how many were requeued."""
+        with self._transaction():
+            cursor = self.conn.execute(
+                'UPDATE jobs SET state = ?, error = NULL, result = NULL, downloaded = 0, updated_at = ? '
+                'WHERE batch = ? AND state = ?', (PENDING, time.time(), batch, FAILED)
+            )
+            return cursor.rowcount
+
+    def claim(self, batch: str, limit: int,
+              worker: Optional[str] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Atomically lease up to limit pending jobs, in batch order.
+
+        worker defaults to this process; a coordinator passes the id of the
+        remote worker it is claiming for.
+        """
+        worker = worker or self.worker
+        now = time.time()
+        with self._transaction():
+            rows = self.conn.execute(
+                'SELECT id, job FROM jobs WHERE batch = ? AND '
+                '(state = ? OR (state = ? AND lease_until < ?)) ORDER BY position LIMIT ?',
+                (batch, PENDING, RUNNING, now, limit)
+            ).fetchall()
+            for row in rows:
+                self.conn.execute(
+                    'UPDATE jobs SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1, '
+                    'updated_at = ? WHERE id = ?',
+                    (RUNNING, worker, now + self.lease_seconds, now, row['id'])
+                )
+        return [(row['id'], json.loads(row['job'])) for row in rows]
+
+    def heartbeat(self, worker: Optional[str] = None) -> int:
+        """Extend the leases of every job a worker is running. Returns how many."""
+        now = time.time()
+        cursor = self.conn.execute(
+            'UPDATE jobs SET lease_until = ? WHERE worker = ? AND state = ?',
+            (now + self.lease_seconds, worker or self.worker, RUNNING)
+        )
+        return cursor.rowcount
+
+    def update(self, job_id: int, worker: Optional[str] = None, **fields: Any) -> None:
+        """Checkpoint progress fields (branch, resolved_sha, matches, downloaded, total, bytes)."""
+        if not fields:
+            return
+        fields['updated_at'] = time.time()
+        fields['lease_until'] = fields['updated_at'] + self.lease_seconds
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        self.conn.execute(
+            f'UPDATE jobs SET {assignments} WHERE id = ? AND worker = ?',
+            (*fields.values(), job_id, worker or self.worker)
+        )
+
+    def finish(self, job_id: int, result: Dict[str, Any], worker: Optional[str] = None,
+               batch: Optional[str] = None) -> int:
+        """
+        Record a job's final result and mark it done or failed.
+
+        A job that matched files but did not download all of them counts as
+        failed here, so --retry-failed picks it up again. Only the worker
+        holding the job's lease may finish it; returns 0 (and records
+        nothing) for a stale result from a worker whose lease ran out and
+        whose job was handed to another, or for a job outside batch when one
+        is given.
+        """
+        partial = 'total_matches' in result and result.get('downloaded', 0) < result['total_matches']
+        state = DONE if result.get('success') and not partial else FAILED
+        cursor = self.conn.execute(
+            'UPDATE jobs SET state = ?, result = ?, error = ?, downloaded = COALESCE(?, downloaded), '
+            'bytes = COALESCE(?, bytes), worker = NULL, lease_until = NULL, updated_at = ? '
+            'WHERE id = ? AND worker = ? AND state = ? AND batch = COALESCE(?, batch)',
+            (state, json.dumps(result), result.get('error'), result.get('downloaded'),
+             result.get('bytes'), time.time(), job_id, worker or self.worker, RUNNING, batch)
+        )
+        return cursor.rowcount
+
+    def counts(self, batch: str) -> Dict[str, int]:
+        rows = self.conn.execute(
+            'SELECT state, COUNT(*) AS n FROM jobs WHERE batch = ? GROUP BY state', (batch,)
+        ).fetchall()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({row['state']: row['n'] for row in rows})
+        return counts
+
+    def totals(self, batch: str) -> Dict[str, int]:
+        """Files and bytes downloaded so far across the batch."""
+        row = self.conn.execute(
+            'SELECT COALESCE(SUM(downloaded), 0) AS files, COALESCE(SUM(bytes), 0) AS bytes '
+            'FROM jobs WHERE batch = ?', (batch,)
+        ).fetchone()
+        return {'files': row['files'], 'bytes': row['bytes']}
+
+    def results(self, batch: str) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """(job, result) pairs for the whole batch in order; result is None if unfinished."""
+        rows = self.conn.execute(
+            'SELECT job, result FROM jobs WHERE batch = ? ORDER BY position', (batch,)
+        ).fetchall()
+        return [(json.loads(row['job']), json.loads(row['result']) if row['result'] else None)
+                for row in rows]
+
+
+class QueueFeeder:
+    """
+    Enqueues jobs from an iterator a chunk at a time, whenever fewer than a
+    chunk are pending, so a huge batch file is never read whole before work
+    starts. Call top_up() before claiming (or periodically, when workers run
+    elsewhere) and close() once done or on failure.
+    """
+
+    def __init__(self, queue: BatchQueue, batch: str, jobs: Iterable[Any],
+                 replace: bool = False, chunk: int = FEED_CHUNK):
+        self.queue = queue
+        self.batch = batch
+        self.chunk = chunk
+        self.position = 0
+        self.inserted = 0
+        self._jobs = iter(jobs)
+        self._replace = replace
+        self._done = False
+        queue.set_loading(batch, True)
+
+    def top_up(self) -> bool:
+        """Enqueue until a chunk is pending or the input runs out; False once all of it is in."""
+        while not self._done and self.queue.pending(self.batch) < self.chunk:
+            jobs = []
+            try:
+                for job in self._jobs:
+                    jobs.append(job)
+                    if len(jobs) == self.chunk:
+                        break
+                else:
+                    self._done = True
+            except ValueError as e:
+                # Malformed part-way through: run what was read, like process_job_stream
+                print(f"❌ {e}; running the jobs already queued")
+                self._done = True
+            self.inserted += self.queue.enqueue(self.batch, jobs, self._replace, self.position)
+            self.position += len(jobs)
+            self._replace = False
+            if self._done:
+                self.close()
+        return not self._done
+
+    def close(self) -> None:
+        """Stop feeding; workers finish once the queue drains."""
+        self._done = True
+        self.queue.set_loading(self.batch, False)
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK, so claims never race between processes."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Startup Benchmark
+
+Measures how long the command-line tools take to get going, each in a fresh
+interpreter, and fails when any of them goes over its budget:
+
+- importing each CLI module (what every invocation pays before doing work)
+- running the metadata-only commands (github_hunter_profiles.py --list/--show),
+  which should never load aiohttp or the hunter itself
+
+Forwarding to a hunter daemon is disabled while measuring. Budgets are in
+milliseconds and include interpreter start-up; the best of several runs is
+used so a busy machine does not cause spurious failures.
+
+    python bench_startup.py
+    python bench_startup.py --runs 10 --scale 2   # slower machine / CI
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Module import budgets (ms, including interpreter start-up)
+IMPORT_BUDGETS = {
+    'github_hunter_profiles': 150,
+    'repo_structure_analyzer': 150,
+    'github_file_hunter': 250,
+    'batch_hunter': 250,
+}
+
+# Whole-command budgets (ms) for commands that must stay off the network path
+COMMAND_BUDGETS = {
+    'github_hunter_profiles.py --list': 150,
+    'github_hunter_profiles.py --show docs': 150,
+}
+
+# Modules the metadata-only paths must not load
+HEAVY_MODULES = ('aiohttp', 'asyncio', 'github_file_hunter')
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ, GITHUB_HUNTER_DAEMON='0')
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def time_run(args: List[str], runs: int) -> float:
+    """Best wall time of running python with args, in milliseconds."""
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=HERE, env=_environment(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def heavy_imports(command: str) -> List[str]:
+    """Heavy modules loaded while running command (a script and its arguments)."""
+    script, *argv = command.split()
+    probe = (
+        "import runpy, sys\n"
+        f"sys.argv = {[script, *argv]!r}\n"
+        "try:\n"
+        f"    runpy.run_path({script!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', probe], cwd=HERE, env=_environment(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    loaded = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+    return [module for module in loaded.split(',') if module]
+
+
+def check(name: str, elapsed: float, budget: float, problem: Optional[str] = None) -> bool:
+    ok = elapsed <= budget and not problem
+    icon = '✅' if ok else '❌'
+    print(f"  {icon} {name:<42} {elapsed:7.1f} ms  (budget {budget:.0f} ms)")
+    if problem:
+        print(f"     ⚠️  {problem}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GitHub File Hunter - start-up time benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per measurement (best is kept)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiply every budget, e.g. 2 on a slow machine')
+    args = parser.parse_args()
+
+    baseline = time_run(['-c', 'pass'], args.runs)
+    print(f"🐍 Bare interpreter start-up: {baseline:.1f} ms\n")
+
+    results: List[Tuple[str, bool]] = []
+    print("📦 Module imports:")
+    for module, budget in IMPORT_BUDGETS.items():
+        elapsed = time_run(['-c', f'import {module}'], args.runs)
+        results.append((module, check(f"import {module}", elapsed, budget * args.scale)))
+
+    print("\n⚡ Metadata-only commands:")
+    for command, budget in COMMAND_BUDGETS.items():
+        elapsed = time_run(command.split(), args.runs)
+        loaded = heavy_imports(command)
+        problem = f"loads {', '.join(loaded)}" if loaded else None
+        results.append((command, check(command, elapsed, budget * args.scale, problem)))
+
+    failed = [name for name, ok in results if not ok]
+    if failed:
+        print(f"\n❌ {len(failed)} over budget: {', '.join(failed)}")
+        return 1
+    print(f"\n✅ All {len(results)} start-up checks within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Bulk Writer
+
+Filesystem helpers for the download stage. The directory layout for a whole
+download plan is created once up front, and file bodies are handed to a
+bounded thread pool that writes small files in batches, so the event loop
+never blocks on open/write/close and no per-file thread hop is needed.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
+from integrity import MANIFEST_NAME, Manifest
+
+
+def plan_directories(output_dir: str, file_paths: Iterable[str]) -> List[str]:
+    """
+    Return the minimal set of directories needed for the given file paths.
+
+    Only leaf directories are returned; os.makedirs creates their parents.
+    """
+    directories: Set[str] = {output_dir}
+    for file_path in file_paths:
+        directories.add(os.path.dirname(os.path.join(output_dir, file_path)))
+
+    ancestors: Set[str] = set()
+    for directory in directories:
+        parent = os.path.dirname(directory)
+        while parent and parent not in ancestors:
+            ancestors.add(parent)
+            parent = os.path.dirname(parent)
+
+    return sorted(d for d in directories if d not in ancestors)
+
+
+def create_directories(output_dir: str, file_paths: Iterable[str]) -> int:
+    """Create every directory the plan needs in one pass. Returns the number of leaves."""
+    leaves = plan_directories(output_dir, file_paths)
+    for directory in leaves:
+        os.makedirs(directory, exist_ok=True)
+    return len(leaves)
+
+
+def _write_batch(batch: List[Tuple[str, bytes]]) -> List[Tuple[str, str]]:
+    """Write a batch of files; return (path, error) for the ones that failed."""
+    failures = []
+    for path, data in batch:
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            failures.append((path, str(e)))
+    return failures
+
+
+class BulkWriter:
+    """Bounded writer pool that batches small-file writes off the event loop."""
+
+    def __init__(self, root: str, workers: int = 4, batch_size: int = 64,
+                 small_file_limit: int = 256 * 1024, max_inflight: Optional[int] = None):
+        self.root = root
+        self.manifest = Manifest(os.path.join(root, MANIFEST_NAME))
+        self.batch_size = batch_size
+        self.small_file_limit = small_file_limit
+        self.max_inflight = max_inflight or workers * 2
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hunter-writer')
+        self.failures: List[Tuple[str, str]] = []
+        self._batch: List[Tuple[str, bytes]] = []
+        self._batch_bytes = 0
+        self._inflight: List[asyncio.Future] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def expect(self, paths: Iterable[str]) -> None:
+        """Create the directory layout for a download plan in one pass."""
+        create_directories(self.root, paths)
+
+    def skip(self, path: str) -> None:
+        """Nothing to do for failed downloads; kept for parity with ArchiveWriter."""
+
+    def size_of(self, path: str) -> Optional[int]:
+        """Bytes written for path, or None if it was not (successfully) written."""
+        entry = self.manifest.entries.get(path)
+        return entry['size'] if entry else None
+
+    async def write(self, path: str, data: bytes, sha: Optional[str] = None) -> None:
+        """Queue a file (relative to root) for writing. Call expect() first."""
+        self.manifest.record(path, len(data), sha)
+        path = os.path.join(self.root, path)
+        if len(data) > self.small_file_limit:
+            await self._submit([(path, data)])
+            return
+
+        self._batch.append((path, data))
+        self._batch_bytes += len(data)
+        if len(self._batch) >= self.batch_size or self._batch_bytes >= self.small_file_limit:
+            await self._submit_pending()
+
+    async def _submit_pending(self) -> None:
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        if batch:
+            await self._submit(batch)
+
+    async def _submit(self, batch: List[Tuple[str, bytes]]) -> None:
+        # Backpressure: wait for the oldest batch once the pool is saturated
+        while len(self._inflight) >= self.max_inflight:
+            self.failures.extend(await self._inflight.pop(0))
+
+        loop = asyncio.get_running_loop()
+        self._inflight.append(loop.run_in_executor(self.executor, _write_batch, batch))
+
+    async def flush(self) -> List[Tuple[str, str]]:
+        """Write everything queued so far and return all failures seen."""
+        await self._submit_pending()
+        while self._inflight:
+            self.failures.extend(await self._inflight.pop(0))
+        return self.failures
+
+    async def close(self) -> List[Tuple[str, str]]:
+        """Finish all writes, save the manifest and return write failures."""
+        failures = await self.flush()
+        self.executor.shutdown(wait=True)
+        for path, _ in failures:
+            self.manifest.discard(os.path.relpath(path, self.root))
+        self.manifest.save()
+        return failures
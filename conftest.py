@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures: a MockGitHub server on a free local port, and the
+hunters pointed at it through GITHUB_API_URL.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from mock_github_server import MockGitHub
+
+
+@pytest.fixture
+def mock_github(monkeypatch):
+    """A running MockGitHub (10 source files per repository); its URL is mock.url."""
+    mock = MockGitHub(files_per_repo=10)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(mock.app())
+
+    async def start() -> str:
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    mock.url = loop.run_until_complete(start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('GITHUB_API_URL', mock.url)
+    try:
+        yield mock
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(10)
+        loop.close()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Cost Estimates
+
+Dry-run cost model for --estimate. The hunters resolve refs, fetch trees and
+run their matching as usual, but instead of downloading they describe what a
+real run would cost: API calls, raw downloads, bytes and a rough duration,
+checked against the current rate-limit window from GitHub's /rate_limit
+endpoint (which does not count against the limit itself).
+"""
+
+import contextlib
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Per-request latency assumed when the estimate could not measure one
+DEFAULT_REQUEST_LATENCY = 0.3
+
+# Aggregate download throughput assumed for the byte transfer (bytes/second)
+ASSUMED_THROUGHPUT = 5 * 1024 * 1024
+
+# API requests issued inside the innermost counting_requests() block of this task
+_issued: 'ContextVar[Optional[List[int]]]' = ContextVar('issued_requests', default=None)
+
+
+def count_request() -> None:
+    """Record one API request; the hunters call this wherever they send one."""
+    issued = _issued.get()
+    if issued is not None:
+        issued[0] += 1
+
+
+@contextlib.contextmanager
+def counting_requests():
+    """
+    Count the API requests made in the with block, including by tasks it
+    starts (such as a shared lookup other callers then join). Yields a
+    one-item list holding the count.
+    """
+    issued = [0]
+    token = _issued.set(issued)
+    try:
+        yield issued
+    finally:
+        _issued.reset(token)
+
+
+@dataclass
+class CostEstimate:
+    """Projected cost of one job (or one profile search)."""
+    repository: str
+    branch: Optional[str] = None
+    matches: int = 0
+    api_calls: int = 0
+    downloads: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def estimate_seconds(api_calls: int, downloads: int, total_bytes: int,
+                     latency: Optional[float], concurrency: int) -> float:
+    """Rough wall time: every request costs one latency, spread over the concurrency, plus transfer time."""
+    latency = latency or DEFAULT_REQUEST_LATENCY
+    return (api_calls + downloads) * latency / max(1, concurrency) + total_bytes / ASSUMED_THROUGHPUT
+
+
+async def fetch_rate_limit(session: 'aiohttp.ClientSession', base_url: str,
+                           headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """The core rate-limit window ({limit, remaining, reset, used}), or None if unavailable."""
+    import aiohttp
+
+    try:
+        async with session.get(f"{base_url}/rate_limit", headers=headers or {}) as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+    except (aiohttp.ClientError, ValueError):
+        return None
+    return data.get('resources', {}).get('core') or data.get('rate')
+
+
+def print_estimate(estimates: List[CostEstimate], rate_limit: Optional[Dict[str, Any]],
+                   seconds: float, spent: int, per_job: bool = True) -> bool:
+    """
+    Print per-job and total projected costs. spent is how many API calls the
+    estimate itself used. Returns True if the run fits in the current
+    rate-limit window (or the window is unknown).
+    """
+    if per_job:
+        for estimate in estimates:
+            if estimate.error:
+                print(f"    ❌ {estimate.repository}: {estimate.error}")
+                continue
+            print(f"    📐 {estimate.repository}: {estimate.matches} matches, "
+                  f"{estimate.api_calls} API calls, {estimate.downloads} downloads, "
+                  f"{format_bytes(estimate.bytes)}")
+
+    api_calls = sum(estimate.api_calls for estimate in estimates)
+    downloads = sum(estimate.downloads for estimate in estimates)
+    total_bytes = sum(estimate.bytes for estimate in estimates)
+    failed = sum(1 for estimate in estimates if estimate.error)
+
+    jobs = f"{len(estimates)} job{'s' if len(estimates) != 1 else ''}"
+    print(f"\n📐 Estimated cost of {jobs}" + (f" ({failed} could not be estimated)" if failed else ""))
+    print(f"   🔌 API calls: {api_calls} ({spent} already used by this estimate)")
+    print(f"   📥 Raw downloads: {downloads}")
+    print(f"   💾 Bytes: {format_bytes(total_bytes)}")
+    print(f"   ⏱️  Time: ~{seconds:.0f}s")
+
+    if not rate_limit:
+        print("   ⚠️  Could not read the current rate limit")
+        return True
+    remaining, limit = rate_limit.get('remaining', 0), rate_limit.get('limit', 0)
+    reset = time.strftime('%H:%M:%S', time.localtime(rate_limit.get('reset', 0)))
+    print(f"   🚦 Rate limit: {remaining} of {limit} remaining, resets at {reset}")
+    if api_calls <= remaining:
+        print("   ✅ Fits in the current rate-limit window")
+        return True
+    windows = math.ceil((api_calls - remaining) / limit) if limit else 0
+    print(f"   ⚠️  Needs {api_calls - remaining} more calls than remain; "
+          f"expect to wait for {windows} more reset{'s' if windows != 1 else ''}")
+    return False
@@ -7,50 +7,67 @@ without cloning the entire repository. Supports individual files, patterns,
 batch operations, and repository structure analysis.
 """
 
+if __name__ == "__main__":
+    # Hand the command to a running hunter daemon before paying for heavy imports
+    from hunter_client import forward
+    forward('github_file_hunter')
+
 import asyncio
-import aiohttp
+import csv
 import json
 import os
 import re
-from dataclasses import dataclass, field
+from dataclasses import asdict
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Union
 from urllib.parse import urlparse
 import argparse
 import sys
 
-@dataclass
-class SearchCriteria:
-    """Criteria for searching files in repositories."""
-    name_patterns: List[str] = field(default_factory=list)
-    extensions: List[str] = field(default_factory=list)
-    path_patterns: List[str] = field(default_factory=list)
-    exclude_patterns: List[str] = field(default_factory=list)
-    min_size: Optional[int] = None
-    max_size: Optional[int] = None
-    regex_pattern: Optional[str] = None
-    specific_files: List[str] = field(default_factory=list)  # New: for individual file downloads
+from retry_policy import RetryPolicy, LatencyTracker, FetchError, fetch_with_retry
+from bulk_writer import BulkWriter
+from archive_writer import ArchiveWriter
+from cost_estimate import count_request
+from hunter_daemon import warm_state
+from search_criteria import SearchCriteria, FileMatch
+from singleflight import SingleFlight, token_scope
+
+class GitHubAPIError(ValueError):
+    """GitHub failed a request for a reason other than the object not existing."""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_response(cls, message: str, response) -> 'GitHubAPIError':
+        try:
+            retry_after = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            retry_after = None
+        return cls(f"{message}: HTTP {response.status}", response.status, retry_after)
 
-@dataclass
-class FileMatch:
-    """Represents a matched file."""
-    path: str
-    size: int
-    download_url: str
-    sha: str
-    repo_owner: str
-    repo_name: str
-    branch: str
 
 class GitHubFileHunter:
     """Main class for hunting files in GitHub repositories."""
     
-    def __init__(self, github_token: str = None):
+    def __init__(self, github_token: str = None, retry_policy: RetryPolicy = None):
         self.github_token = github_token
         self.session = None
         self.downloaded_count = 0
         self.failed_count = 0
-        self.base_url = "https://api.github.com"
+        # GITHUB_API_URL points the hunter at GitHub Enterprise or a local mock server
+        self.base_url = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.latency = LatencyTracker()
+        self.owns_session = True
+        # Ref resolution cache; inside the hunter daemon it is shared by every command
+        warm = warm_state()
+        self.default_branches = warm.cache('default_branches') if warm else {}
+        # Concurrent identical lookups share one request (across commands in the daemon)
+        self.flights = warm.flights if warm else SingleFlight()
+        self.scope = token_scope(github_token)
         
     async def __aenter__(self):
         headers = {
@@ -61,11 +78,21 @@ class GitHubFileHunter:
         if self.github_token:
             headers['Authorization'] = f'token {self.github_token}'
         
-        self.session = aiohttp.ClientSession(headers=headers)
+        # Deferred until a network operation actually starts
+        import aiohttp
+        
+        timeout = aiohttp.ClientTimeout(total=self.retry_policy.attempt_timeout)
+        warm = warm_state()
+        if warm is not None:
+            # Inside the hunter daemon: reuse a pooled session that outlives this command
+            self.session = warm.session(headers, timeout)
+            self.owns_session = False
+        else:
+            self.session = aiohttp.ClientSession(headers=headers, timeout=timeout)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self.owns_session:
             await self.session.close()
     
     def parse_github_url(self, url: str) -> tuple[str, str, Optional[str]]:
@@ -103,30 +130,67 @@ class GitHubFileHunter:
         """Get basic repository information."""
         url = f"{self.base_url}/repos/{owner}/{repo}"
         
+        count_request()
         async with self.session.get(url) as response:
             if response.status == 404:
                 raise ValueError(f"Repository {owner}/{repo} not found or not accessible")
             elif response.status != 200:
-                raise ValueError(f"Failed to access repository: HTTP {response.status}")
+                raise GitHubAPIError.from_response("Failed to access repository", response)
             
             return await response.json()
     
+    async def get_default_branch(self, owner: str, repo: str) -> str:
+        """Get the repository's default branch, cached per repository."""
+        key = (self.scope, owner.lower(), repo.lower())
+        if key not in self.default_branches:
+            repo_info = await self.flights.do(
+                (self.scope, 'repository', owner.lower(), repo.lower()),
+                lambda: self.get_repository_info(owner, repo)
+            )
+            self.default_branches[key] = repo_info['default_branch']
+        return self.default_branches[key]
+
+    async def resolve_commit(self, owner: str, repo: str, ref: str) -> str:
+        """Resolve a branch, tag or SHA to its commit SHA (a small, body-less request)."""
+        return await self.flights.do(
+            (self.scope, 'commit', owner.lower(), repo.lower(), ref),
+            lambda: self._fetch_commit_sha(owner, repo, ref)
+        )
+
+    async def _fetch_commit_sha(self, owner: str, repo: str, ref: str) -> str:
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits/{ref}"
+
+        count_request()
+        async with self.session.get(url, headers={'Accept': 'application/vnd.github.sha'}) as response:
+            if response.status in (404, 422):
+                raise ValueError(f"Branch '{ref}' not found in {owner}/{repo}")
+            elif response.status != 200:
+                raise GitHubAPIError.from_response(f"Failed to resolve '{ref}'", response)
+
+            return (await response.text()).strip()
+
     async def get_repository_tree(self, owner: str, repo: str, branch: str = None) -> Dict[str, Any]:
         """Get the complete file tree of a repository."""
         
         # Get repository info to determine default branch if not specified
         if not branch:
-            repo_info = await self.get_repository_info(owner, repo)
-            branch = repo_info['default_branch']
+            branch = await self.get_default_branch(owner, repo)
         
+        return await self.flights.do(
+            (self.scope, 'tree', owner.lower(), repo.lower(), branch),
+            lambda: self._fetch_tree(owner, repo, branch)
+        )
+    
+    async def _fetch_tree(self, owner: str, repo: str, branch: str) -> Dict[str, Any]:
         # Get the tree recursively
         url = f"{self.base_url}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
         
+        count_request()
         async with self.session.get(url) as response:
             if response.status == 404:
                 raise ValueError(f"Branch '{branch}' not found in {owner}/{repo}")
             elif response.status != 200:
-                raise ValueError(f"Failed to get repository tree: HTTP {response.status}")
+                raise GitHubAPIError.from_response("Failed to get repository tree", response)
             
             return await response.json()
     
@@ -134,8 +198,7 @@ class GitHubFileHunter:
         """Get information about a specific file."""
         
         if not branch:
-            repo_info = await self.get_repository_info(owner, repo)
-            branch = repo_info['default_branch']
+            branch = await self.get_default_branch(owner, repo)
         
         url = f"{self.base_url}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
         
@@ -249,6 +312,17 @@ class GitHubFileHunter:
         regex_pattern = pattern.replace('*', '.*').replace('?', '.')
         return re.match(f'^{regex_pattern}$', text, re.IGNORECASE) is not None
     
+    def subtree_files(self, tree_data: Dict[str, Any], path: str, owner: str,
+                      repo: str, branch: str) -> List[FileMatch]:
+        """Every file under the folder at path (the whole tree if empty), or the file at path itself."""
+        path = path.strip('/')
+        prefix = f"{path}/" if path else ''
+        return [
+            self._create_file_match(item, owner, repo, branch)
+            for item in tree_data.get('tree', [])
+            if item['type'] == 'blob' and (item['path'] == path or item['path'].startswith(prefix))
+        ]
+
     def _create_file_match(self, item: Dict[str, Any], owner: str, repo: str, branch: str) -> FileMatch:
         """Create a FileMatch object from tree item."""
         download_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{item['path']}"
@@ -262,18 +336,59 @@ class GitHubFileHunter:
             repo_name=repo,
             branch=branch
         )
-    
-    async def download_files(self, matches: List[FileMatch], output_dir: str) -> None:
-        """Download all matched files to the specified directory."""
+
+    def display_matches(self, matches: List[FileMatch], show_details: bool = False) -> None:
+        """Print matched files, with their size and SHA when show_details is set."""
+        if not matches:
+            print("❌ No files found matching the criteria.")
+            return
+
+        print(f"📄 Found {len(matches)} matching files:")
+        for match in matches:
+            size_str = f"({match.size} bytes)" if match.size else ""
+            print(f"  📄 {match.path} {size_str}")
+            if show_details:
+                print(f"      🔗 {match.download_url}")
+                print(f"      🔑 {match.sha}")
+        print(f"💾 Total size: {sum(match.size for match in matches)} bytes")
+
+    def export_matches(self, matches: List[FileMatch], export_file: str, export_format: str = 'json') -> None:
+        """Write matches to export_file as json, csv or txt (one path per line)."""
+        directory = os.path.dirname(os.path.abspath(export_file))
+        os.makedirs(directory, exist_ok=True)
+
+        with open(export_file, 'w', encoding='utf-8', newline='') as f:
+            if export_format == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(['path', 'size', 'sha', 'download_url', 'repository', 'branch'])
+                for match in matches:
+                    writer.writerow([match.path, match.size, match.sha, match.download_url,
+                                     f"{match.repo_owner}/{match.repo_name}", match.branch])
+            elif export_format == 'txt':
+                f.writelines(f"{match.path}\n" for match in matches)
+            else:
+                json.dump([asdict(match) for match in matches], f, indent=2)
+
+        print(f"📤 Exported {len(matches)} matches to {export_file}")
+
+    async def download_files(self, matches: List[FileMatch], output_dir: str,
+                             archive: Optional[ArchiveWriter] = None) -> None:
+        """Download all matched files to the specified directory or archive."""
         
         if not matches:
             print("No files to download.")
             return
         
-        # Create output directory
-        os.makedirs(output_dir, exist_ok=True)
+        if archive is not None:
+            # Stream bodies straight into the archive, in plan order
+            writer = archive
+            print(f"📥 Downloading {len(matches)} files into {archive.path}...")
+        else:
+            writer = BulkWriter(output_dir)
+            print(f"📥 Downloading {len(matches)} files to {output_dir}...")
         
-        print(f"📥 Downloading {len(matches)} files to {output_dir}...")
+        # Create the directory layout (or archive member plan) once, up front
+        writer.expect(match.path for match in matches)
         
         # Reset counters
         self.downloaded_count = 0
@@ -284,48 +399,77 @@ class GitHubFileHunter:
         
         async def download_single_file(match: FileMatch):
             async with semaphore:
-                await self._download_file(match, output_dir)
+                await self._download_file(match, output_dir, writer)
         
         tasks = [download_single_file(match) for match in matches]
         await asyncio.gather(*tasks, return_exceptions=True)
         
+        if archive is not None:
+            await archive.flush()
+        else:
+            # Writes complete asynchronously; account for any that failed
+            for path, error in await writer.close():
+                self.downloaded_count -= 1
+                self.failed_count += 1
+                print(f"✗ {os.path.relpath(path, output_dir)} (Write error: {error})")
+        
         print(f"\n✅ Download complete: {self.downloaded_count} successful, {self.failed_count} failed")
     
-    async def _download_file(self, match: FileMatch, output_dir: str) -> None:
-        """Download a single file."""
+    async def _download_file(self, match: FileMatch, output_dir: str, writer=None) -> None:
+        """Download a single file, handing the body to writer (BulkWriter/ArchiveWriter) when given."""
         
         try:
-            # Create full output path
-            output_path = os.path.join(output_dir, match.path)
-            
-            # Create directory structure
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # Download file
-            async with self.session.get(match.download_url) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    
-                    with open(output_path, 'wb') as f:
-                        f.write(content)
-                    
-                    self.downloaded_count += 1
-                    print(f"✓ {match.path} ({match.size} bytes)")
-                else:
-                    self.failed_count += 1
-                    print(f"✗ {match.path} (HTTP {response.status})")
+            # Download file, retrying transient failures and verifying the
+            # bytes against the tree's blob SHA as they stream in
+            content = await fetch_with_retry(
+                self.session, match.download_url, self.retry_policy, self.latency,
+                expected_sha=match.sha, expected_size=match.size
+            )
+            
+            if writer is not None:
+                # Directories were created up front by download_files
+                await writer.write(match.path, content, match.sha or None)
+            else:
+                output_path = os.path.join(output_dir, match.path)
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with open(output_path, 'wb') as f:
+                    f.write(content)
+            
+            self.downloaded_count += 1
+            print(f"✓ {match.path} ({match.size} bytes)")
+        
+        except FetchError as e:
+            self.failed_count += 1
+            if writer is not None:
+                writer.skip(match.path)
+            print(f"✗ {match.path} ({e})")
         
         except Exception as e:
             self.failed_count += 1
+            if writer is not None:
+                writer.skip(match.path)
             print(f"✗ {match.path} (Error: {e})")
 
+async def download_matches(hunter: GitHubFileHunter, matches: List[FileMatch],
+                           output_dir: str, output_archive: str = None) -> None:
+    """Download matches to output_dir, or stream them into output_archive if given."""
+    if not output_archive:
+        await hunter.download_files(matches, output_dir)
+        return
+    
+    async with ArchiveWriter(output_archive) as archive:
+        await hunter.download_files(matches, output_dir, archive)
+    print(f"📦 Wrote {archive.member_count} files to {output_archive}")
+
 async def download_individual_files(repo_url: str, file_paths: List[str], 
                                   output_dir: str = "./resulting_downloads", 
                                   github_token: str = None,
-                                  branch: str = None) -> None:
-    """Download specific individual files from a repository."""
+                                  branch: str = None,
+                                  retry_policy: RetryPolicy = None,
+                                  output_archive: str = None) -> None:
+    """Download specific individual files from a repository (optionally into an archive)."""
     
-    async with GitHubFileHunter(github_token) as hunter:
+    async with GitHubFileHunter(github_token, retry_policy) as hunter:
         # Parse repository URL
         owner, repo, detected_branch = hunter.parse_github_url(repo_url)
         search_branch = branch or detected_branch
@@ -352,7 +496,7 @@ async def download_individual_files(repo_url: str, file_paths: List[str],
         
         # Download found files
         if matches:
-            await hunter.download_files(matches, output_dir)
+            await download_matches(hunter, matches, output_dir, output_archive)
         else:
             print("❌ No files found to download")
 
@@ -426,10 +570,21 @@ Examples:
                        help='Specific branch to search (default: repository default)')
     parser.add_argument('--output-dir', '-o', default='./resulting_downloads',
                        help='Output directory for downloads')
+    parser.add_argument('--output-archive',
+                       help='Stream downloads into one archive (.zip, .tar, .tar.gz, .tar.zst) instead of files')
     parser.add_argument('--token', '-t', 
                        help='GitHub personal access token',
                        default=os.getenv('GITHUB_TOKEN'))
     
+    parser.add_argument('--retries', type=int, default=4,
+                       help='Attempts per file before giving up (default: 4)')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                       help='Per-attempt timeout in seconds (default: 30)')
+    parser.add_argument('--deadline', type=float, default=120.0,
+                       help='Overall deadline per file in seconds, including retries (default: 120)')
+    parser.add_argument('--hedge', action='store_true',
+                       help='Send a duplicate request when a download runs past its p95 latency')
+    
     parser.add_argument('--list-only', '-l', action='store_true',
                        help='List matching files without downloading')
     parser.add_argument('--structure-only', '-s', action='store_true',
@@ -437,6 +592,13 @@ Examples:
     
     args = parser.parse_args()
     
+    retry_policy = RetryPolicy(
+        max_attempts=max(1, args.retries),
+        attempt_timeout=args.timeout,
+        total_timeout=args.deadline,
+        hedge=args.hedge
+    )
+    
     try:
         # If structure-only mode, analyze repository structure
         if args.structure_only:
@@ -468,12 +630,14 @@ Examples:
                 file_paths=args.files,
                 output_dir=args.output_dir,
                 github_token=args.token,
-                branch=args.branch
+                branch=args.branch,
+                retry_policy=retry_policy,
+                output_archive=args.output_archive
             )
             return 0
         
         # Otherwise, search by patterns
-        async with GitHubFileHunter(args.token) as hunter:
+        async with GitHubFileHunter(args.token, retry_policy) as hunter:
             # Parse repository URL
             owner, repo, detected_branch = hunter.parse_github_url(args.repo_url)
             search_branch = args.branch or detected_branch
@@ -526,7 +690,7 @@ Examples:
                 return 0
             
             # Download files
-            await hunter.download_files(matches, args.output_dir)
+            await download_matches(hunter, matches, args.output_dir, args.output_archive)
             return 0
     
     except Exception as e:
@@ -6,10 +6,16 @@ Pre-built search profiles for common development scenarios.
 Makes it easy to find specific types of files without remembering complex patterns.
 """
 
-import asyncio
+if __name__ == "__main__":
+    # Hand the command to a running hunter daemon before paying for heavy imports
+    from hunter_client import forward
+    forward('github_hunter_profiles')
+
 import argparse
 import os
-from github_file_hunter import GitHubFileHunter, SearchCriteria
+import time
+from typing import Optional
+from search_criteria import SearchCriteria
 
 # Pre-defined search profiles
 SEARCH_PROFILES = {
@@ -183,10 +189,10 @@ class GitHubHunterProfiles:
         if criteria.exclude_patterns:
             print(f"🚫 Exclude patterns: {', '.join(criteria.exclude_patterns)}")
         
-        if criteria.min_size > 0:
+        if criteria.min_size:
             print(f"📏 Min size: {criteria.min_size} bytes")
         
-        if criteria.max_size < float('inf'):
+        if criteria.max_size is not None:
             print(f"📏 Max size: {criteria.max_size} bytes")
         
         if criteria.regex_pattern:
@@ -196,8 +202,12 @@ class GitHubHunterProfiles:
                                  branch: str = None, download: bool = False, 
                                  output_dir: str = ".", preview_only: bool = False,
                                  show_details: bool = False, export_file: str = None,
-                                 export_format: str = "json"):
-        """Search using a pre-built profile."""
+                                 export_format: str = "json", output_archive: str = None,
+                                 estimate: bool = False):
+        """
+        Search using a pre-built profile (or, with estimate, project the
+        download's cost and return whether it fits the rate-limit window).
+        """
         
         if profile_name not in SEARCH_PROFILES:
             print(f"❌ Unknown profile: {profile_name}")
@@ -206,6 +216,11 @@ class GitHubHunterProfiles:
                 print(f"  - {name}")
             return
         
+        # The network stack is only imported once a search actually runs
+        from github_file_hunter import GitHubFileHunter, download_matches
+        from cost_estimate import (CostEstimate, counting_requests, estimate_seconds,
+                                   fetch_rate_limit, print_estimate)
+        
         profile = SEARCH_PROFILES[profile_name]
         criteria = profile['criteria']
         
@@ -227,13 +242,31 @@ class GitHubHunterProfiles:
             
             # Get repository tree
             print("📡 Fetching repository structure...")
-            tree_data = await hunter.get_repository_tree(owner, repo, search_branch)
+            started = time.monotonic()
+            with counting_requests() as issued:
+                # Resolved here so the matches' download URLs name a real branch
+                search_branch = search_branch or await hunter.get_default_branch(owner, repo)
+                tree_data = await hunter.get_repository_tree(owner, repo, search_branch)
+            calls = issued[0]
+            latency = (time.monotonic() - started) / calls if calls else None
             total_files = len([item for item in tree_data.get('tree', []) if item['type'] == 'blob'])
             print(f"📊 Repository contains {total_files} files")
             
             # Search with profile criteria
             matches = hunter.search_files(tree_data, criteria, owner, repo, search_branch)
             
+            if estimate:
+                # Downloads come from raw.githubusercontent.com and cost no API calls
+                cost = CostEstimate(f"{owner}/{repo}", search_branch, matches=len(matches),
+                                    api_calls=calls, downloads=len(matches),
+                                    bytes=sum(match.size for match in matches))
+                seconds = estimate_seconds(cost.api_calls, cost.downloads, cost.bytes, latency, 5)
+                rate_limit = await fetch_rate_limit(hunter.session, hunter.base_url)
+                print(f"🎯 {len(matches)} files match")
+                fits = print_estimate([cost], rate_limit, seconds, calls, per_job=False)
+                print("📐 Estimate only - no files downloaded")
+                return fits
+            
             # Display results
             hunter.display_matches(matches, show_details)
             
@@ -244,9 +277,10 @@ class GitHubHunterProfiles:
             # Download if requested
             if download and matches and not preview_only:
                 print()
-                confirm = input(f"Download {len(matches)} files to '{output_dir}'? (y/N): ")
+                destination = output_archive or output_dir
+                confirm = input(f"Download {len(matches)} files to '{destination}'? (y/N): ")
                 if confirm.lower() in ['y', 'yes']:
-                    await hunter.download_files(matches, output_dir)
+                    await download_matches(hunter, matches, output_dir, output_archive)
                 else:
                     print("Download cancelled.")
             elif preview_only:
@@ -256,7 +290,7 @@ class GitHubHunterProfiles:
             elif not download:
                 print("💡 Use --download to download these files")
 
-async def main():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='GitHub File Hunter - Search with pre-built profiles',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -276,6 +310,9 @@ Examples:
 
   # Preview Docker files without downloading
   python github_hunter_profiles.py owner/repo --profile docker --preview-only
+
+  # Estimate what downloading the ML files would cost
+  python github_hunter_profiles.py owner/repo --profile ml --estimate
         """
     )
     
@@ -295,16 +332,21 @@ Examples:
     # Action options
     parser.add_argument('--preview-only', action='store_true', help='Only show matches, don\'t download')
     parser.add_argument('--download', '-d', action='store_true', help='Download matching files')
+    parser.add_argument('--estimate', action='store_true',
+                       help='Project API calls, downloads, bytes and time against the rate limit, without downloading')
     parser.add_argument('--output-dir', '-o', default='.', help='Output directory for downloads')
+    parser.add_argument('--output-archive',
+                       help='Stream downloads into one archive (.zip, .tar, .tar.gz, .tar.zst) instead of files')
     
     # Display options
     parser.add_argument('--details', action='store_true', help='Show detailed file information')
     parser.add_argument('--export', help='Export matches to file')
     parser.add_argument('--export-format', choices=['json', 'csv', 'txt'], default='json',
                        help='Export file format')
-    
-    args = parser.parse_args()
-    
+    return parser
+
+def show_profiles(args) -> Optional[int]:
+    """Handle --list/--show, which only read the static catalogue; None if args ask for a search."""
     hunter_profiles = GitHubHunterProfiles(args.token)
     
     # Handle list operation
@@ -317,6 +359,17 @@ Examples:
         hunter_profiles.get_profile_details(args.show)
         return 0
     
+    return None
+
+async def main(args=None):
+    args = args or build_parser().parse_args()
+    
+    code = show_profiles(args)
+    if code is not None:
+        return code
+    
+    hunter_profiles = GitHubHunterProfiles(args.token)
+    
     # Validate required arguments for search
     if not args.repo:
         print("❌ Error: Repository required for search operations")
@@ -329,17 +382,23 @@ Examples:
         return 1
     
     try:
-        await hunter_profiles.search_with_profile(
+        fits = await hunter_profiles.search_with_profile(
             args.repo, args.profile, args.branch, args.download,
             args.output_dir, args.preview_only, args.details,
-            args.export, args.export_format
+            args.export, args.export_format, args.output_archive, args.estimate
         )
         
-        return 0
+        return 1 if args.estimate and fits is False else 0
     
     except Exception as e:
         print(f"❌ Error: {e}")
         return 1
 
 if __name__ == "__main__":
-    exit(asyncio.run(main()))
\ No newline at end of file
+    args = build_parser().parse_args()
+    # Fast path: listing and showing profiles needs no event loop or network imports
+    code = show_profiles(args)
+    if code is None:
+        import asyncio
+        code = asyncio.run(main(args))
+    exit(code)
\ No newline at end of file
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Daemon Client
+
+The thin side of hunter_daemon.py. The CLIs call forward() before importing
+anything heavy: if a daemon is listening, the command line is sent over its
+Unix socket and the output streamed back, so a forwarded call costs little
+more than starting Python. Only standard-library modules that load quickly
+are imported here.
+"""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+# Environment forwarded with each command and applied while it runs
+FORWARDED_ENV = ('GITHUB_TOKEN', 'GITHUB_API_URL')
+
+
+DEFAULT_SOCKET = os.path.join(os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+                              f"github-file-hunter-{getattr(os, 'getuid', lambda: 0)()}.sock")
+
+
+def socket_path() -> Optional[str]:
+    """The daemon socket to use, or None if forwarding is disabled."""
+    configured = os.getenv('GITHUB_HUNTER_DAEMON', '')
+    if configured.lower() in ('0', 'off', 'no', 'false'):
+        return None
+    return configured or DEFAULT_SOCKET
+
+
+def local_only(program: str, argv: List[str]) -> bool:
+    """Commands that spawn processes, serve, or ask for input run in the calling process."""
+    if program == 'batch_hunter':
+        if any(arg in ('--serve', '--connect') or arg.startswith(('--serve=', '--connect='))
+               for arg in argv):
+            return True
+        for i, arg in enumerate(argv):
+            value = None
+            if arg in ('--workers', '-w') and i + 1 < len(argv):
+                value = argv[i + 1]
+            elif arg.startswith('--workers='):
+                value = arg.split('=', 1)[1]
+            elif arg.startswith('-w') and len(arg) > 2:
+                value = arg[2:]
+            if value is not None and value.isdigit() and int(value) > 1:
+                return True
+    if program == 'github_hunter_profiles':
+        # Downloads ask for confirmation on stdin
+        return '--download' in argv or '-d' in argv
+    return False
+
+
+def forward(program: str) -> None:
+    """
+    Run this command in the daemon if one is listening, and exit with its
+    status. Returns (to run locally) when there is no daemon or the command
+    must run locally.
+    """
+    path = socket_path()
+    argv = sys.argv[1:]
+    if (path is None or not hasattr(socket, 'AF_UNIX') or not os.path.exists(path)
+            or local_only(program, argv)):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return  # Stale socket; nobody is listening
+
+    request = {
+        'program': program,
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'env': {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ},
+    }
+    code = None
+    try:
+        with sock, sock.makefile('rb') as replies:
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            for line in replies:
+                message = json.loads(line)
+                if 'out' in message:
+                    sys.stdout.write(message['out'])
+                    sys.stdout.flush()
+                elif 'err' in message:
+                    sys.stderr.write(message['err'])
+                    sys.stderr.flush()
+                elif 'exit' in message:
+                    code = message['exit']
+                    break
+    except KeyboardInterrupt:
+        # Closing the socket makes the daemon cancel the command
+        sys.exit(130)
+    except BrokenPipeError:
+        # Our reader (e.g. `| head`) went away; stop quietly like a local run would
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    if code is None:
+        print("❌ Error: lost connection to the hunter daemon", file=sys.stderr)
+        code = 1
+    sys.exit(code)
+
+
+def send_request(path: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one control request to a daemon and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        with sock.makefile('rb') as replies:
+            return json.loads(replies.readline())
+
+
+def ping(path: str) -> bool:
+    """True if a daemon answers on path."""
+    try:
+        send_request(path, {'command': 'status'})
+        return True
+    except (OSError, ValueError):
+        return False
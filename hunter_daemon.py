@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Daemon
+
+Long-lived local server that runs hunter commands in one warm process. It
+keeps aiohttp connection pools (and their TLS sessions) open between
+commands, along with the ref-resolution caches and the already-imported
+modules and compiled pattern caches, so a script that calls the tools
+hundreds of times stops paying interpreter start-up and handshakes on every
+call:
+
+    python hunter_daemon.py start &
+    python batch_hunter.py -f jobs.csv          # forwarded to the daemon
+    python hunter_daemon.py status
+    python hunter_daemon.py stop
+
+While a daemon is listening, github_file_hunter.py, batch_hunter.py and
+github_hunter_profiles.py forward their command line to it over a Unix
+socket (hunter_client.py) before importing anything heavy, and print its
+output as it streams back. Commands that spawn processes, serve or prompt for input still run
+locally. Set GITHUB_HUNTER_DAEMON=0 to never forward, or to a socket path to
+use another daemon.
+
+Protocol: one JSON request line per connection, either
+{"program", "argv", "cwd", "env"} or {"command": "status" | "stop"}. A
+command is answered with {"out": text} and {"err": text} lines and a final
+{"exit": code}. Commands run one at a time, since each needs its own working
+directory and environment.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from typing import Any, Dict, Optional, Tuple
+
+from hunter_client import DEFAULT_SOCKET, FORWARDED_ENV, ping, send_request, socket_path
+from singleflight import SingleFlight
+
+# Programs the daemon runs, by module name
+PROGRAMS = ('github_file_hunter', 'batch_hunter', 'github_hunter_profiles')
+
+# How long warm caches are trusted before they start over, in seconds
+CACHE_TTL = 600.0
+
+# Set in the daemon process: state that outlives individual commands
+_warm: Optional['WarmState'] = None
+
+
+def warm_state() -> Optional['WarmState']:
+    """The daemon's shared sessions and caches, or None outside the daemon."""
+    return _warm
+
+
+def set_warm_state(warm: Optional['WarmState']) -> None:
+    """Install (or with None, remove) the process-wide warm state, e.g. for a long-lived server."""
+    global _warm
+    _warm = warm
+
+
+class WarmState:
+    """Connection pools and caches kept alive across daemon commands."""
+
+    def __init__(self, cache_ttl: float = CACHE_TTL):
+        self.cache_ttl = cache_ttl
+        self.sessions: Dict[Tuple, Any] = {}
+        self.connector = None
+        # Identical lookups in flight at the same time, from any command, share one request
+        self.flights = SingleFlight()
+        self._caches: Dict[str, Tuple[float, Dict]] = {}
+
+    def session(self, headers: Optional[Dict[str, str]] = None, timeout=None):
+        """A pooled aiohttp.ClientSession for these default headers and timeout."""
+        import aiohttp
+
+        key = (tuple(sorted((headers or {}).items())), timeout.total if timeout else None)
+        session = self.sessions.get(key)
+        if session is None or session.closed:
+            if self.connector is None or self.connector.closed:
+                self.connector = aiohttp.TCPConnector()
+            # Sessions differ only in default headers (e.g. tokens); all share one connection pool
+            session = aiohttp.ClientSession(headers=headers, timeout=timeout,
+                                            connector=self.connector, connector_owner=False)
+            self.sessions[key] = session
+        return session
+
+    def cache(self, name: str) -> Dict:
+        """A named dict shared by every command, emptied once it is older than cache_ttl."""
+        created, cache = self._caches.get(name, (0.0, None))
+        if cache is None or time.monotonic() - created > self.cache_ttl:
+            cache = {}
+            self._caches[name] = (time.monotonic(), cache)
+        return cache
+
+    def cache_sizes(self) -> Dict[str, int]:
+        return {name: len(cache) for name, (_, cache) in self._caches.items()}
+
+    async def close(self) -> None:
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions.clear()
+        if self.connector is not None:
+            await self.connector.close()
+            self.connector = None
+
+
+class _Relay(io.TextIOBase):
+    """Text stream that queues everything written to it for a daemon client.
+
+    write() is synchronous, so it cannot wait for the socket; the lines go
+    to an outbox that _pump() sends with drain(), keeping a chatty command
+    from piling output into the transport buffer of a slow client.
+    """
+
+    def __init__(self, outbox: asyncio.Queue, channel: str):
+        self.outbox = outbox
+        self.channel = channel
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            self.outbox.put_nowait(json.dumps({self.channel: text}).encode() + b'\n')
+        return len(text)
+
+
+async def _pump(outbox: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+    """Send queued relay lines to the client until a None marks the end."""
+    connected = True
+    while True:
+        line = await outbox.get()
+        if line is None:
+            return
+        if not connected or writer.is_closing():
+            continue  # keep emptying the outbox so the command never notices
+        try:
+            writer.write(line)
+            await writer.drain()
+        except ConnectionError:
+            connected = False
+
+
+class HunterDaemon:
+    """Unix-socket server that runs forwarded hunter commands one at a time."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        self.path = path
+        self.warm = WarmState()
+        self.started = time.time()
+        self.commands = 0
+        self._lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+        self._handlers = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._handlers.add(asyncio.current_task())
+        try:
+            request = json.loads(await reader.readline() or b'null')
+            if not isinstance(request, dict):
+                raise ValueError('expected a JSON object')
+            if request.get('command') == 'status':
+                await self.reply(writer, {'status': self.status()})
+            elif request.get('command') == 'stop':
+                await self.reply(writer, {'ok': True})
+                self._stopped.set()
+            elif request.get('program') in PROGRAMS:
+                await self.run_command(request, reader, writer)
+            else:
+                raise ValueError(f"unknown request {request}")
+        except (ValueError, KeyError, TypeError) as e:
+            await self.reply(writer, {'err': f"❌ Bad daemon request: {e}\n"})
+            await self.reply(writer, {'exit': 2})
+        except ConnectionError:
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    @staticmethod
+    async def reply(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+
+    async def run_command(self, request: Dict[str, Any], reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        module = importlib.import_module(request['program'])
+        async with self._lock:
+            self.commands += 1
+            outbox = asyncio.Queue()
+            # Started before the command, so _cancel_leftovers() leaves it alone
+            pump = asyncio.ensure_future(_pump(outbox, writer))
+            command = asyncio.ensure_future(self.execute(module, request, outbox))
+            # The client closing its end (e.g. Ctrl-C) cancels the command
+            hangup = asyncio.ensure_future(self._wait_for_hangup(reader))
+            await asyncio.wait({command, hangup}, return_when=asyncio.FIRST_COMPLETED)
+            if not command.done():
+                command.cancel()
+                pump.cancel()
+                print(f"⚠️  Client went away; cancelled {request['program']}", file=sys.__stderr__)
+                with contextlib.suppress(asyncio.CancelledError):
+                    await command
+                with contextlib.suppress(asyncio.CancelledError):
+                    await pump
+                return
+            hangup.cancel()
+            # Everything the command printed goes out before its exit code
+            outbox.put_nowait(None)
+            await pump
+            await self.reply(writer, {'exit': command.result()})
+
+    @staticmethod
+    async def _wait_for_hangup(reader: asyncio.StreamReader) -> None:
+        with contextlib.suppress(ConnectionError):
+            await reader.read()
+
+    async def execute(self, module, request: Dict[str, Any], outbox: asyncio.Queue) -> int:
+        """Run module.main() with the client's argv, cwd and environment, relaying its output."""
+        saved_argv, saved_cwd = sys.argv, os.getcwd()
+        saved_env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+        try:
+            sys.argv = [f"{request['program']}.py", *request.get('argv', [])]
+            os.chdir(request.get('cwd') or saved_cwd)
+            for name in FORWARDED_ENV:
+                os.environ.pop(name, None)
+            os.environ.update(request.get('env') or {})
+            with contextlib.redirect_stdout(_Relay(outbox, 'out')), \
+                    contextlib.redirect_stderr(_Relay(outbox, 'err')):
+                before = asyncio.all_tasks()
+                try:
+                    code = await module.main()
+                except SystemExit as e:
+                    # argparse errors and --help
+                    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    # Tasks the command spawned must not outlive its cwd and environment
+                    await self._cancel_leftovers(before)
+            return code or 0
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    async def _cancel_leftovers(self, before) -> None:
+        leftovers = asyncio.all_tasks() - before - self._handlers - {asyncio.current_task()}
+        for task in leftovers:
+            task.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'socket': self.path,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'commands': self.commands,
+            'sessions': sum(1 for session in self.warm.sessions.values() if not session.closed),
+            'caches': self.warm.cache_sizes(),
+            'coalesced': self.warm.flights.coalesced,
+        }
+
+    async def serve(self) -> None:
+        if os.path.exists(self.path):
+            if ping(self.path):
+                raise RuntimeError(f"a daemon is already listening on {self.path}")
+            os.unlink(self.path)
+
+        set_warm_state(self.warm)
+        for program in PROGRAMS:
+            # Pay the imports once, up front
+            importlib.import_module(program)
+        previous_umask = os.umask(0o177)  # Owner-only socket: commands carry tokens
+        try:
+            server = await asyncio.start_unix_server(self.handle, path=self.path)
+        finally:
+            os.umask(previous_umask)
+        print(f"🛰️  Hunter daemon listening on {self.path} (pid {os.getpid()})")
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            set_warm_state(None)
+            await self.warm.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            print("🛑 Hunter daemon stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GitHub File Hunter - warm background daemon')
+    parser.add_argument('action', choices=['start', 'status', 'stop'], help='What to do')
+    parser.add_argument('--socket', help=f'Unix socket path (default: $GITHUB_HUNTER_DAEMON or {DEFAULT_SOCKET})')
+    args = parser.parse_args()
+    path = args.socket or socket_path() or DEFAULT_SOCKET
+
+    if args.action == 'start':
+        try:
+            asyncio.run(HunterDaemon(path).serve())
+        except RuntimeError as e:
+            print(f"❌ Error: {e}")
+            return 1
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    try:
+        reply = send_request(path, {'command': args.action})
+    except (OSError, ValueError):
+        print(f"❌ No hunter daemon listening on {path}")
+        return 1
+    if args.action == 'stop':
+        print(f"🛑 Stopped hunter daemon on {path}")
+    else:
+        status = reply['status']
+        print(f"🛰️  Hunter daemon pid {status['pid']} on {status['socket']}")
+        print(f"   ⏱️  Up {status['uptime_seconds']:.0f}s, {status['commands']} commands served")
+        print(f"   🔌 {status['sessions']} pooled sessions")
+        for name, size in status['caches'].items():
+            print(f"   🗂️  {name}: {size} entries")
+        print(f"   🔗 {status.get('coalesced', 0)} duplicate requests coalesced")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run from the importable module, so the hunters see the same warm state
+    import hunter_daemon
+    exit(hunter_daemon.main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Integrity
+
+Streaming verification of downloaded files against the git blob SHA from the
+repository tree, plus the download manifest that records verified hashes.
+Git hashes a blob as sha1(b"blob <len>\\0" + content), so the header can be
+fed to the hasher before the first byte arrives and the content hashed chunk
+by chunk as it streams in - no second pass over the file is needed.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+MANIFEST_NAME = '.hunter-manifest.json'
+
+
+class IntegrityError(Exception):
+    """Downloaded bytes do not match the blob SHA from the repository tree."""
+
+
+class BlobHasher:
+    """Incremental git blob hasher for a body of known length."""
+
+    def __init__(self, expected_size: int):
+        self.expected_size = expected_size
+        self.received = 0
+        self._sha = hashlib.sha1(b'blob %d\0' % expected_size)
+
+    def update(self, chunk: bytes) -> None:
+        self.received += len(chunk)
+        self._sha.update(chunk)
+
+    def verify(self, expected_sha: str) -> str:
+        """Return the verified hex digest, or raise IntegrityError."""
+        if self.received != self.expected_size:
+            raise IntegrityError(f"size mismatch: expected {self.expected_size} bytes, "
+                                 f"got {self.received}")
+        digest = self._sha.hexdigest()
+        if digest != expected_sha:
+            raise IntegrityError(f"blob sha mismatch: expected {expected_sha[:12]}, got {digest[:12]}")
+        return digest
+
+
+class Manifest:
+    """Path -> {size, sha} record of verified downloads, written as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, file_path: str, size: int, sha: Optional[str]) -> None:
+        """Record a written file; sha is the verified blob SHA, or None if unchecked."""
+        self.entries[file_path] = {'size': size, 'sha': sha, 'verified': sha is not None}
+
+    def discard(self, file_path: str) -> None:
+        self.entries.pop(file_path, None)
+
+    def save(self) -> None:
+        """Write the manifest, merging with one left by an earlier run or job."""
+        if not self.entries:
+            return
+        merged: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    merged = json.load(f).get('files', {})
+            except (OSError, ValueError):
+                merged = {}
+        merged.update(self.entries)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'algorithm': 'git-blob-sha1', 'files': dict(sorted(merged.items()))}, f, indent=2)
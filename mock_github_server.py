@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Mock GitHub API server for local testing
+
+Serves deterministic synthetic repositories for the endpoints the hunters use
+(repository metadata, branches, recursive trees, contents, raw downloads,
+commits and /rate_limit), including X-RateLimit-* headers. Any owner/repo
+name exists. Point the tools at it with GITHUB_API_URL:
+
+    python mock_github_server.py --port 8766 &
+    GITHUB_API_URL=http://127.0.0.1:8766 python batch_hunter.py -f jobs.jsonl --download
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from typing import Dict
+
+from aiohttp import web
+
+FILE_TEMPLATES = [
+    'README.md',
+    'LICENSE',
+    'setup.py',
+    'config/settings.yml',
+    'config/app.json',
+    'docs/guide.md',
+    'docs/api.md',
+    '.github/workflows/ci.yml',
+    'Dockerfile',
+]
+
+
+def blob_sha(data: bytes) -> str:
+    """Git blob SHA-1 of data"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class MockGitHub:
+    """Deterministic fake repositories plus a simple rate-limit window"""
+
+    def __init__(self, files_per_repo: int = 40, rate_limit: int = 5000,
+                 window: float = 3600.0, latency: float = 0.0, fail_rate: float = 0.0):
+        self.files_per_repo = files_per_repo
+        self.rate_limit = rate_limit
+        self.window = window
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.used = 0
+        self.reset_at = time.time() + window
+
+    def files(self, owner: str, repo: str) -> Dict[str, bytes]:
+        """The repository's files, derived from its name so every run agrees"""
+        seed = f"{owner}/{repo}"
+        files = {path: f"# {seed}: {path}\n".encode() for path in FILE_TEMPLATES}
+        for i in range(self.files_per_repo):
+            path = f"src/module{i % 5}/file{i}.py"
+            files[path] = f"# {seed}\nprint({i})\n".encode() * (i % 7 + 1)
+        return files
+
+    def base_url(self, request: web.Request) -> str:
+        return f"{request.scheme}://{request.host}"
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        now = time.time()
+        if now >= self.reset_at:
+            self.used, self.reset_at = 0, now + self.window
+        # Raw downloads and /rate_limit do not count against the API budget
+        metered = not request.path.startswith('/raw/') and request.path != '/rate_limit'
+        if metered and self.used >= self.rate_limit:
+            response = web.json_response({'message': 'API rate limit exceeded'}, status=403)
+        else:
+            if metered:
+                self.used += 1
+            if request.path.startswith('/raw/') and random.random() < self.fail_rate:
+                response = web.Response(status=502)
+            else:
+                response = await handler(request)
+        response.headers['X-RateLimit-Limit'] = str(self.rate_limit)
+        response.headers['X-RateLimit-Remaining'] = str(max(0, self.rate_limit - self.used))
+        response.headers['X-RateLimit-Reset'] = str(int(self.reset_at))
+        return response
+
+    async def repository(self, request: web.Request) -> web.Response:
+        owner, repo = request.match_info['owner'], request.match_info['repo']
+        return web.json_response({'full_name': f"{owner}/{repo}", 'default_branch': 'main',
+                                  'private': False})
+
+    async def branch(self, request: web.Request) -> web.Response:
+        if request.match_info['branch'] != 'main':
+            return web.json_response({'message': 'Branch not found'}, status=404)
+        return web.json_response({'name': 'main', 'commit': {'sha': self.commit_sha(request)}})
+
+    def commit_sha(self, request: web.Request) -> str:
+        owner, repo = request.match_info['owner'], request.match_info['repo']
+        return hashlib.sha1(f"commit {owner}/{repo}".encode()).hexdigest()
+
+    async def commit(self, request: web.Request) -> web.Response:
+        if request.match_info['ref'] not in ('main', self.commit_sha(request)):
+            return web.json_response({'message': 'No commit found'}, status=422)
+        if 'application/vnd.github.sha' in request.headers.get('Accept', ''):
+            return web.Response(text=self.commit_sha(request))
+        return web.json_response({'sha': self.commit_sha(request)})
+
+    async def tree(self, request: web.Request) -> web.Response:
+        owner, repo = request.match_info['owner'], request.match_info['repo']
+        if request.match_info['ref'] not in ('main', self.commit_sha(request)):
+            return web.json_response({'message': 'Not Found'}, status=404)
+        files = self.files(owner, repo)
+        directories = sorted({path.rsplit('/', 1)[0] for path in files if '/' in path})
+        tree = [{'path': d, 'type': 'tree', 'mode': '040000', 'sha': blob_sha(d.encode())}
+                for d in directories]
+        tree += [{'path': path, 'type': 'blob', 'mode': '100644', 'size': len(data),
+                  'sha': blob_sha(data)} for path, data in sorted(files.items())]
+        tree_sha = hashlib.sha1(''.join(entry['sha'] for entry in tree).encode()).hexdigest()
+        return web.json_response({'sha': tree_sha, 'tree': tree, 'truncated': False})
+
+    async def contents(self, request: web.Request) -> web.Response:
+        owner, repo, path = (request.match_info['owner'], request.match_info['repo'],
+                             request.match_info['path'])
+        data = self.files(owner, repo).get(path)
+        if data is None:
+            return web.json_response({'message': 'Not Found'}, status=404)
+        ref = request.query.get('ref', 'main')
+        return web.json_response({
+            'type': 'file', 'path': path, 'size': len(data), 'sha': blob_sha(data),
+            'download_url': f"{self.base_url(request)}/raw/{owner}/{repo}/{ref}/{path}",
+        })
+
+    async def raw(self, request: web.Request) -> web.Response:
+        owner, repo, path = (request.match_info['owner'], request.match_info['repo'],
+                             request.match_info['path'])
+        data = self.files(owner, repo).get(path)
+        if data is None:
+            return web.Response(status=404, text='404: Not Found')
+        return web.Response(body=data)
+
+    async def rate_limit_status(self, request: web.Request) -> web.Response:
+        core = {'limit': self.rate_limit, 'remaining': max(0, self.rate_limit - self.used),
+                'reset': int(self.reset_at), 'used': self.used}
+        return web.json_response({'resources': {'core': core}, 'rate': core})
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get('/rate_limit', self.rate_limit_status)
+        app.router.add_get('/repos/{owner}/{repo}', self.repository)
+        app.router.add_get('/repos/{owner}/{repo}/branches/{branch}', self.branch)
+        app.router.add_get('/repos/{owner}/{repo}/commits/{ref}', self.commit)
+        app.router.add_get('/repos/{owner}/{repo}/git/trees/{ref}', self.tree)
+        app.router.add_get('/repos/{owner}/{repo}/contents/{path:.*}', self.contents)
+        app.router.add_get('/raw/{owner}/{repo}/{ref}/{path:.*}', self.raw)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock GitHub API server for local testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8766, help='Port to listen on')
+    parser.add_argument('--files', type=int, default=40, help='Source files per synthetic repository')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='API requests allowed per window')
+    parser.add_argument('--window', type=float, default=3600.0, help='Rate-limit window in seconds')
+    parser.add_argument('--latency', type=float, default=0.0, help='Added delay per request in seconds')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of raw downloads answered with 502')
+    args = parser.parse_args()
+
+    mock = MockGitHub(args.files, args.rate_limit, args.window, args.latency, args.fail_rate)
+    print(f"🧪 Mock GitHub API on http://{args.host}:{args.port}")
+    print(f"💡 export GITHUB_API_URL=http://{args.host}:{args.port}")
+    web.run_app(mock.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Rate Budget
+
+One GitHub API rate-limit budget shared by every batch worker process. The
+counters live in shared memory guarded by a single lock, so N workers with
+their own event loops and connection pools still draw from one pool of
+requests: each API call reserves a unit before it is sent, and the
+X-RateLimit-* headers on responses keep the shared view in sync with GitHub.
+When the budget runs dry, workers sleep until the window resets instead of
+collecting 403s.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+API_HOST = 'api.github.com'
+
+# How long to back off when the budget is exhausted but no reset time is known
+UNKNOWN_RESET_WAIT = 60.0
+
+
+class RateBudget:
+    """Cross-process API request budget, attached to sessions as a trace config."""
+
+    def __init__(self, api_host: Optional[str] = None, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self.api_host = api_host or API_HOST
+        self._lock = ctx.Lock()
+        # -1 means "not known yet": requests pass until GitHub reports a figure
+        self._remaining = ctx.Value('i', -1, lock=False)
+        self._reset_at = ctx.Value('d', 0.0, lock=False)
+        self._used = ctx.Value('i', 0, lock=False)
+        self._announced = 0.0
+
+    @property
+    def used(self) -> int:
+        """API requests sent by all workers so far."""
+        return self._used.value
+
+    def reserve(self) -> float:
+        """Take one request from the budget; return 0, or seconds to wait first."""
+        with self._lock:
+            now = time.time()
+            if self._reset_at.value and now >= self._reset_at.value:
+                # New window; the next response tells us the fresh allowance
+                self._remaining.value = -1
+                self._reset_at.value = 0.0
+            if self._remaining.value == 0:
+                if self._reset_at.value:
+                    return max(1.0, self._reset_at.value - now)
+                return UNKNOWN_RESET_WAIT
+            if self._remaining.value > 0:
+                self._remaining.value -= 1
+            self._used.value += 1
+            return 0.0
+
+    async def acquire(self) -> None:
+        """Wait until the shared budget allows one more API request."""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            reset_at = time.time() + wait
+            if reset_at - self._announced > 1.0:
+                # One notice per process and window, not one per waiting request
+                self._announced = reset_at
+                print(f"    ⏳ API rate limit budget exhausted, waiting {wait:.0f}s for reset")
+            await asyncio.sleep(wait)
+
+    def observe(self, headers) -> None:
+        """Sync the shared budget with a response's X-RateLimit-* headers."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset_at = float(headers.get('X-RateLimit-Reset', 0))
+        except ValueError:
+            return
+        with self._lock:
+            if reset_at > self._reset_at.value:
+                self._remaining.value = remaining
+                self._reset_at.value = reset_at
+            elif self._remaining.value < 0 or remaining < self._remaining.value:
+                # Responses race each other; the lowest figure is the safe one
+                self._remaining.value = remaining
+
+    def trace_config(self) -> 'aiohttp.TraceConfig':
+        """Hooks that meter every API request made through a ClientSession."""
+        import aiohttp
+
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            if params.url.host == self.api_host:
+                await self.acquire()
+
+        async def on_request_end(session, context, params):
+            if params.url.host == self.api_host:
+                self.observe(params.response.headers)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        return trace
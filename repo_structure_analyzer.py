@@ -11,7 +11,6 @@ import os
 from pathlib import Path
 from collections import defaultdict
 import argparse
-from github_file_hunter import GitHubFileHunter
 
 class RepoStructureAnalyzer:
     """Analyze repository structures programmatically."""
@@ -21,6 +20,8 @@ class RepoStructureAnalyzer:
         
     async def analyze_repository(self, repo_url, branch=None):
         """Get complete structure analysis of a repository."""
+        # Imported here so loading this module (or --help) stays cheap
+        from github_file_hunter import GitHubFileHunter
         
         async with GitHubFileHunter(self.github_token) as hunter:
             owner, repo, detected_branch = hunter.parse_github_url(repo_url)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Results Stream
+
+Incremental batch results export. Each job's result is appended as a JSONL
+record or CSV row the moment the job finishes and flushed straight away, so
+a crash loses nothing already reported, memory stays flat however large the
+batch is, and downstream tools can tail the file while the batch runs. A
+compact summary record closes the file.
+"""
+
+import csv
+import json
+import time
+from typing import Any, Dict
+
+# Formats written incrementally; 'json' is a single document written at the end
+STREAM_FORMATS = ('jsonl', 'csv')
+
+CSV_FIELDS = ['repository', 'success', 'downloaded', 'matches', 'error']
+CSV_SUMMARY_KEY = '# summary'
+
+
+class ResultStream:
+    """Append-only JSONL/CSV writer for per-job batch results."""
+
+    def __init__(self, path: str, format_type: str = 'jsonl'):
+        if format_type not in STREAM_FORMATS:
+            raise ValueError(f"Cannot stream results as {format_type} (use one of: {', '.join(STREAM_FORMATS)})")
+        self.path = path
+        self.format = format_type
+        self.processed = 0
+        self.failed = 0
+        self.downloaded = 0
+        self.matches = 0
+        self._started = time.monotonic()
+        self._file = open(path, 'w', newline='' if format_type == 'csv' else None, encoding='utf-8')
+        self._csv = None
+        if format_type == 'csv':
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(CSV_FIELDS)
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, repository: str, result: Dict[str, Any]) -> None:
+        """Append one job's result and flush it to disk."""
+        matches = result.get('matches', result.get('total_matches', 0))
+        if result.get('success'):
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.downloaded += result.get('downloaded', 0)
+        self.matches += matches
+
+        if self._csv is not None:
+            self._csv.writerow([repository, result.get('success', False), result.get('downloaded', 0),
+                                matches, result.get('error', '')])
+        else:
+            self._file.write(json.dumps({'repository': repository, **result}) + '\n')
+        self._file.flush()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'processed': self.processed,
+            'failed': self.failed,
+            'total': self.processed + self.failed,
+            'downloaded': self.downloaded,
+            'matches': self.matches,
+            'elapsed_seconds': round(time.monotonic() - self._started, 3),
+        }
+
+    def close(self) -> None:
+        """Write the closing summary record (once) and close the file."""
+        if self._file.closed:
+            return
+        summary = self.summary()
+        if self._csv is not None:
+            self._csv.writerow([CSV_SUMMARY_KEY, summary['failed'] == 0, summary['downloaded'],
+                                summary['matches'],
+                                f"processed={summary['processed']} failed={summary['failed']}"])
+        else:
+            self._file.write(json.dumps({'summary': summary}) + '\n')
+        self._file.close()
+
+    def abort(self) -> None:
+        """Close without a summary, so readers can tell the batch did not complete."""
+        if not self._file.closed:
+            self._file.close()
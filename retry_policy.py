@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Retry Policy
+
+Retry, backoff and hedging helpers shared by the single-repo hunter and the
+batch hunter. Transient failures (connection resets, 5xx, secondary rate
+limits) are retried with exponential backoff and full jitter inside
+per-attempt and overall deadlines. Optional hedged requests fire a duplicate
+request once an attempt runs past the observed p95 latency and keep whichever
+finishes first.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from integrity import BlobHasher, IntegrityError
+
+if TYPE_CHECKING:
+    # Imported lazily at request time, so CLIs that never touch the network start fast
+    import aiohttp
+
+# HTTP statuses worth retrying; everything else is treated as final
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """Raised when a request fails permanently or runs out of retries."""
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently to retry a single request."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    attempt_timeout: float = 30.0
+    total_timeout: float = 120.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) retry."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies."""
+
+    def __init__(self, window: int = 256):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Return the q-quantile of recent latencies, or None if too few samples."""
+        if len(self.samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Parse a numeric Retry-After header, if present."""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+# Read size for streamed bodies
+CHUNK_SIZE = 64 * 1024
+
+
+async def _attempt(session: 'aiohttp.ClientSession', url: str, headers: Optional[Dict[str, str]],
+                   timeout: float, expected: Optional[Tuple[str, int]] = None) -> Tuple[bytes, float]:
+    """
+    Run one request attempt and return (body, elapsed seconds).
+
+    With expected=(blob sha, size) the body is hashed as it streams in and
+    IntegrityError is raised if it does not match.
+    """
+    import aiohttp
+
+    started = time.monotonic()
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with session.get(url, headers=headers, timeout=client_timeout) as response:
+        if response.status == 200:
+            if expected is None:
+                body = await response.read()
+                return body, time.monotonic() - started
+
+            expected_sha, expected_size = expected
+            hasher = BlobHasher(expected_size)
+            chunks = []
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                hasher.update(chunk)
+                chunks.append(chunk)
+            hasher.verify(expected_sha)
+            return b''.join(chunks), time.monotonic() - started
+
+        raise FetchError(f"HTTP {response.status}", response.status,
+                         _retry_after(response.headers))
+
+
+async def _hedged_attempt(session: 'aiohttp.ClientSession', url: str, headers: Optional[Dict[str, str]],
+                          timeout: float, hedge_after: float,
+                          expected: Optional[Tuple[str, int]] = None) -> Tuple[bytes, float]:
+    """Run an attempt and, if it outlives hedge_after, race a duplicate against it."""
+    primary = asyncio.ensure_future(_attempt(session, url, headers, timeout, expected))
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    backup = asyncio.ensure_future(
+        _attempt(session, url, headers, max(0.001, timeout - hedge_after), expected)
+    )
+    pending = {primary, backup}
+    last_error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def fetch_with_retry(session: 'aiohttp.ClientSession', url: str, policy: RetryPolicy,
+                           tracker: Optional[LatencyTracker] = None,
+                           headers: Optional[Dict[str, str]] = None,
+                           hedge: Optional[bool] = None,
+                           expected_sha: Optional[str] = None,
+                           expected_size: Optional[int] = None) -> bytes:
+    """
+    GET a URL and return its body, retrying transient failures.
+
+    When expected_sha and expected_size are given, the body is verified
+    against that git blob SHA while it streams in; a mismatch fails the
+    attempt and is retried like any other broken transfer.
+
+    Raises FetchError for non-retryable statuses (e.g. 404) and when the
+    attempts or the overall deadline are exhausted.
+    """
+    import aiohttp
+
+    hedge = policy.hedge if hedge is None else hedge
+    expected = (expected_sha, expected_size) if expected_sha and expected_size is not None else None
+    deadline = time.monotonic() + policy.total_timeout
+    last_error = None
+
+    for attempt in range(policy.max_attempts):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        timeout = min(policy.attempt_timeout, remaining)
+
+        hedge_after = None
+        if hedge and tracker is not None:
+            hedge_after = tracker.quantile(policy.hedge_quantile, policy.hedge_min_samples)
+
+        try:
+            if hedge_after is not None and hedge_after < timeout:
+                body, elapsed = await _hedged_attempt(session, url, headers, timeout, hedge_after, expected)
+            else:
+                body, elapsed = await _attempt(session, url, headers, timeout, expected)
+            if tracker is not None:
+                tracker.record(elapsed)
+            return body
+        except FetchError as e:
+            if e.status not in RETRYABLE_STATUSES:
+                raise
+            last_error = e
+            delay = max(policy.backoff(attempt), e.retry_after or 0)
+        except (aiohttp.ClientError, asyncio.TimeoutError, IntegrityError) as e:
+            last_error = e
+            delay = policy.backoff(attempt)
+
+        if attempt + 1 < policy.max_attempts:
+            delay = min(delay, deadline - time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    if isinstance(last_error, FetchError):
+        raise FetchError(f"{last_error} after {policy.max_attempts} attempts", last_error.status)
+    if isinstance(last_error, IntegrityError):
+        raise FetchError(f"integrity check failed ({last_error})")
+    reason = type(last_error).__name__ if last_error else "deadline exceeded"
+    raise FetchError(f"{reason} after retries")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Search Criteria
+
+The plain data types shared by the hunters and the profile catalogue. Kept
+free of network and asyncio imports, so commands that only describe
+profiles or parse arguments start instantly.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class SearchCriteria:
+    """Criteria for searching files in repositories."""
+    name_patterns: List[str] = field(default_factory=list)
+    extensions: List[str] = field(default_factory=list)
+    path_patterns: List[str] = field(default_factory=list)
+    exclude_patterns: List[str] = field(default_factory=list)
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    regex_pattern: Optional[str] = None
+    specific_files: List[str] = field(default_factory=list)  # New: for individual file downloads
+
+@dataclass
+class FileMatch:
+    """Represents a matched file."""
+    path: str
+    size: int
+    download_url: str
+    sha: str
+    repo_owner: str
+    repo_name: str
+    branch: str
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Request Coalescing
+
+SingleFlight makes concurrent identical lookups share one in-flight request:
+the first caller for a key starts the work, later callers for the same key
+wait on it and get the same result or the same exception. Nothing is cached
+once the work finishes; the next call starts a fresh request.
+
+One caller being cancelled does not cancel the shared request while others
+still wait on it; it is cancelled only when every waiter has gone.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+def token_scope(token: Optional[str]) -> str:
+    """Key component separating requests made with different credentials."""
+    return hashlib.sha256((token or '').encode()).hexdigest()[:16]
+
+
+class _Flight:
+    """One in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: 'asyncio.Future'):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return fn()'s result, sharing an identical call already in flight for key."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # Shielded, so one waiter's cancellation leaves the others' request running
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers must start afresh rather than join a cancelled request
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _finished(self, key: Hashable, flight: _Flight) -> None:
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # Retrieved by the waiters; don't warn if they all left
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'started': self.started, 'coalesced': self.coalesced, 'in_flight': self.in_flight()}
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for admission: per-client quotas and the fair scheduler's caps,
+class weights and round robin between clients.
+"""
+
+import asyncio
+
+import pytest
+
+from admission import BULK, INTERACTIVE, Admission, FairScheduler, OverQuota, client_key
+
+
+def test_quota_is_per_client_and_class():
+    admission = Admission(limits={INTERACTIVE: 2, BULK: 1})
+    leases = [admission.admit('alice', INTERACTIVE) for _ in range(2)]
+    with pytest.raises(OverQuota) as error:
+        admission.admit('alice', INTERACTIVE)
+    assert error.value.retry_after == 1
+    admission.admit('alice', BULK)
+    admission.admit('bob', INTERACTIVE)
+    assert admission.rejected == {INTERACTIVE: 1, BULK: 0}
+
+    leases[0].release()
+    leases[0].release()  # releasing twice frees one place only
+    admission.admit('alice', INTERACTIVE)
+    with pytest.raises(OverQuota):
+        admission.admit('alice', INTERACTIVE)
+
+
+def test_interactive_block_releases_its_lease():
+    admission = Admission(limits={INTERACTIVE: 1, BULK: 1})
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with admission.interactive('alice'):
+                assert admission.scheduler.in_use == 1
+                raise RuntimeError('handler failed')
+        async with admission.interactive('alice'):
+            pass
+
+    asyncio.run(run())
+    assert admission.stats()['clients'] == 0
+    assert admission.scheduler.in_use == 0
+
+
+def test_bulk_never_holds_every_slot():
+    scheduler = FairScheduler(slots=2, class_slots={BULK: 1})
+
+    async def run():
+        await scheduler.acquire(BULK, 'alice')
+        waiting_bulk = asyncio.ensure_future(scheduler.acquire(BULK, 'bob'))
+        await asyncio.sleep(0)
+        # The queued bulk request cannot take the free slot, so it doesn't hold up interactive work
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE, 'carol'), 1)
+        assert not waiting_bulk.done()
+        scheduler.release(BULK)
+        await asyncio.wait_for(waiting_bulk, 1)
+
+    asyncio.run(run())
+    assert scheduler.stats()[BULK]['granted'] == 2
+
+
+def test_waiting_clients_take_turns_by_class_weight():
+    scheduler = FairScheduler(slots=1, class_slots={}, weights={INTERACTIVE: 2, BULK: 1})
+    order = []
+
+    async def work(work_class, client):
+        async with scheduler.slot(work_class, client):
+            order.append((work_class, client))
+
+    async def run():
+        await scheduler.acquire(INTERACTIVE, 'holder')
+        tasks = [asyncio.ensure_future(work(BULK, 'alice')) for _ in range(3)]
+        tasks += [asyncio.ensure_future(work(INTERACTIVE, 'bob')) for _ in range(3)]
+        tasks += [asyncio.ensure_future(work(INTERACTIVE, 'carol')) for _ in range(2)]
+        await asyncio.sleep(0)
+        scheduler.release(INTERACTIVE)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    classes = ''.join('i' if work_class == INTERACTIVE else 'b' for work_class, _ in order)
+    # Two interactive grants per bulk one while both classes wait (the holder's came first)
+    assert classes[:6].count('b') == 2 and classes.count('b') == 3
+    interactive = [client for work_class, client in order if work_class == INTERACTIVE]
+    assert interactive[:4] == ['bob', 'carol', 'bob', 'carol']
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    scheduler = FairScheduler(slots=1)
+
+    async def run():
+        await scheduler.acquire(INTERACTIVE, 'alice')
+        cancelled = asyncio.ensure_future(scheduler.acquire(INTERACTIVE, 'bob'))
+        waiting = asyncio.ensure_future(scheduler.acquire(INTERACTIVE, 'carol'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        scheduler.release(INTERACTIVE)
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(run())
+    assert scheduler.in_use == 1
+    assert scheduler.stats()[INTERACTIVE]['waiting'] == 0
+
+
+def test_clients_are_keyed_by_address():
+    assert client_key('10.0.0.1') == client_key('10.0.0.1') != client_key('10.0.0.2')
+    assert client_key(None) == 'address:unknown'
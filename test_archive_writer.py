@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for archive_writer: plan ordering regardless of arrival order,
+skipped and missing members, sections, and byte-for-byte determinism.
+"""
+
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from archive_writer import ArchiveWriter, archive_format
+
+
+def tar_names(path):
+    with tarfile.open(path) as tar:
+        return [member.name for member in tar.getmembers()]
+
+
+def test_archive_format():
+    assert archive_format('out/files.tar.gz') == '.tar.gz'
+    assert archive_format('files.ZIP') == '.zip'
+    with pytest.raises(ValueError):
+        archive_format('files.rar')
+
+
+def test_members_follow_the_plan_not_arrival_order(tmp_path):
+    path = str(tmp_path / 'files.tar')
+
+    async def run():
+        async with ArchiveWriter(path) as archive:
+            archive.expect(['a.py', 'b.py', 'c.py'])
+            await archive.write('c.py', b'c')
+            await archive.write('a.py', b'a')
+            await archive.flush()
+            # b.py holds c.py back, so only a.py is out
+            assert archive.member_count == 1
+            await archive.write('b.py', b'b')
+
+    asyncio.run(run())
+    assert tar_names(path) == ['a.py', 'b.py', 'c.py']
+
+
+def test_skip_releases_later_members(tmp_path):
+    path = str(tmp_path / 'files.tar')
+
+    async def run():
+        async with ArchiveWriter(path) as archive:
+            archive.expect(['a.py', 'b.py', 'c.py'])
+            await archive.write('c.py', b'c')
+            archive.skip('a.py')
+            archive.skip('b.py')
+            await archive.flush()
+            assert archive.member_count == 1
+
+    asyncio.run(run())
+    assert tar_names(path) == ['c.py']
+
+
+def test_close_drops_members_that_never_arrived(tmp_path):
+    path = str(tmp_path / 'files.zip')
+
+    async def run():
+        archive = ArchiveWriter(path)
+        archive.expect(['a.py', 'b.py', 'c.py'])
+        await archive.write('a.py', b'a')
+        await archive.write('c.py', b'c')
+        await archive.close()
+        await archive.close()  # a second close is a no-op
+        return archive
+
+    archive = asyncio.run(run())
+    assert archive.member_count == 2
+    with zipfile.ZipFile(path) as zf:
+        assert zf.namelist() == ['a.py', 'c.py']
+    with open(f"{path}.manifest.json") as f:
+        assert sorted(json.load(f)['files']) == ['a.py', 'c.py']
+
+
+def test_unplanned_members_are_written_as_they_arrive(tmp_path):
+    path = str(tmp_path / 'files.tar')
+
+    async def run():
+        async with ArchiveWriter(path, save_manifest=False) as archive:
+            await archive.write('z.py', b'z')
+            await archive.write('a.py', b'a')
+            await archive.write('z.py', b'second copy is ignored')
+
+    asyncio.run(run())
+    assert tar_names(path) == ['z.py', 'a.py']
+    assert not (tmp_path / 'files.tar.manifest.json').exists()
+
+
+def test_sections_are_ordered_by_number(tmp_path):
+    path = str(tmp_path / 'files.tar')
+
+    async def run():
+        async with ArchiveWriter(path, save_manifest=False) as archive:
+            first = archive.view('job-1')
+            second = archive.view('job-2')
+            archive.expect([second.member_name('x.py')], section=1)
+            await second.write('x.py', b'x')
+            await archive.flush()
+            assert archive.member_count == 0
+            archive.expect([first.member_name('y.py')], section=0)
+            await first.write('y.py', b'y')
+
+    asyncio.run(run())
+    assert tar_names(path) == ['job-1/y.py', 'job-2/x.py']
+
+
+@pytest.mark.parametrize('suffix', ['.zip', '.tar', '.tar.gz', '.tar.zst'])
+def test_archives_are_deterministic(tmp_path, suffix):
+    names = [f"src/file_{i}.py" for i in range(6)]
+
+    async def build(path, arrival):
+        async with ArchiveWriter(path, save_manifest=False) as archive:
+            archive.expect(names)
+            for name in arrival:
+                await archive.write(name, name.encode() * 100)
+
+    first = tmp_path / f"first{suffix}"
+    second = tmp_path / f"second{suffix}"
+    asyncio.run(build(str(first), names))
+    asyncio.run(build(str(second), list(reversed(names))))
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_backpressure_waits_for_the_writer():
+    fileobj = io.BytesIO()
+
+    async def run():
+        archive = ArchiveWriter('files.tar', fileobj=fileobj, save_manifest=False, max_buffer=10)
+        for i in range(5):
+            await archive.write(f"{i}.bin", b'x' * 100)
+            # Each write over the limit returns only once it has been written
+            assert archive._buffered == 0
+        await archive.close()
+        return archive
+
+    archive = asyncio.run(run())
+    assert archive.member_count == 5
+    assert fileobj.closed is False
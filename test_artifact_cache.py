@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for artifact_cache: content keys, LRU eviction by size, TTL expiry,
+sweeping abandoned partial builds, and reloading a cache directory.
+"""
+
+import os
+import time
+
+import pytest
+
+import artifact_cache
+from artifact_cache import ArtifactCache, artifact_key
+from search_criteria import FileMatch
+
+
+class Clock:
+    """Stands in for the time module so TTLs can be stepped through."""
+
+    def __init__(self):
+        # Starts at the real time, since archives and partials carry real mtimes
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(artifact_cache, 'time', clock)
+    return clock
+
+
+def match(path, sha, owner='Owner', branch='main'):
+    return FileMatch(path, 1, f"https://example.invalid/{path}", sha, owner, 'repo', branch)
+
+
+def build(cache, key, size):
+    partial = cache.partial(key)
+    with open(partial, 'wb') as f:
+        f.write(b'x' * size)
+    return partial
+
+
+def test_key_depends_on_content_only():
+    first = [match('a.py', '1'), match('b.py', '2')]
+    assert artifact_key(first) == artifact_key(reversed(first))
+    # Same blobs from another branch, or with the owner cased differently
+    assert artifact_key(first) == artifact_key([match('a.py', '1', 'owner', 'dev'), match('b.py', '2')])
+    assert artifact_key(first) != artifact_key([match('a.py', '1'), match('b.py', '3')])
+
+
+def test_put_then_get(tmp_path, clock):
+    cache = ArtifactCache(str(tmp_path), max_bytes=100)
+    assert cache.get('k') is None
+    path = cache.put('k', build(cache, 'k', 10))
+    assert cache.get('k') == path and os.path.getsize(path) == 10
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.partial')] == []
+    assert cache.stats() == {'archives': 1, 'bytes': 10, 'hits': 1, 'misses': 1, 'evicted': 0}
+
+
+def test_least_recently_used_archive_is_evicted(tmp_path, clock):
+    cache = ArtifactCache(str(tmp_path), max_bytes=25)
+    first = cache.put('first', build(cache, 'first', 10))
+    cache.put('second', build(cache, 'second', 10))
+    cache.get('first')
+    cache.put('third', build(cache, 'third', 10))
+    assert cache.get('second') is None
+    assert cache.get('first') == first
+    assert cache.size == 20 and cache.evicted == 1
+    assert sorted(os.listdir(tmp_path)) == ['first.zip', 'third.zip']
+
+
+def test_oversized_build_stays_with_the_caller(tmp_path, clock):
+    cache = ArtifactCache(str(tmp_path), max_bytes=5)
+    partial = build(cache, 'k', 10)
+    assert cache.put('k', partial) is None
+    assert os.path.exists(partial)
+    cache.discard(partial)
+    assert not os.path.exists(partial)
+
+
+def test_archives_expire_after_ttl(tmp_path, clock):
+    cache = ArtifactCache(str(tmp_path), ttl=60)
+    path = cache.put('k', build(cache, 'k', 10))
+    clock.now += 61
+    assert cache.get('k') is None
+    assert not os.path.exists(path)
+    assert cache.size == 0
+
+
+def test_sweep_reclaims_expired_archives_and_stale_partials(tmp_path, clock):
+    cache = ArtifactCache(str(tmp_path), ttl=60)
+    cache.put('old', build(cache, 'old', 10))
+    stale = build(cache, 'stale', 5)
+    os.utime(stale, (clock.now - 120, clock.now - 120))
+    in_progress = build(cache, 'busy', 7)
+    os.utime(in_progress, (clock.now, clock.now))
+    clock.now += 61
+    os.utime(in_progress, (clock.now, clock.now))
+
+    assert cache.sweep() == 15
+    assert os.listdir(tmp_path) == [os.path.basename(in_progress)]
+
+
+def test_archives_left_by_an_earlier_run_are_reused(tmp_path, clock):
+    first = ArtifactCache(str(tmp_path))
+    first.put('k', build(first, 'k', 10))
+    second = ArtifactCache(str(tmp_path))
+    assert second.get('k') == first.path('k')
+    assert second.size == 10
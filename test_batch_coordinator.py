@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for batch_coordinator: remote workers draining a queued batch over
+HTTP, the shared secret, and results refused because of a lost lease.
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from batch_coordinator import SECRET_HEADER, Coordinator, is_loopback
+from batch_hunter import BatchHunter, BatchJob
+from batch_queue import DONE, BatchQueue
+
+BATCH = 'jobs.jsonl'
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = BatchQueue(str(tmp_path / 'queue.db'), lease_seconds=60)
+    queue.enqueue(BATCH, [BatchJob(repo_url=f"https://github.com/owner/repo{i}") for i in range(3)])
+    yield queue
+    queue.close()
+
+
+async def serve(coordinator):
+    runner = web.AppRunner(coordinator.app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def test_is_loopback():
+    assert is_loopback('127.0.0.1') and is_loopback('::1') and is_loopback('localhost')
+    assert not is_loopback('0.0.0.0') and not is_loopback('example.com')
+
+
+def test_secret_is_required(queue):
+    coordinator = Coordinator(queue, BATCH, secret='s3cret')
+
+    async def run():
+        runner, url = await serve(coordinator)
+        try:
+            async with aiohttp.ClientSession() as http:
+                async with http.get(f"{url}/status") as response:
+                    denied = response.status
+                async with http.get(f"{url}/status", headers={SECRET_HEADER: 's3cret'}) as response:
+                    allowed = response.status
+            return denied, allowed
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == (401, 200)
+
+
+def test_worker_counts_only_accepted_results(queue, mock_github):
+    coordinator = Coordinator(queue, BATCH)
+    finish = queue.finish
+    refused = []
+
+    def finish_elsewhere(job_id, result, worker=None, batch=None):
+        # The first result arrives after another worker already finished the job
+        if not refused:
+            refused.append(job_id)
+            finish(job_id, result, worker, batch)
+            return 0
+        return finish(job_id, result, worker, batch)
+
+    queue.finish = finish_elsewhere
+
+    async def run():
+        runner, url = await serve(coordinator)
+        try:
+            async with BatchHunter(token='test-token') as hunter:
+                return await asyncio.wait_for(hunter.process_remote(url), 30)
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == 2
+    assert queue.counts(BATCH)[DONE] == 3
+    assert coordinator.finished.is_set()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for batch_hunter's streaming JSON array reader, including elements
+split across read chunks and malformed separators.
+"""
+
+import json
+
+import pytest
+
+import batch_hunter
+from batch_hunter import BatchHunter
+
+RECORDS = [
+    {'repo_url': 'https://github.com/owner/alpha', 'branch': 'main'},
+    {'repo_url': 'https://github.com/owner/beta', 'profile': None},
+    {'repo_url': 'https://github.com/owner/gamma'},
+]
+
+
+@pytest.fixture
+def hunter():
+    return BatchHunter(token='test-token')
+
+
+def read(hunter, tmp_path, text):
+    path = tmp_path / 'jobs.json'
+    path.write_text(text, encoding='utf-8')
+    return [job.repo_url.rsplit('/', 1)[-1] for job in hunter.iter_batch_jobs(str(path))]
+
+
+@pytest.mark.parametrize('read_size', [1, 3, 7, 64 * 1024])
+def test_elements_split_across_chunks(hunter, tmp_path, monkeypatch, read_size):
+    monkeypatch.setattr(batch_hunter, 'JSON_READ_SIZE', read_size)
+    text = json.dumps(RECORDS, indent=2)
+    assert read(hunter, tmp_path, text) == ['alpha', 'beta', 'gamma']
+
+
+def test_empty_array(hunter, tmp_path):
+    assert read(hunter, tmp_path, ' [ ] ') == []
+
+
+def test_invalid_item_is_skipped_and_counted(hunter, tmp_path):
+    text = json.dumps([RECORDS[0], {'branch': 'main'}, RECORDS[2]])
+    assert read(hunter, tmp_path, text) == ['alpha', 'gamma']
+    assert hunter.load_errors == 1
+
+
+@pytest.mark.parametrize('text, message', [
+    ('{"repo_url": "x"}', 'expected a JSON array'),
+    ('[{"repo_url": "https://github.com/o/r"}', 'unexpected end'),
+    ('[{"repo_url": "https://github.com/o/r"} {"repo_url": "https://github.com/o/s"}]',
+     "expected ',' or ']'"),
+    ('[{"repo_url": "https://github.com/o/r"},, {"repo_url": "https://github.com/o/s"}]',
+     "found ','"),
+    ('[{"repo_url": "https://github.com/o/r"},]', "found ']'"),
+    ('[, {"repo_url": "https://github.com/o/r"}]', "found ','"),
+    ('[{"repo_url": tru}]', 'invalid JSON in item 1'),
+])
+def test_malformed_arrays_are_rejected(hunter, tmp_path, monkeypatch, text, message):
+    monkeypatch.setattr(batch_hunter, 'JSON_READ_SIZE', 5)
+    with pytest.raises(ValueError, match=message):
+        read(hunter, tmp_path, text)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for batch_queue: enqueue/resume, leases, lease recovery, the lease
+check that keeps stale results from being recorded, and draining a queue.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from batch_hunter import BatchHunter, BatchJob
+from batch_queue import DONE, FAILED, PENDING, RUNNING, BatchQueue, QueueFeeder
+
+BATCH = 'jobs.jsonl'
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = BatchQueue(str(tmp_path / 'queue.db'), lease_seconds=60)
+    yield queue
+    queue.close()
+
+
+def jobs(count):
+    return [BatchJob(repo_url=f"https://github.com/owner/repo{i}") for i in range(count)]
+
+
+def test_enqueue_is_idempotent_unless_replaced(queue):
+    assert queue.enqueue(BATCH, jobs(3)) == 3
+    assert queue.enqueue(BATCH, jobs(4)) == 1
+    assert queue.enqueue(BATCH, jobs(2), replace=True) == 2
+    assert queue.counts(BATCH) == {PENDING: 2, RUNNING: 0, DONE: 0, FAILED: 0}
+
+
+def test_claims_are_leased_in_order_and_not_handed_out_twice(queue):
+    queue.enqueue(BATCH, jobs(5))
+    first = queue.claim(BATCH, 2)
+    second = queue.claim(BATCH, 10, worker='remote:1')
+    assert [job['repo_url'][-1] for _, job in first] == ['0', '1']
+    assert [job['repo_url'][-1] for _, job in second] == ['2', '3', '4']
+    assert queue.claim(BATCH, 10) == []
+    assert queue.counts(BATCH)[RUNNING] == 5
+
+
+def test_expired_lease_is_claimed_again(queue):
+    queue.enqueue(BATCH, jobs(1))
+    queue.lease_seconds = -1
+    [(job_id, _)] = queue.claim(BATCH, 1, worker='remote:1')
+    queue.lease_seconds = 60
+    assert [claimed_id for claimed_id, _ in queue.claim(BATCH, 1)] == [job_id]
+
+
+def test_finish_requires_the_current_lease(queue):
+    queue.enqueue(BATCH, jobs(1))
+    [(job_id, _)] = queue.claim(BATCH, 1, worker='remote:1')
+    assert queue.finish(job_id, {'success': True}, worker='remote:2') == 0
+    assert queue.finish(job_id, {'success': True}, worker='remote:1', batch='other') == 0
+    assert queue.finish(job_id, {'success': True, 'downloaded': 3, 'bytes': 30},
+                        worker='remote:1', batch=BATCH) == 1
+    # Already finished: a repeated result is stale
+    assert queue.finish(job_id, {'success': True}, worker='remote:1') == 0
+    assert queue.counts(BATCH)[DONE] == 1
+    assert queue.totals(BATCH) == {'files': 3, 'bytes': 30}
+
+
+def test_partial_download_counts_as_failed_and_can_be_retried(queue):
+    queue.enqueue(BATCH, jobs(2))
+    (first, _), (second, _) = queue.claim(BATCH, 2)
+    queue.finish(first, {'success': True, 'total_matches': 4, 'downloaded': 2})
+    queue.finish(second, {'success': False, 'error': 'boom'})
+    assert queue.counts(BATCH)[FAILED] == 2
+    assert queue.retry_failed(BATCH) == 2
+    assert queue.counts(BATCH)[PENDING] == 2
+    assert [result for _, result in queue.results(BATCH)] == [None, None]
+
+
+def test_recover_requeues_dead_and_expired_workers(queue):
+    queue.enqueue(BATCH, jobs(3))
+    queue.claim(BATCH, 1)                            # this live process
+    queue.claim(BATCH, 1, worker='no-such-worker')   # not host:pid, treated as dead
+    [(expired, _)] = queue.claim(BATCH, 1, worker='remote:1')
+    queue.conn.execute('UPDATE jobs SET lease_until = ? WHERE id = ?', (time.time() - 1, expired))
+    assert queue.recover(BATCH) == 2
+    assert queue.counts(BATCH) == {PENDING: 2, RUNNING: 1, DONE: 0, FAILED: 0}
+
+
+def test_heartbeat_and_update_only_touch_the_workers_jobs(queue):
+    queue.enqueue(BATCH, jobs(2))
+    [(mine, _)] = queue.claim(BATCH, 1)
+    [(theirs, _)] = queue.claim(BATCH, 1, worker='remote:1')
+    assert queue.heartbeat() == 1
+    queue.update(mine, downloaded=5, bytes=50)
+    queue.update(theirs, downloaded=7)
+    assert queue.totals(BATCH) == {'files': 5, 'bytes': 50}
+
+
+def test_feeder_keeps_about_a_chunk_pending(queue):
+    read = []
+
+    def source():
+        for job in jobs(10):
+            read.append(job)
+            yield job
+
+    feeder = QueueFeeder(queue, BATCH, source(), chunk=4)
+    assert queue.loading(BATCH) and read == []
+    assert feeder.top_up()
+    assert queue.pending(BATCH) == 4 and len(read) == 4
+    assert feeder.top_up() and len(read) == 4  # still a chunk pending
+    queue.claim(BATCH, 3)
+    assert feeder.top_up()
+    assert queue.pending(BATCH) == 5 and len(read) == 8
+    queue.claim(BATCH, 5)
+    assert not feeder.top_up()
+    assert not queue.loading(BATCH)
+    # Positions continue across chunks, in input order
+    assert [job['repo_url'][-1] for _, job in queue.claim(BATCH, 10)] == ['8', '9']
+
+
+def test_feeder_resumes_without_duplicates(queue):
+    queue.enqueue(BATCH, jobs(6))
+    queue.claim(BATCH, 6)
+    feeder = QueueFeeder(queue, BATCH, jobs(9), chunk=4)
+    while feeder.top_up():
+        pass
+    assert feeder.inserted == 3
+    assert queue.counts(BATCH)[PENDING] == 3
+
+
+def test_feeder_stops_at_malformed_input(queue):
+    def source():
+        yield from jobs(3)
+        raise ValueError('jobs.json: invalid JSON in item 4')
+
+    feeder = QueueFeeder(queue, BATCH, source(), replace=True, chunk=10)
+    assert not feeder.top_up()
+    assert queue.pending(BATCH) == 3
+    assert not queue.loading(BATCH)
+
+
+def test_process_queue_waits_while_the_batch_is_loading(queue, mock_github):
+    queue.enqueue(BATCH, jobs(2))
+    queue.set_loading(BATCH, True)
+
+    async def run():
+        async with BatchHunter(token='test-token') as hunter:
+            worker = asyncio.ensure_future(hunter.process_queue(queue, BATCH))
+            await asyncio.sleep(0.5)
+            assert not worker.done()
+            # Another process loads the rest of the batch, then finishes loading
+            queue.enqueue(BATCH, jobs(3)[2:], start=2)
+            queue.set_loading(BATCH, False)
+            return await asyncio.wait_for(worker, 10)
+
+    assert asyncio.run(run()) == 3
+    assert queue.counts(BATCH)[DONE] == 3
+
+
+def test_process_queue_tops_up_claims_as_jobs_finish(queue, mock_github):
+    queue.enqueue(BATCH, jobs(7))
+    claims = []
+    claim = queue.claim
+
+    def record_claim(batch, limit, worker=None):
+        claimed = claim(batch, limit, worker)
+        claims.append((limit, len(claimed), queue.counts(BATCH)[RUNNING]))
+        return claimed
+
+    queue.claim = record_claim
+
+    async def run():
+        async with BatchHunter(token='test-token', max_concurrent=1) as hunter:
+            return await hunter.process_queue(queue, BATCH, claim_size=2)
+
+    assert asyncio.run(run()) == 7
+    assert queue.counts(BATCH)[DONE] == 7
+    # Never more than claim_size leased, and claims follow finished jobs one or two at a time
+    assert all(running <= 2 for _, _, running in claims)
+    assert claims[0] == (2, 2, 2)
+    assert len([1 for _, got, _ in claims if got]) >= 4
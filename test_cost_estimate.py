@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for cost_estimate: request counting across tasks, and --estimate
+projections checked against what the mock GitHub server actually served.
+"""
+
+import asyncio
+
+from batch_hunter import BatchHunter, BatchJob
+from cost_estimate import count_request, counting_requests, estimate_seconds, format_bytes
+
+
+def test_requests_outside_a_block_are_not_counted():
+    count_request()
+    with counting_requests() as issued:
+        count_request()
+        count_request()
+    count_request()
+    assert issued == [2]
+
+
+def test_nested_blocks_count_separately():
+    with counting_requests() as outer:
+        count_request()
+        with counting_requests() as inner:
+            count_request()
+        count_request()
+    assert (outer, inner) == ([2], [1])
+
+
+def test_tasks_started_in_a_block_are_counted():
+    async def request():
+        await asyncio.sleep(0)
+        count_request()
+
+    async def run():
+        with counting_requests() as issued:
+            await asyncio.gather(request(), request())
+            # Still counted after the block ends: the task copied the context
+            late = asyncio.ensure_future(request())
+        await late
+        await request()
+        return issued
+
+    assert asyncio.run(run()) == [3]
+
+
+def test_estimate_seconds_and_format_bytes():
+    assert estimate_seconds(10, 10, 0, 0.5, 4) == 2.5
+    assert estimate_seconds(0, 0, 5 * 1024 * 1024, None, 1) == 1.0
+    assert format_bytes(512) == '512 B'
+    assert format_bytes(1536) == '1.5 KB'
+
+
+def test_estimate_counts_the_calls_the_server_saw(mock_github):
+    jobs = [BatchJob(repo_url='https://github.com/owner/alpha'),
+            BatchJob(repo_url='https://github.com/owner/alpha', output_dir='./resulting_downloads/copy'),
+            BatchJob(repo_url='https://github.com/owner/beta', branch='main')]
+
+    async def run():
+        async with BatchHunter(token='test-token') as hunter:
+            limit = asyncio.Semaphore(2)
+            return await asyncio.gather(*(hunter.estimate_group(group, limit)
+                                          for group in hunter.group_jobs(jobs)))
+
+    outcomes = asyncio.run(run())
+    spent = sum(calls for _, calls, _ in outcomes)
+    assert 0 < spent == mock_github.used
+    estimates = {}
+    for group_estimates, _, _ in outcomes:
+        estimates.update(group_estimates)
+    # The shared lookups are charged to the first job of each repository only
+    assert estimates[0].api_calls - estimates[0].downloads == outcomes[0][1]
+    assert estimates[1].api_calls == estimates[1].downloads == estimates[1].matches
+    assert all(estimate.error is None for estimate in estimates.values())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for integrity: incremental git blob hashing and the download manifest.
+"""
+
+import json
+
+import pytest
+
+from integrity import BlobHasher, IntegrityError, Manifest
+from mock_github_server import blob_sha
+
+CONTENT = b'def hunt():\n    return "found"\n'
+
+
+def test_chunked_hash_matches_git_blob_sha():
+    hasher = BlobHasher(len(CONTENT))
+    for start in range(0, len(CONTENT), 7):
+        hasher.update(CONTENT[start:start + 7])
+    assert hasher.verify(blob_sha(CONTENT)) == blob_sha(CONTENT)
+
+
+def test_empty_blob():
+    # git hash-object /dev/null
+    assert BlobHasher(0).verify('e69de29bb2d1d6434b8b29ae775ad8c2e48c5391')
+
+
+def test_short_body_is_a_size_mismatch():
+    hasher = BlobHasher(len(CONTENT))
+    hasher.update(CONTENT[:-1])
+    with pytest.raises(IntegrityError, match='size mismatch'):
+        hasher.verify(blob_sha(CONTENT))
+
+
+def test_altered_body_is_a_sha_mismatch():
+    hasher = BlobHasher(len(CONTENT))
+    hasher.update(CONTENT.upper())
+    with pytest.raises(IntegrityError, match='sha mismatch'):
+        hasher.verify(blob_sha(CONTENT))
+
+
+def test_manifest_merges_with_an_earlier_run(tmp_path):
+    path = str(tmp_path / 'out' / '.hunter-manifest.json')
+    first = Manifest(path)
+    first.record('a.py', 3, 'aaa')
+    first.record('b.py', 4, None)
+    first.save()
+
+    second = Manifest(path)
+    second.record('c.py', 5, 'ccc')
+    second.record('b.py', 4, 'bbb')
+    second.discard('c.py')
+    second.save()
+
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved['algorithm'] == 'git-blob-sha1'
+    assert list(saved['files']) == ['a.py', 'b.py']
+    assert saved['files']['b.py'] == {'size': 4, 'sha': 'bbb', 'verified': True}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for retry_policy: backoff bounds, latency quantiles, and
+fetch_with_retry's handling of transient failures and Retry-After.
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from retry_policy import FetchError, LatencyTracker, RetryPolicy, fetch_with_retry
+
+
+def test_backoff_stays_within_exponential_ceiling():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt, ceiling in enumerate([0.5, 1.0, 2.0, 4.0, 4.0]):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+
+
+def test_latency_quantile_needs_enough_samples():
+    tracker = LatencyTracker(window=10)
+    assert tracker.quantile(0.5) is None
+    for seconds in range(1, 21):
+        tracker.record(float(seconds))
+    # Only the last 10 samples (11..20) are kept
+    assert tracker.quantile(0.0) == 11.0
+    assert tracker.quantile(0.95) == 20.0
+    assert tracker.quantile(0.5, min_samples=11) is None
+
+
+def scripted_server(statuses, headers=None):
+    """An app answering successive requests with statuses, then 200 'ok'."""
+    remaining = list(statuses)
+    calls = []
+
+    async def handler(request):
+        calls.append(time.monotonic())
+        if remaining:
+            return web.Response(status=remaining.pop(0), headers=headers or {})
+        return web.Response(body=b'ok')
+
+    app = web.Application()
+    app.router.add_get('/file', handler)
+    return app, calls
+
+
+async def fetch(app, policy, **kwargs):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await fetch_with_retry(session, f"http://127.0.0.1:{port}/file", policy, **kwargs)
+    finally:
+        await runner.cleanup()
+
+
+def test_transient_statuses_are_retried():
+    app, calls = scripted_server([503, 502])
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+    assert asyncio.run(fetch(app, policy)) == b'ok'
+    assert len(calls) == 3
+
+
+def test_final_status_is_not_retried():
+    app, calls = scripted_server([404])
+    with pytest.raises(FetchError) as error:
+        asyncio.run(fetch(app, RetryPolicy(max_attempts=3, base_delay=0.01)))
+    assert error.value.status == 404
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    app, calls = scripted_server([500, 500, 500])
+    with pytest.raises(FetchError):
+        asyncio.run(fetch(app, RetryPolicy(max_attempts=2, base_delay=0.01)))
+    assert len(calls) == 2
+
+
+def test_retry_after_sets_the_minimum_delay():
+    app, calls = scripted_server([429], headers={'Retry-After': '0.3'})
+    policy = RetryPolicy(max_attempts=2, base_delay=0.001, max_delay=0.001)
+    assert asyncio.run(fetch(app, policy)) == b'ok'
+    assert calls[1] - calls[0] >= 0.25
+
+
+def test_body_is_verified_against_blob_sha():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.01)
+    good = 'b5754e20373fdaa5331ef6e4623dbae636225e3b'  # git hash-object of b'ok'
+    app, calls = scripted_server([])
+    assert asyncio.run(fetch(app, policy, expected_sha=good, expected_size=2)) == b'ok'
+    app, calls = scripted_server([])
+    with pytest.raises(FetchError):
+        asyncio.run(fetch(app, policy, expected_sha='0' * 40, expected_size=2))
+    assert len(calls) == 2
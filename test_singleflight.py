@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for singleflight: sharing results and errors, nothing cached after a
+flight lands, and cancellation only when every waiter has gone.
+"""
+
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight, token_scope
+
+
+class Lookup:
+    """A slow call that counts how often it really runs."""
+
+    def __init__(self, result='value', error=None):
+        self.calls = 0
+        self.cancelled = False
+        self.result = result
+        self.error = error
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_token_scope():
+    assert token_scope('a') == token_scope('a') != token_scope('b')
+    assert token_scope(None) == token_scope('')
+    assert 'secret' not in token_scope('secret')
+
+
+def test_concurrent_calls_share_one_result():
+    flights, lookup = SingleFlight(), Lookup()
+
+    async def main():
+        lookup.release = asyncio.Event()
+        waiting = [asyncio.ensure_future(flights.do('key', lookup)) for _ in range(3)]
+        other = asyncio.ensure_future(flights.do('other', lookup))
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 2
+        lookup.release.set()
+        return await asyncio.gather(*waiting, other)
+
+    assert asyncio.run(main()) == ['value'] * 4
+    assert lookup.calls == 2
+    assert flights.stats() == {'started': 2, 'coalesced': 2, 'in_flight': 0}
+
+
+def test_errors_are_shared_and_nothing_is_cached():
+    flights, lookup = SingleFlight(), Lookup(error=ValueError('boom'))
+
+    async def main():
+        lookup.release = asyncio.Event()
+        waiting = [asyncio.ensure_future(flights.do('key', lookup)) for _ in range(2)]
+        await asyncio.sleep(0)
+        lookup.release.set()
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        # The next call starts a fresh request
+        lookup.error = None
+        return results, await flights.do('key', lookup)
+
+    results, again = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert again == 'value'
+    assert lookup.calls == 2
+
+
+def test_one_cancelled_waiter_leaves_the_others_running():
+    flights, lookup = SingleFlight(), Lookup()
+
+    async def main():
+        lookup.release = asyncio.Event()
+        first = asyncio.ensure_future(flights.do('key', lookup))
+        second = asyncio.ensure_future(flights.do('key', lookup))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        lookup.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'value'
+    assert not lookup.cancelled
+
+
+def test_request_is_cancelled_when_every_waiter_leaves():
+    flights, lookup = SingleFlight(), Lookup()
+
+    async def main():
+        lookup.release = asyncio.Event()
+        waiting = [asyncio.ensure_future(flights.do('key', lookup)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 0
+        # A later caller starts afresh rather than joining the cancelled request
+        lookup.release.set()
+        return await flights.do('key', lookup)
+
+    assert asyncio.run(main()) == 'value'
+    assert lookup.cancelled
+    assert lookup.calls == 2
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for tree_cache: LRU eviction by estimated size, TTLs for trees and
+refs, shared fetches, derived views, and directory_index.
+"""
+
+import asyncio
+
+import pytest
+
+import tree_cache
+from tree_cache import ENTRY_OVERHEAD, TreeCache, directory_index, estimate_tree_bytes
+
+
+class Clock:
+    """Stands in for the time module so TTLs can be stepped through."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeHunter:
+    """The two GitHubFileHunter calls TreeCache makes, counted."""
+
+    def __init__(self, token, sha='abc123'):
+        self.github_token = token
+        self.sha = sha
+        self.resolved = 0
+        self.fetched = 0
+
+    async def resolve_commit(self, owner, repo, ref):
+        self.resolved += 1
+        return self.sha
+
+    async def get_repository_tree(self, owner, repo, sha):
+        self.fetched += 1
+        await asyncio.sleep(0.01)
+        return tree_of(['src/app.py', 'README.md'])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tree_cache, 'time', clock)
+    return clock
+
+
+def tree_of(paths, size=10):
+    return {'tree': [{'path': path, 'type': 'blob', 'size': size} for path in paths]}
+
+
+def test_estimate_tree_bytes():
+    assert estimate_tree_bytes(tree_of(['ab', 'cde'])) == 2 * ENTRY_OVERHEAD + 5
+    assert estimate_tree_bytes({}) == 0
+
+
+def test_least_recently_used_tree_is_evicted(clock):
+    one = estimate_tree_bytes(tree_of(['a']))
+    cache = TreeCache(max_bytes=2 * one)
+    cache.put(('o', 'r', '1'), tree_of(['a']))
+    cache.put(('o', 'r', '2'), tree_of(['b']))
+    assert cache.get(('o', 'r', '1')) is not None  # now most recently used
+    cache.put(('o', 'r', '3'), tree_of(['c']))
+    assert cache.get(('o', 'r', '2')) is None
+    assert cache.get(('o', 'r', '1')) is not None
+    assert cache.stats()['trees'] == 2
+    assert cache.size == 2 * one
+
+
+def test_oversized_tree_is_not_cached(clock):
+    cache = TreeCache(max_bytes=ENTRY_OVERHEAD)
+    cache.put(('o', 'r', '1'), tree_of(['a', 'b']))
+    assert cache.get(('o', 'r', '1')) is None
+    assert cache.size == 0
+
+
+def test_trees_expire_after_ttl(clock):
+    cache = TreeCache(ttl=60)
+    cache.put(('o', 'r', '1'), tree_of(['a']))
+    clock.now += 59
+    assert cache.get(('o', 'r', '1')) is not None
+    clock.now += 2
+    assert cache.get(('o', 'r', '1')) is None
+    assert cache.size == 0
+
+
+def test_refs_are_resolved_per_token_and_expire(clock):
+    cache = TreeCache(ref_ttl=30)
+    alice, bob = FakeHunter('alice-token'), FakeHunter('bob-token')
+
+    async def run():
+        await cache.tree(alice, 'Owner', 'Repo', 'main')
+        await cache.tree(alice, 'owner', 'repo', 'main')
+        await cache.tree(bob, 'owner', 'repo', 'main')
+        clock.now += 31
+        await cache.tree(alice, 'owner', 'repo', 'main')
+
+    asyncio.run(run())
+    # Each token checks access itself, but the tree is fetched once
+    assert (alice.resolved, bob.resolved) == (2, 1)
+    assert alice.fetched + bob.fetched == 1
+    assert cache.stats()['hits'] == 3
+
+
+def test_concurrent_misses_share_one_fetch(clock):
+    cache = TreeCache()
+    hunters = [FakeHunter(f"token-{i}") for i in range(5)]
+
+    async def run():
+        return await asyncio.gather(*(cache.tree(hunter, 'o', 'r', 'main') for hunter in hunters))
+
+    results = asyncio.run(run())
+    assert sum(hunter.fetched for hunter in hunters) == 1
+    assert all(tree is results[0][1] for _, tree in results)
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_views_are_built_once_and_counted_against_the_budget(clock):
+    cache = TreeCache()
+    data = tree_of(['a/b.py', 'c.py'])
+    key = ('o', 'r', 'sha')
+    cache.put(key, data)
+    built = []
+
+    def build(tree_data):
+        built.append(1)
+        return directory_index(tree_data)
+
+    async def run():
+        first = await cache.view('o', 'r', 'sha', 'index', data, build)
+        second = await cache.view('O', 'R', 'sha', 'index', data, build)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second and len(built) == 1
+    assert cache.size == 2 * estimate_tree_bytes(data)
+
+
+def test_directory_index():
+    data = {'tree': [
+        {'path': 'src', 'type': 'tree'},
+        {'path': 'src/pkg/mod.py', 'type': 'blob', 'size': 30},
+        {'path': 'src/main.py', 'type': 'blob', 'size': 20},
+        {'path': 'README.md', 'type': 'blob', 'size': 5},
+        {'path': 'docs', 'type': 'tree'},
+        {'path': 'app.py', 'type': 'blob', 'size': 7},
+        {'path': 'vendor', 'type': 'commit'},
+    ]}
+    index = directory_index(data)
+    assert (index['files'], index['directories'], index['bytes']) == (4, 3, 62)
+    children = index['children']
+    # Directories first, then files, by case-insensitive name
+    assert children[''] == [
+        {'n': 'docs', 'd': 1, 'f': 0, 's': 0},
+        {'n': 'src', 'd': 1, 'f': 2, 's': 50},
+        {'n': 'app.py', 's': 7},
+        {'n': 'README.md', 's': 5},
+    ]
+    assert children['src'] == [{'n': 'pkg', 'd': 1, 'f': 1, 's': 30}, {'n': 'main.py', 's': 20}]
+    assert children['src/pkg'] == [{'n': 'mod.py', 's': 30}]
+    assert children['docs'] == []
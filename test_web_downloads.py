@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the web server's archive downloads: planned member order, byte
+for byte identical archives, and how failed files are reported.
+"""
+
+import asyncio
+import io
+import random
+import zipfile
+
+import pytest
+
+from admission import Admission
+from archive_writer import ArchiveWriter
+from github_file_hunter import GitHubFileHunter
+from mock_github_server import MockGitHub, blob_sha
+from search_criteria import FileMatch
+from web_downloads import ERRORS_MEMBER, Downloads
+
+
+@pytest.fixture
+def matches(mock_github):
+    files = MockGitHub(files_per_repo=10).files('owner', 'alpha')
+    found = [FileMatch(path, len(data), f"{mock_github.url}/raw/owner/alpha/main/{path}",
+                       blob_sha(data), 'owner', 'alpha', 'main')
+             for path, data in files.items()]
+    missing = FileMatch('src/gone.py', 3, f"{mock_github.url}/raw/owner/alpha/main/src/gone.py",
+                        'f' * 40, 'owner', 'alpha', 'main')
+    return found + [missing]
+
+
+def build(matches):
+    output = io.BytesIO()
+    written = []
+    downloads = Downloads()
+    downloads.start(Admission(), None, None)
+
+    async def run():
+        async with GitHubFileHunter('test-token') as hunter:
+            archive = ArchiveWriter('files.zip', fileobj=output, save_manifest=False)
+            try:
+                return await downloads.archive_matches(
+                    archive, hunter, matches, 'address:test',
+                    lambda match, size: written.append((match.path, size)))
+            finally:
+                await archive.close()
+
+    failures = asyncio.run(run())
+    return output.getvalue(), failures, written
+
+
+def test_archive_is_planned_and_deterministic(matches):
+    first, failures, written = build(matches)
+    shuffled = list(matches)
+    random.Random(7).shuffle(shuffled)
+    second, _, _ = build(shuffled)
+    assert first == second
+
+    names = zipfile.ZipFile(io.BytesIO(first)).namelist()
+    paths = sorted(match.path for match in matches if match.path != 'src/gone.py')
+    assert names[:-1] == paths
+    assert [path for path, _ in written] == sorted(match.path for match in matches)
+    assert ('src/gone.py', None) in written
+    assert len(failures) == 1 and failures[0].startswith('src/gone.py: ')
+
+
+def test_failures_are_listed_in_the_archive(matches):
+    data, _, _ = build(matches)
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    errors = archive.namelist()[-1]
+    assert errors == ERRORS_MEMBER == '.hunter/DOWNLOAD_ERRORS.txt'
+    assert archive.read(errors).decode().startswith('src/gone.py: ')
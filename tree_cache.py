@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Tree Cache
+
+In-process cache of recursive repository trees for long-lived servers. Trees
+are keyed by repository and resolved commit SHA, so a cached tree can never
+be stale: a branch that moves resolves to a new SHA and a new entry. Entries
+expire after a TTL and the least recently used ones are evicted once the
+estimated memory held passes a budget. Views derived from a tree (such as
+a per-directory index) can be kept alongside it and are evicted with it.
+
+Refs are resolved with the requester's own token on every miss of a short
+per-token ref cache, so access to a private repository is always checked
+before its (shared) tree is handed out. Concurrent misses for the same tree,
+whoever's token they carry, share one fetch.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from singleflight import SingleFlight, token_scope
+
+if TYPE_CHECKING:
+    from github_file_hunter import GitHubFileHunter
+
+# How long a cached tree is kept, in seconds
+TREE_TTL = 3600.0
+
+# How long a branch name is trusted to point at the same commit, in seconds
+REF_TTL = 30.0
+
+# Memory budget for cached trees (estimated bytes)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Estimated in-memory cost of one tree entry (dict, sha, mode, type) besides its path
+ENTRY_OVERHEAD = 400
+
+
+def estimate_tree_bytes(tree_data: Dict[str, Any]) -> int:
+    """Rough memory held by a parsed tree response."""
+    return sum(ENTRY_OVERHEAD + len(item.get('path', '')) for item in tree_data.get('tree', []))
+
+
+def directory_index(tree_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Per-directory view of a recursive tree, for browsing it a level at a time.
+    Children use short keys: files {"n": name, "s": size}, directories
+    {"n": name, "d": 1, "f": files beneath, "s": bytes beneath}. Each listing
+    has directories first, then files, by name.
+    """
+    children: Dict[str, list] = {'': []}
+    directories: Dict[str, Dict[str, Any]] = {}
+
+    def ensure_directory(path: str) -> Dict[str, Any]:
+        entry = directories.get(path)
+        if entry is None:
+            parent, _, name = path.rpartition('/')
+            if parent:
+                ensure_directory(parent)
+            entry = directories[path] = {'n': name, 'd': 1, 'f': 0, 's': 0}
+            children[parent].append(entry)
+            children[path] = []
+        return entry
+
+    files = total_bytes = 0
+    for item in tree_data.get('tree', []):
+        path = item['path']
+        if item['type'] == 'tree':
+            ensure_directory(path)
+        elif item['type'] == 'blob':
+            parent, _, name = path.rpartition('/')
+            size = item.get('size', 0)
+            if parent:
+                ensure_directory(parent)
+            children[parent].append({'n': name, 's': size})
+            files += 1
+            total_bytes += size
+            while parent:
+                directories[parent]['f'] += 1
+                directories[parent]['s'] += size
+                parent = parent.rpartition('/')[0]
+
+    for listing in children.values():
+        listing.sort(key=lambda entry: (not entry.get('d'), entry['n'].casefold()))
+    return {'children': children, 'files': files, 'directories': len(directories), 'bytes': total_bytes}
+
+
+class _CachedTree:
+    """A cached tree, its estimated size and any views derived from it."""
+    __slots__ = ('stored', 'tree_size', 'size', 'tree', 'views')
+
+    def __init__(self, tree: Dict[str, Any], size: int):
+        self.stored = time.monotonic()
+        self.tree_size = size
+        self.size = size
+        self.tree = tree
+        self.views: Dict[str, Any] = {}
+
+
+class TreeCache:
+    """Recursive trees keyed by (owner, repo, commit SHA), with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = TREE_TTL,
+                 ref_ttl: float = REF_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.ref_ttl = ref_ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.flights = SingleFlight()
+        # (owner, repo, sha) -> cached tree; least recently used first
+        self._trees: 'OrderedDict[Tuple[str, str, str], _CachedTree]' = OrderedDict()
+        # (token scope, owner, repo, ref) -> (resolved at, commit SHA)
+        self._refs: Dict[Tuple[str, str, str, str], Tuple[float, str]] = {}
+
+    async def resolve(self, hunter: 'GitHubFileHunter', owner: str, repo: str, ref: str) -> str:
+        """The commit SHA ref points at, as seen with hunter's token."""
+        key = (token_scope(hunter.github_token), owner.lower(), repo.lower(), ref)
+        cached = self._refs.get(key)
+        if cached and time.monotonic() - cached[0] < self.ref_ttl:
+            return cached[1]
+
+        sha = await hunter.resolve_commit(owner, repo, ref)
+        self._refs[key] = (time.monotonic(), sha)
+        if len(self._refs) > 4096:
+            self._expire_refs()
+        return sha
+
+    async def tree(self, hunter: 'GitHubFileHunter', owner: str, repo: str,
+                   ref: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        The commit SHA and recursive tree for ref, fetched only on a miss. The
+        returned tree is shared between callers and must not be modified.
+        """
+        sha = await self.resolve(hunter, owner, repo, ref)
+        key = (owner.lower(), repo.lower(), sha)
+
+        tree_data = self.get(key)
+        if tree_data is not None:
+            self.hits += 1
+            return sha, tree_data
+
+        self.misses += 1
+        # Access was checked by resolve, so callers with any token may share the fetch
+        tree_data = await self.flights.do(key, lambda: self._fetch(hunter, key, owner, repo, sha))
+        return sha, tree_data
+
+    async def _fetch(self, hunter: 'GitHubFileHunter', key: Tuple[str, str, str],
+                     owner: str, repo: str, sha: str) -> Dict[str, Any]:
+        tree_data = await hunter.get_repository_tree(owner, repo, sha)
+        self.put(key, tree_data)
+        return tree_data
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        entry = self._entry(key)
+        return entry.tree if entry else None
+
+    async def view(self, owner: str, repo: str, sha: str, name: str, tree_data: Dict[str, Any],
+                   build: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        build(tree_data), kept with the cached tree under name so it is built
+        once per tree. Building runs in the default executor, so big trees do
+        not stall the event loop; its memory is accounted as roughly the tree's.
+        """
+        key = (owner.lower(), repo.lower(), sha)
+        entry = self._entry(key)
+        if entry is not None and name in entry.views:
+            return entry.views[name]
+
+        loop = asyncio.get_running_loop()
+        view = await self.flights.do((*key, name), lambda: loop.run_in_executor(None, build, tree_data))
+        entry = self._entry(key)
+        if entry is not None and name not in entry.views:
+            entry.views[name] = view
+            entry.size += entry.tree_size
+            self.size += entry.tree_size
+            self._evict()
+        return view
+
+    def _entry(self, key: Tuple[str, str, str]) -> Optional[_CachedTree]:
+        entry = self._trees.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored > self.ttl:
+            self._remove(key)
+            return None
+        self._trees.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, str, str], tree_data: Dict[str, Any]) -> None:
+        size = estimate_tree_bytes(tree_data)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        if key in self._trees:
+            self._remove(key)
+        self._trees[key] = _CachedTree(tree_data, size)
+        self.size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._trees:
+            self._remove(next(iter(self._trees)))
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        self.size -= self._trees.pop(key).size
+
+    def _expire_refs(self) -> None:
+        now = time.monotonic()
+        self._refs = {key: value for key, value in self._refs.items()
+                      if now - value[0] < self.ref_ttl}
+
+    def stats(self) -> Dict[str, int]:
+        return {'trees': len(self._trees), 'bytes': self.size, 'hits': self.hits,
+                'misses': self.misses, 'coalesced': self.flights.coalesced}
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Web Downloads
+
+Archive downloads for the web interface. A selection registered with
+/api/download, or the folder behind a GitHub link given to /api/export, is
+streamed to the browser as a ZIP archive while its files are still being
+fetched, with bounded memory. Members are planned in path order up front, so
+the same selection always produces the same bytes, and complete archives
+are kept in the artifact cache (artifact_cache.py) to be replayed from disk.
+"""
+
+import asyncio
+import logging
+import re
+import secrets
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from aiohttp import web
+
+from admission import BULK, Admission, OverQuota, requester
+from archive_writer import ArchivePipe, ArchiveWriter
+from artifact_cache import ArtifactCache, artifact_key
+from github_file_hunter import GitHubAPIError, GitHubFileHunter, FileMatch
+from retry_policy import FetchError, fetch_with_retry
+from tree_cache import TreeCache
+from web_responses import (dumps_str, error_response, over_quota_response, read_json,
+                           upstream_error_response)
+
+# Files fetched at once while streaming an archive
+DOWNLOAD_CONCURRENCY = 8
+
+# Archive member listing the files that could not be fetched; under a dot
+# folder of our own so it cannot collide with a selected repository file
+ERRORS_MEMBER = '.hunter/DOWNLOAD_ERRORS.txt'
+
+# How long a registered download link stays valid, in seconds
+DOWNLOAD_TTL = 600.0
+
+# Folder or file links accepted by /api/export (blob/tree, then ref and path)
+EXPORT_URL = re.compile(r'^https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/(?:tree|blob)/(.+?))?/?$')
+
+
+@dataclass
+class PendingDownload:
+    """A selection registered by /api/download, streamed by /download/<id>."""
+    matches: List[FileMatch]
+    token: Optional[str]
+    filename: str
+    created: float = field(default_factory=time.monotonic)
+
+
+def selected_matches(data: Dict[str, Any]) -> List[FileMatch]:
+    """FileMatch objects for a request's files and repo_info; raises ValueError if malformed."""
+    files_to_download = data.get('files', [])
+    repo_info = data.get('repo_info') or {}
+
+    if not files_to_download:
+        raise ValueError('No files selected for download')
+
+    try:
+        return [
+            FileMatch(
+                path=file_data['path'],
+                size=file_data['size'],
+                download_url=file_data['download_url'],
+                sha=file_data['sha'],
+                repo_owner=repo_info.get('owner', ''),
+                repo_name=repo_info.get('repo', ''),
+                branch=repo_info.get('branch') or ''
+            )
+            for file_data in files_to_download
+        ]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid file entry: {e}")
+
+
+def archive_name(data: Dict[str, Any]) -> str:
+    """Download filename for a request: owner_repo.zip, safe to put in a header."""
+    repo_info = data.get('repo_info') or {}
+    if not repo_info and data.get('repo_url'):
+        owner, _, rest = data['repo_url'].replace('https://github.com/', '').partition('/')
+        repo_info = {'owner': owner, 'repo': rest.split('/')[0]}
+    return safe_filename(f"{repo_info.get('owner', 'repo')}_{repo_info.get('repo', 'files')}.zip")
+
+
+def safe_filename(filename: str) -> str:
+    """filename with anything that could break a Content-Disposition header replaced."""
+    return re.sub(r'[^\w.-]', '_', filename)
+
+
+def archive_response(path: str, filename: str) -> web.FileResponse:
+    return web.FileResponse(path, headers={
+        'Content-Type': 'application/zip',
+        'Content-Disposition': f'attachment; filename="{filename}"'
+    })
+
+
+class Downloads:
+    """
+    Registered download links and the handlers that build and stream
+    archives. The admission control, tree cache and artifact cache are the
+    server's own, handed over by start() for its lifetime.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, PendingDownload] = {}
+        self.admission: Optional[Admission] = None
+        self.tree_cache: Optional[TreeCache] = None
+        self.artifact_cache: Optional[ArtifactCache] = None
+
+    def start(self, admission: Admission, tree_cache: Optional[TreeCache],
+              artifact_cache: Optional[ArtifactCache]) -> None:
+        self.admission = admission
+        self.tree_cache = tree_cache
+        self.artifact_cache = artifact_cache
+
+    def close(self) -> None:
+        self.pending.clear()
+        self.admission = self.tree_cache = self.artifact_cache = None
+
+    def pending_download(self, download_id: str) -> Optional[PendingDownload]:
+        """A registered selection that has not expired yet."""
+        now = time.monotonic()
+        for key in [key for key, pending in self.pending.items() if now - pending.created > DOWNLOAD_TTL]:
+            del self.pending[key]
+        return self.pending.get(download_id)
+
+    async def download_files(self, request: web.Request) -> web.Response:
+        """Register files for download; the returned URL streams them as a ZIP archive."""
+        try:
+            data = await read_json(request)
+            matches = selected_matches(data)
+        except ValueError as e:
+            return error_response(str(e))
+
+        filename = archive_name(data)
+        download_id = secrets.token_urlsafe(16)
+        self.pending_download(download_id)  # Drop expired selections
+        self.pending[download_id] = PendingDownload(matches, data.get('token'), filename)
+
+        return web.json_response({
+            'success': True,
+            'download_url': f'/download/{download_id}',
+            'filename': filename
+        }, dumps=dumps_str)
+
+    async def archive_matches(self, archive: ArchiveWriter, hunter: GitHubFileHunter,
+                              matches: List[FileMatch], client: str,
+                              on_file: Optional[Callable[[FileMatch, Optional[int]], None]] = None) -> List[str]:
+        """
+        Download matches into archive in path order, planned up front, so the
+        same selection always produces the same bytes. Up to DOWNLOAD_CONCURRENCY
+        files are fetched ahead of the one being written, each taking a bulk
+        upstream slot as client. on_file(match, size) is called as each one is
+        written (size None if it failed). Failures are listed in an
+        ERRORS_MEMBER member and returned.
+        """
+        ordered = sorted(matches, key=lambda match: match.path)
+        archive.expect(match.path for match in ordered)
+        failures: List[str] = []
+
+        async def fetch(match: FileMatch) -> Optional[bytes]:
+            try:
+                async with self.admission.scheduler.slot(BULK, client):
+                    return await fetch_with_retry(
+                        hunter.session, match.download_url, hunter.retry_policy, hunter.latency,
+                        expected_sha=match.sha, expected_size=match.size
+                    )
+            except FetchError as e:
+                failures.append(f"{match.path}: {e}")
+                return None
+
+        fetches: Dict[int, asyncio.Future] = {}
+        try:
+            for position, match in enumerate(ordered):
+                # Keep the window of fetches ahead of this member full; at most
+                # DOWNLOAD_CONCURRENCY bodies are in memory at once
+                for ahead in range(position, min(position + DOWNLOAD_CONCURRENCY, len(ordered))):
+                    if ahead not in fetches:
+                        fetches[ahead] = asyncio.ensure_future(fetch(ordered[ahead]))
+                content = await fetches.pop(position)
+                if content is None:
+                    archive.skip(match.path)
+                    if on_file:
+                        on_file(match, None)
+                    continue
+                await archive.write(match.path, content, match.sha)
+                await archive.flush()
+                if on_file:
+                    on_file(match, len(content))
+        finally:
+            for task in fetches.values():
+                task.cancel()
+            await asyncio.gather(*fetches.values(), return_exceptions=True)
+
+        if failures:
+            await archive.write(ERRORS_MEMBER, '\n'.join(sorted(failures)).encode() + b'\n')
+        return failures
+
+    def keep_archive(self, key: str, partial: str) -> Optional[str]:
+        """Cache a completed build, or delete it if it cannot be cached; returns the cached path."""
+        path = self.artifact_cache.put(key, partial)
+        if path is None:
+            self.artifact_cache.discard(partial)
+        return path
+
+    async def stream_zip(self, request: web.Request, matches: List[FileMatch], token: Optional[str],
+                         filename: str, client: str) -> web.StreamResponse:
+        """
+        Stream matches to the client as a ZIP archive while they download, keeping
+        a copy in the artifact cache; a selection already cached is sent from disk.
+        """
+        key = artifact_key(matches)
+        cached = self.artifact_cache.get(key)
+        if cached:
+            # Sent here rather than by the caller, so its admission lease covers the transfer
+            response = archive_response(cached, filename)
+            try:
+                await response.prepare(request)
+                await response.write_eof()
+            except ConnectionError:
+                logging.getLogger(__name__).info("Client left during download of %s", filename)
+            return response
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'application/zip',
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        partial = self.artifact_cache.partial(key)
+        copy = open(partial, 'wb')
+        pipe = ArchivePipe(copy=copy)
+        archive = ArchiveWriter(filename, fileobj=pipe, save_manifest=False)
+        failures: Optional[List[str]] = None
+
+        async def produce() -> None:
+            nonlocal failures
+            try:
+                async with GitHubFileHunter(token) as hunter:
+                    failures = await self.archive_matches(archive, hunter, matches, client)
+            finally:
+                # Also on cancellation, so the archive's writer thread always shuts down
+                await archive.close()
+                await pipe.finish()
+
+        producer = asyncio.ensure_future(produce())
+        complete = False
+        try:
+            async for chunk in pipe.chunks():
+                await response.write(chunk)
+            await producer
+            complete = True
+        except BaseException as e:
+            # Client gone or archive failed: stop downloading, and end the response
+            # without its final chunk so the browser reports the download as failed
+            pipe.abort()
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            if isinstance(e, ConnectionError):
+                logging.getLogger(__name__).info("Client left during download of %s", filename)
+                return response
+            raise
+        finally:
+            copy.close()
+            # Archives missing files are not worth replaying
+            if complete and not failures:
+                self.keep_archive(key, partial)
+            else:
+                self.artifact_cache.discard(partial)
+
+        await response.write_eof()
+        return response
+
+    async def serve_download(self, request: web.Request) -> web.StreamResponse:
+        """Stream a registered selection as a ZIP archive (a bulk download for admission)."""
+        pending = self.pending_download(request.match_info['download_id'])
+        if pending is None:
+            return web.Response(text="File not found", status=404)
+
+        client = requester(request)
+        try:
+            lease = self.admission.admit(client, BULK)
+        except OverQuota as e:
+            return over_quota_response(e)
+        try:
+            return await self.stream_zip(request, pending.matches, pending.token, pending.filename, client)
+        finally:
+            lease.release()
+
+    async def resolve_export(self, hunter: GitHubFileHunter, url: str) -> Tuple[str, str, str, str]:
+        """
+        Owner, repo, ref and path inside the repository for a GitHub folder or
+        file link. Branch names may contain slashes, so the shortest leading part
+        of what follows tree/ or blob/ that resolves to a commit is the ref.
+        """
+        match = EXPORT_URL.match(url)
+        if not match:
+            raise ValueError(f"Not a GitHub repository, folder or file link: {url}")
+        owner, repo, rest = match.groups()
+        if not rest:
+            return owner, repo, await hunter.get_default_branch(owner, repo), ''
+
+        parts = [unquote(part) for part in rest.split('/')]
+        for end in range(1, len(parts) + 1):
+            ref = '/'.join(parts[:end])
+            try:
+                await self.tree_cache.resolve(hunter, owner, repo, ref)
+            except GitHubAPIError:
+                raise  # Rate limited or down: a longer prefix would fail the same way
+            except ValueError:
+                continue  # No such ref; try a longer prefix
+            return owner, repo, ref, '/'.join(parts[end:])
+        raise ValueError(f"No branch, tag or commit of {owner}/{repo} matches '{unquote(rest)}'")
+
+    async def export_folder(self, request: web.Request) -> web.StreamResponse:
+        """
+        DownGit-style export of the folder (or file) at a GitHub link as a ZIP
+        archive. Query: url, plus DownGit's fileName and rootDirectory options; a
+        token may be sent as "Authorization: token ...". The folder's files come
+        from one recursive tree fetch (usually cached) and download concurrently
+        while the archive streams. HEAD checks the link and reports the file
+        count and size without downloading anything.
+        """
+        url = request.query.get('url', '').strip()
+        if not EXPORT_URL.match(url):
+            return error_response('url must be a GitHub repository, folder or file link')
+        authorization = request.headers.get('Authorization', '')
+        token = authorization.partition(' ')[2].strip() or None
+
+        client = requester(request)
+        try:
+            lease = self.admission.admit(client, BULK)
+        except OverQuota as e:
+            return over_quota_response(e)
+
+        try:
+            try:
+                async with self.admission.scheduler.slot(BULK, client):
+                    async with GitHubFileHunter(token) as hunter:
+                        owner, repo, ref, path = await self.resolve_export(hunter, url)
+                        commit, tree_data = await self.tree_cache.tree(hunter, owner, repo, ref)
+                        # Pinned to the commit, so every file comes from the same snapshot
+                        files = hunter.subtree_files(tree_data, path, owner, repo, commit)
+            except GitHubAPIError as e:
+                return upstream_error_response(e)
+            except ValueError as e:
+                return error_response(str(e), status=404)
+            if not files:
+                return error_response(f"Nothing at '{path}' in {owner}/{repo}@{ref}", status=404)
+
+            # Member names and archive name follow DownGit's options
+            root_name = path.rsplit('/', 1)[-1] or repo
+            root_directory = request.query.get('rootDirectory', '')
+            if root_directory == 'false':
+                prefix = ''
+            elif root_directory in ('', 'true'):
+                prefix = f"{root_name}/"
+            else:
+                prefix = f"{root_directory.strip('/')}/"
+            if len(files) == 1 and files[0].path == path:
+                files = [replace(files[0], path=root_name)]
+            else:
+                start = len(path) + 1 if path else 0
+                files = [replace(match, path=prefix + match.path[start:]) for match in files]
+            filename = safe_filename(f"{request.query.get('fileName') or root_name}.zip")
+
+            if request.method == 'HEAD':
+                return web.Response(headers={
+                    'Content-Type': 'application/zip',
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'X-File-Count': str(len(files)),
+                    'X-Total-Size': str(sum(match.size for match in files))
+                })
+            return await self.stream_zip(request, files, token, filename, client)
+        finally:
+            lease.release()
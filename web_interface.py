@@ -2,240 +2,453 @@
 """
 GitHub File Hunter - Web Interface
 
-A Flask-based web interface for the GitHub File Hunter tool.
+An aiohttp-based web interface for the GitHub File Hunter tool.
 Provides an easy-to-use GUI for repository exploration and file downloading.
+
+The server runs on one event loop for its whole lifetime and installs the
+same WarmState the hunter daemon uses: one connection pool shared by every
+request (whatever token it carries) and the ref-resolution caches. Concurrent
+users multiplex over shared GitHub connections instead of each request
+starting its own loop, session and TLS handshakes on a blocked worker thread.
+
+Repository trees are cached in-process by commit SHA (tree_cache.py), so
+loading a repository and then searching it repeatedly fetches its tree once.
+API payloads are encoded with a fast JSON encoder, compressed per client and
+tagged with ETags derived from the commit SHA and request (web_responses.py),
+so unchanged trees and searches answer 304. Each client address may only
+run a few requests and downloads at once, and upstream requests are shared
+fairly between interactive and bulk work (admission.py). Downloads stream to
+the browser as a ZIP archive while the files are still being fetched, with
+bounded memory, and built archives are kept in an on-disk cache keyed by
+their content (web_downloads.py, artifact_cache.py); /api/export serves
+DownGit-style folder downloads from a GitHub link the same way. Long
+searches and downloads can also run as background jobs (web_jobs.py) whose
+progress is streamed with Server-Sent Events. The page itself is
+templates/index.html.
 """
 
-import os
 import asyncio
-import json
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
-from flask_cors import CORS
-import tempfile
-import zipfile
-from pathlib import Path
-from github_file_hunter import GitHubFileHunter, SearchCriteria
+import logging
+import os
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from admission import BULK, Admission, OverQuota, requester
+from archive_writer import ArchiveWriter
+from artifact_cache import DEFAULT_DIRECTORY as ARTIFACT_DIRECTORY
+from artifact_cache import DEFAULT_MAX_BYTES as ARTIFACT_MAX_BYTES
+from artifact_cache import ArtifactCache, artifact_key
+from cost_estimate import fetch_rate_limit
+from github_file_hunter import GitHubFileHunter, SearchCriteria, FileMatch
 from github_hunter_profiles import SEARCH_PROFILES
+from hunter_daemon import WarmState, set_warm_state
+from tree_cache import DEFAULT_MAX_BYTES, TreeCache, directory_index
+from web_downloads import Downloads, archive_name, archive_response, selected_matches
+from web_jobs import Job, JobManager
+from web_responses import (ResponseCache, dumps, dumps_str, error_response, make_etag,
+                           over_quota_response, read_json)
 
-app = Flask(__name__)
-CORS(app)
+# The single-page interface
+INDEX_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
 
-# Global configuration
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file upload
+# Largest request body accepted (16MB)
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
-@app.route('/')
-def index():
-    """Main interface page."""
-    return render_template('index.html', profiles=list(SEARCH_PROFILES.keys()))
+# Fields a custom search may set on SearchCriteria
+CRITERIA_FIELDS = ('name_patterns', 'extensions', 'path_patterns', 'exclude_patterns',
+                   'min_size', 'max_size', 'regex_pattern')
+
+# Children returned per tree page by default, and at most
+TREE_PAGE = 200
+MAX_TREE_PAGE = 1000
+
+# Job progress events are sent at most this often; idle streams get a heartbeat
+JOB_EVENT_INTERVAL = 0.25
+JOB_HEARTBEAT = 15.0
+
+# How often a download job re-reads the rate-limit budget, in seconds
+RATE_LIMIT_REFRESH = 10.0
+
+# Trees shared by every request, set up for the server's lifetime by warm_pool
+tree_cache: Optional[TreeCache] = None
+
+# Background searches and downloads, also set up by warm_pool
+job_manager: Optional[JobManager] = None
+
+# Built archives on disk, also set up by warm_pool
+artifact_cache: Optional[ArtifactCache] = None
+
+# Encoded JSON bodies by ETag, also set up by warm_pool
+response_cache: Optional[ResponseCache] = None
 
-@app.route('/api/repository/tree', methods=['POST'])
-def get_repository_tree():
-    """Get repository file tree."""
-    data = request.get_json()
+# Per-client limits and the fair upstream scheduler, also set up by warm_pool
+admission: Optional[Admission] = None
+
+# Download links and archive streaming; warm_pool hands it the caches above
+downloads = Downloads()
+
+
+def build_criteria(search_criteria: Dict[str, Any], profile: str = None) -> SearchCriteria:
+    """A named profile's criteria, or criteria built from the request's fields."""
+    if profile and profile in SEARCH_PROFILES:
+        return SEARCH_PROFILES[profile]['criteria']
+    
+    criteria = SearchCriteria()
+    for name in CRITERIA_FIELDS:
+        if name in search_criteria:
+            setattr(criteria, name, search_criteria[name])
+    return criteria
+
+
+def match_to_dict(match: FileMatch) -> Dict[str, Any]:
+    """JSON-serializable form of a match."""
+    return {
+        'path': match.path,
+        'filename': os.path.basename(match.path),
+        'directory': os.path.dirname(match.path),
+        'size': match.size,
+        'extension': os.path.splitext(match.path)[1],
+        'download_url': match.download_url,
+        'sha': match.sha
+    }
+
+
+async def index(request: web.Request) -> web.Response:
+    """Main interface page."""
+    return web.FileResponse(INDEX_PAGE)
+
+
+async def get_repository_tree(request: web.Request) -> web.Response:
+    """
+    Repository summary plus one page of one directory's children (the root by
+    default). Pass path to expand a directory, offset/limit to page through a
+    large one, and the commit from an earlier response to keep browsing the
+    same snapshot. full=true returns the whole raw tree as well.
+    """
+    try:
+        data = await read_json(request)
+    except ValueError as e:
+        return error_response(f"Invalid JSON: {e}")
+    
     repo_url = data.get('repo_url')
     branch = data.get('branch')
     token = data.get('token')
+    path = (data.get('path') or '').strip('/')
     
     if not repo_url:
-        return jsonify({'error': 'Repository URL is required'}), 400
+        return error_response('Repository URL is required')
+    try:
+        offset = max(0, int(data.get('offset') or 0))
+        limit = min(MAX_TREE_PAGE, max(1, int(data.get('limit') or TREE_PAGE)))
+    except (TypeError, ValueError):
+        return error_response('offset and limit must be integers')
     
-    async def fetch_tree():
-        try:
+    try:
+        async with admission.interactive(requester(request)):
             async with GitHubFileHunter(token) as hunter:
                 owner, repo, detected_branch = hunter.parse_github_url(repo_url)
-                search_branch = branch or detected_branch
-                
-                tree_data = await hunter.get_repository_tree(owner, repo, search_branch)
+                search_branch = branch or detected_branch or await hunter.get_default_branch(owner, repo)
                 
-                return {
-                    'success': True,
-                    'owner': owner,
-                    'repo': repo,
-                    'branch': search_branch,
-                    'total_files': len([item for item in tree_data.get('tree', []) if item['type'] == 'blob']),
-                    'tree': tree_data.get('tree', [])
-                }
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+                commit, tree_data = await tree_cache.tree(hunter, owner, repo, data.get('commit') or search_branch)
+    except OverQuota as e:
+        return over_quota_response(e)
+    except Exception as e:
+        return error_response(str(e))
     
-    result = asyncio.run(fetch_tree())
+    # Only checked once the ref resolved with the requester's token
+    etag = make_etag('tree', owner, repo, search_branch, commit, path, offset, limit, bool(data.get('full')))
+    cached = response_cache.cached(request, etag)
+    if cached:
+        return cached
     
-    if result['success']:
-        return jsonify(result)
-    else:
-        return jsonify(result), 400
-
-@app.route('/api/search', methods=['POST'])
-def search_files():
-    """Search for files in repository."""
-    data = request.get_json()
+    index = await tree_cache.view(owner, repo, commit, 'directories', tree_data, directory_index)
+    children = index['children'].get(path)
+    if children is None:
+        return error_response(f"No directory '{path}' in {owner}/{repo}", status=404)
     
+    result = {
+        'success': True,
+        'owner': owner,
+        'repo': repo,
+        'branch': search_branch,
+        'commit': commit,
+        'total_files': index['files'],
+        'total_directories': index['directories'],
+        'total_size': index['bytes'],
+        'truncated': bool(tree_data.get('truncated')),
+        'path': path,
+        'total_children': len(children),
+        'offset': offset,
+        'next_offset': offset + limit if offset + limit < len(children) else None,
+        'children': children[offset:offset + limit]
+    }
+    if data.get('full'):
+        result['tree'] = tree_data.get('tree', [])
+    return await response_cache.json(request, result, etag)
+
+
+async def repository_branch(hunter: GitHubFileHunter, data: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Owner, repo and branch named by a request's repo_url and branch."""
     repo_url = data.get('repo_url')
-    search_criteria = data.get('search_criteria', {})
-    profile = data.get('profile')
-    branch = data.get('branch')
-    token = data.get('token')
-    
     if not repo_url:
-        return jsonify({'error': 'Repository URL is required'}), 400
+        raise ValueError('Repository URL is required')
+    owner, repo, detected_branch = hunter.parse_github_url(repo_url)
+    return owner, repo, data.get('branch') or detected_branch or await hunter.get_default_branch(owner, repo)
+
+
+async def find_matches(data: Dict[str, Any], job: Optional[Job] = None) -> List[FileMatch]:
+    """Run the search a request describes (repo_url, branch, token, profile, search_criteria)."""
+    async with GitHubFileHunter(data.get('token')) as hunter:
+        owner, repo, search_branch = await repository_branch(hunter, data)
+        
+        # Get repository tree (usually already cached by the tree request)
+        if job:
+            job.update(phase='tree')
+        _, tree_data = await tree_cache.tree(hunter, owner, repo, search_branch)
+        
+        # Matching large trees is CPU work; keep it off the event loop
+        if job:
+            job.update(phase='matching', tree_entries=len(tree_data.get('tree', [])))
+        criteria = build_criteria(data.get('search_criteria') or {}, data.get('profile'))
+        matches = await asyncio.get_running_loop().run_in_executor(
+            None, hunter.search_files, tree_data, criteria, owner, repo, search_branch
+        )
     
-    async def perform_search():
-        try:
-            async with GitHubFileHunter(token) as hunter:
-                owner, repo, detected_branch = hunter.parse_github_url(repo_url)
-                search_branch = branch or detected_branch
-                
-                # Get repository tree
-                tree_data = await hunter.get_repository_tree(owner, repo, search_branch)
-                
-                # Create search criteria
-                if profile and profile in SEARCH_PROFILES:
-                    criteria = SEARCH_PROFILES[profile]['criteria']
-                else:
-                    criteria = SearchCriteria()
-                    
-                    if 'name_patterns' in search_criteria:
-                        criteria.name_patterns = search_criteria['name_patterns']
-                    if 'extensions' in search_criteria:
-                        criteria.extensions = search_criteria['extensions']
-                    if 'path_patterns' in search_criteria:
-                        criteria.path_patterns = search_criteria['path_patterns']
-                    if 'exclude_patterns' in search_criteria:
-                        criteria.exclude_patterns = search_criteria['exclude_patterns']
-                    if 'min_size' in search_criteria:
-                        criteria.min_size = search_criteria['min_size']
-                    if 'max_size' in search_criteria:
-                        criteria.max_size = search_criteria['max_size']
-                    if 'regex_pattern' in search_criteria:
-                        criteria.regex_pattern = search_criteria['regex_pattern']
-                
-                # Search for matches
-                matches = hunter.search_files(tree_data, criteria, owner, repo, search_branch)
-                
-                # Convert matches to JSON-serializable format
-                results = []
-                total_size = 0
-                
-                for match in matches:
-                    match_data = {
-                        'path': match.path,
-                        'filename': match.filename,
-                        'directory': match.directory,
-                        'size': match.size,
-                        'extension': match.extension,
-                        'download_url': match.download_url,
-                        'sha': match.sha
-                    }
-                    results.append(match_data)
-                    total_size += match.size
-                
-                return {
-                    'success': True,
-                    'matches': results,
-                    'total_files': len(results),
-                    'total_size': total_size,
-                    'profile_used': profile if profile else 'custom'
-                }
-                
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+    if job:
+        job.update(matched=len(matches))
+    return matches
+
+
+def search_payload(matches: List[FileMatch], profile: Optional[str]) -> Dict[str, Any]:
+    results = [match_to_dict(match) for match in matches]
+    return {
+        'success': True,
+        'matches': results,
+        'total_files': len(results),
+        'total_size': sum(match.size for match in matches),
+        'profile_used': profile if profile else 'custom'
+    }
+
+
+async def search_files(request: web.Request) -> web.Response:
+    """
+    Search for files in repository. The ETag covers the commit the branch
+    resolves to and the effective criteria, so a repeated search of an
+    unchanged branch is answered without matching again.
+    """
+    try:
+        data = await read_json(request)
+    except ValueError as e:
+        return error_response(f"Invalid JSON: {e}")
     
-    result = asyncio.run(perform_search())
+    try:
+        async with admission.interactive(requester(request)):
+            async with GitHubFileHunter(data.get('token')) as hunter:
+                owner, repo, search_branch = await repository_branch(hunter, data)
+                commit = await tree_cache.resolve(hunter, owner, repo, search_branch)
+            criteria = build_criteria(data.get('search_criteria') or {}, data.get('profile'))
+            etag = make_etag('search', owner, repo, search_branch, commit, asdict(criteria),
+                             data.get('profile') or 'custom')
+            cached = response_cache.cached(request, etag)
+            if cached:
+                return cached
+            
+            matches = await find_matches(data)
+    except OverQuota as e:
+        return over_quota_response(e)
+    except Exception as e:
+        return error_response(str(e))
     
-    if result['success']:
-        return jsonify(result)
-    else:
-        return jsonify(result), 400
+    return await response_cache.json(request, search_payload(matches, data.get('profile')), etag)
+
+
+async def track_rate_limit(job: Job, hunter: GitHubFileHunter) -> None:
+    """Keep job.progress['rate_limit'] current until cancelled (/rate_limit is not metered)."""
+    while True:
+        rate_limit = await fetch_rate_limit(hunter.session, hunter.base_url)
+        if rate_limit:
+            job.update(rate_limit={key: rate_limit.get(key) for key in ('limit', 'remaining', 'reset')})
+        await asyncio.sleep(RATE_LIMIT_REFRESH)
+
+
+async def run_search_job(job: Job, data: Dict[str, Any], client: str) -> Dict[str, Any]:
+    async with admission.scheduler.slot(BULK, client):
+        matches = await find_matches(data, job)
+    return search_payload(matches, data.get('profile'))
 
-@app.route('/api/download', methods=['POST'])
-def download_files():
-    """Download selected files as a ZIP archive."""
-    data = request.get_json()
+
+async def run_download_job(job: Job, data: Dict[str, Any], client: str) -> Dict[str, Any]:
+    """
+    Download the request's files (or everything its search matches) into a ZIP
+    archive. Complete archives go to the artifact cache, and a selection
+    already there finishes at once.
+    """
+    if data.get('files'):
+        matches = selected_matches(data)
+    else:
+        async with admission.scheduler.slot(BULK, client):
+            matches = await find_matches(data, job)
+    bytes_total = sum(match.size for match in matches)
+    key = artifact_key(matches)
+    cached = artifact_cache.get(key)
+    if cached:
+        job.update(phase='done', cached=True, files_total=len(matches), files_done=len(matches),
+                   files_failed=0, bytes_total=bytes_total, bytes_done=bytes_total)
+        return {'filename': archive_name(data), 'files': len(matches), 'failed': 0,
+                'bytes': os.path.getsize(cached), 'cache_key': key}
     
-    files_to_download = data.get('files', [])
-    repo_info = data.get('repo_info', {})
-    token = data.get('token')
+    job.update(phase='downloading', files_total=len(matches), files_done=0, files_failed=0,
+               bytes_total=bytes_total, bytes_done=0)
     
-    if not files_to_download:
-        return jsonify({'error': 'No files selected for download'}), 400
+    def on_file(match: FileMatch, size: Optional[int]) -> None:
+        if size is None:
+            job.update(files_failed=job.progress['files_failed'] + 1)
+        else:
+            job.update(files_done=job.progress['files_done'] + 1,
+                       bytes_done=job.progress['bytes_done'] + match.size)
     
-    async def download_and_zip():
+    job.artifact = artifact_cache.partial(key)
+    async with GitHubFileHunter(data.get('token')) as hunter:
+        tracker = asyncio.ensure_future(track_rate_limit(job, hunter))
         try:
-            # Create temporary directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                zip_path = os.path.join(temp_dir, 'github_files.zip')
-                
-                async with GitHubFileHunter(token) as hunter:
-                    # Download files to temp directory
-                    download_dir = os.path.join(temp_dir, 'downloads')
-                    os.makedirs(download_dir, exist_ok=True)
-                    
-                    # Create FileMatch objects from the data
-                    from github_file_hunter import FileMatch
-                    matches = []
-                    
-                    for file_data in files_to_download:
-                        match = FileMatch(
-                            path=file_data['path'],
-                            size=file_data['size'],
-                            download_url=file_data['download_url'],
-                            sha=file_data['sha']
-                        )
-                        matches.append(match)
-                    
-                    # Download files
-                    await hunter.download_files(matches, download_dir)
-                    
-                    # Create ZIP file
-                    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                        for root, dirs, files in os.walk(download_dir):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(file_path, download_dir)
-                                zipf.write(file_path, arcname)
-                    
-                    # Read ZIP file content
-                    with open(zip_path, 'rb') as f:
-                        zip_content = f.read()
-                    
-                    return {
-                        'success': True,
-                        'zip_content': zip_content,
-                        'filename': f"{repo_info.get('owner', 'repo')}_{repo_info.get('repo', 'files')}.zip"
-                    }
-                    
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+            with open(job.artifact, 'wb') as output:
+                async with ArchiveWriter(archive_name(data), fileobj=output, save_manifest=False) as archive:
+                    failures = await downloads.archive_matches(archive, hunter, matches, client, on_file)
+        finally:
+            tracker.cancel()
+            await asyncio.gather(tracker, return_exceptions=True)
     
-    result = asyncio.run(download_and_zip())
+    result = {
+        'filename': archive_name(data),
+        'files': len(matches) - len(failures),
+        'failed': len(failures),
+        'bytes': os.path.getsize(job.artifact),
+        'cache_key': None
+    }
+    # Archives missing files stay with the job (and go when it expires)
+    if not failures and artifact_cache.put(key, job.artifact):
+        job.artifact = None
+        result['cache_key'] = key
+    job.update(phase='done')
+    return result
+
+
+JOB_KINDS = {'search': run_search_job, 'download': run_download_job}
+
+
+def job_or_404(request: web.Request) -> Job:
+    job = job_manager.get(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(text=dumps_str({'success': False, 'error': 'No such job'}),
+                               content_type='application/json')
+    return job
+
+
+async def create_job(request: web.Request) -> web.Response:
+    """
+    Start a background search or download; follow it at events_url. Jobs are
+    bulk work: each client may only have a few running at once.
+    """
+    try:
+        data = await read_json(request)
+    except ValueError as e:
+        return error_response(f"Invalid JSON: {e}")
     
-    if result['success']:
-        # Save ZIP to temporary file and return download link
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-        temp_file.write(result['zip_content'])
-        temp_file.close()
-        
-        # Store file info in session or cache for download
-        return jsonify({
-            'success': True,
-            'download_url': f'/download/{os.path.basename(temp_file.name)}',
-            'filename': result['filename']
-        })
-    else:
-        return jsonify(result), 400
-
-@app.route('/download/<filename>')
-def serve_download(filename):
-    """Serve downloaded ZIP file."""
-    temp_path = os.path.join(tempfile.gettempdir(), filename)
+    run = JOB_KINDS.get(data.get('kind'))
+    if run is None:
+        return error_response(f"kind must be one of: {', '.join(JOB_KINDS)}")
+    if not data.get('repo_url') and not data.get('files'):
+        return error_response('Repository URL or files are required')
     
-    if os.path.exists(temp_path):
-        return send_file(temp_path, as_attachment=True, download_name=filename)
-    else:
-        return "File not found", 404
-
-@app.route('/api/profiles')
-def get_profiles():
+    client = requester(request)
+    try:
+        lease = admission.admit(client, BULK)
+    except OverQuota as e:
+        return over_quota_response(e)
+    
+    async def work(job: Job) -> Any:
+        try:
+            return await run(job, data, client)
+        finally:
+            lease.release()
+    
+    job = job_manager.start(data['kind'], work)
+    return web.json_response({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f"/api/jobs/{job.id}",
+        'events_url': f"/api/jobs/{job.id}/events"
+    }, status=202, dumps=dumps_str)
+
+
+async def get_job(request: web.Request) -> web.Response:
+    """Current snapshot of a job."""
+    return web.json_response(job_or_404(request).snapshot(), dumps=dumps_str)
+
+
+async def job_events(request: web.Request) -> web.StreamResponse:
+    """
+    Server-Sent Events: a job snapshot on connect and after every change (at
+    most one per JOB_EVENT_INTERVAL), until the job finishes. Reconnecting
+    simply resumes from the current snapshot.
+    """
+    job = job_or_404(request)
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Keep reverse proxies from buffering the stream
+    })
+    await response.prepare(request)
+    
+    version = None
+    try:
+        await response.write(b'retry: 2000\n\n')
+        while True:
+            if job.version != version:
+                version = job.version
+                payload = dumps(job.snapshot())
+                await response.write(f"id: {version}\ndata: ".encode() + payload + b'\n\n')
+                if job.done:
+                    break
+                await asyncio.sleep(JOB_EVENT_INTERVAL)
+            elif not await job.wait_for_change(version, JOB_HEARTBEAT):
+                # Comment line; keeps idle proxies from timing the stream out
+                await response.write(b': keep-alive\n\n')
+    except ConnectionError:
+        return response
+    
+    await response.write_eof()
+    return response
+
+
+async def cancel_job(request: web.Request) -> web.Response:
+    """Cancel a running job."""
+    job = job_or_404(request)
+    if not job_manager.cancel(job):
+        return error_response(f"Job already {job.state}", status=409)
+    return web.json_response({'success': True, 'job_id': job.id}, dumps=dumps_str)
+
+
+async def job_result(request: web.Request) -> web.StreamResponse:
+    """A finished job's result: search JSON, or the download's ZIP archive."""
+    job = job_or_404(request)
+    if job.state != 'done':
+        return error_response(f"Job is {job.state}", status=409)
+    if job.kind == 'search':
+        # Finished results never change
+        etag = make_etag('job', job.id)
+        return response_cache.cached(request, etag) or await response_cache.json(request, job.result, etag)
+    path = job.artifact
+    if path is None and job.result.get('cache_key'):
+        path = artifact_cache.get(job.result['cache_key'])
+    if not path or not os.path.isfile(path):
+        return error_response('Result file is gone', status=410)
+    return archive_response(path, job.result['filename'])
+
+
+async def get_profiles(request: web.Request) -> web.Response:
     """Get available search profiles."""
     profiles_data = {}
     
@@ -247,359 +460,84 @@ def get_profiles():
             'extensions': criteria.extensions,
             'path_patterns': criteria.path_patterns,
             'exclude_patterns': criteria.exclude_patterns,
-            'min_size': criteria.min_size if criteria.min_size > 0 else None,
-            'max_size': criteria.max_size if criteria.max_size < float('inf') else None,
+            'min_size': criteria.min_size or None,
+            'max_size': criteria.max_size,
             'regex_pattern': criteria.regex_pattern
         }
     
-    return jsonify(profiles_data)
-
-# Create templates directory and basic HTML template
-def create_templates():
-    """Create the templates directory and basic HTML template."""
-    templates_dir = os.path.join(os.path.dirname(__file__), 'templates')
-    os.makedirs(templates_dir, exist_ok=True)
-    
-    html_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GitHub File Hunter</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f7fa; }
-        .container { max-width: 1200px; margin: 0 auto; padding: 20px; }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h1 { color: #2c3e50; margin-bottom: 10px; }
-        .card { background: white; border-radius: 8px; padding: 20px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-        .form-group { margin-bottom: 15px; }
-        .form-group label { display: block; margin-bottom: 5px; font-weight: bold; color: #34495e; }
-        .form-control { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; font-size: 14px; }
-        .btn { padding: 10px 20px; border: none; border-radius: 4px; cursor: pointer; font-size: 14px; margin-right: 10px; }
-        .btn-primary { background: #3498db; color: white; }
-        .btn-success { background: #27ae60; color: white; }
-        .btn-warning { background: #f39c12; color: white; }
-        .btn:hover { opacity: 0.9; }
-        .results { margin-top: 20px; }
-        .file-item { padding: 10px; border-bottom: 1px solid #eee; display: flex; justify-content: space-between; align-items: center; }
-        .file-item:hover { background: #f8f9fa; }
-        .file-info { flex: 1; }
-        .file-path { font-weight: bold; color: #2c3e50; }
-        .file-meta { font-size: 12px; color: #7f8c8d; }
-        .loading { text-align: center; padding: 20px; }
-        .error { color: #e74c3c; background: #fdf2f2; padding: 10px; border-radius: 4px; margin: 10px 0; }
-        .success { color: #27ae60; background: #f2fdf2; padding: 10px; border-radius: 4px; margin: 10px 0; }
-        .profiles { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 10px; margin: 15px 0; }
-        .profile-btn { padding: 8px 12px; background: #ecf0f1; border: 1px solid #bdc3c7; border-radius: 4px; cursor: pointer; text-align: center; }
-        .profile-btn:hover { background: #d5dbdb; }
-        .profile-btn.active { background: #3498db; color: white; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎯 GitHub File Hunter</h1>
-            <p>Find and download specific files from GitHub repositories</p>
-        </div>
-
-        <div class="card">
-            <h3>Repository Information</h3>
-            <div class="form-group">
-                <label for="repo-url">Repository URL or owner/repo:</label>
-                <input type="text" id="repo-url" class="form-control" placeholder="e.g., microsoft/vscode or https://github.com/microsoft/vscode">
-            </div>
-            <div class="form-group">
-                <label for="branch">Branch (optional):</label>
-                <input type="text" id="branch" class="form-control" placeholder="main, master, develop...">
-            </div>
-            <div class="form-group">
-                <label for="token">GitHub Token (optional but recommended):</label>
-                <input type="password" id="token" class="form-control" placeholder="ghp_...">
-            </div>
-            <button class="btn btn-primary" onclick="loadRepository()">Load Repository</button>
-        </div>
-
-        <div class="card" id="search-section" style="display: none;">
-            <h3>Search Options</h3>
-            
-            <div class="form-group">
-                <label>Quick Profiles:</label>
-                <div class="profiles" id="profiles-grid"></div>
-            </div>
-
-            <div class="form-group">
-                <label for="extensions">File Extensions (comma-separated):</label>
-                <input type="text" id="extensions" class="form-control" placeholder="py, js, md, yml">
-            </div>
-            <div class="form-group">
-                <label for="name-patterns">Name Patterns (comma-separated):</label>
-                <input type="text" id="name-patterns" class="form-control" placeholder="*config*, README*, *.test.*">
-            </div>
-            <div class="form-group">
-                <label for="path-patterns">Path Patterns (comma-separated):</label>
-                <input type="text" id="path-patterns" class="form-control" placeholder="src/*, docs/*, api/*">
-            </div>
-            <div class="form-group">
-                <label for="exclude-patterns">Exclude Patterns (comma-separated):</label>
-                <input type="text" id="exclude-patterns" class="form-control" placeholder="node_modules/*, *.min.*, test/*">
-            </div>
-            
-            <button class="btn btn-success" onclick="searchFiles()">Search Files</button>
-            <button class="btn btn-warning" onclick="clearSearch()">Clear</button>
-        </div>
-
-        <div class="card" id="results-section" style="display: none;">
-            <h3>Search Results</h3>
-            <div id="results-summary"></div>
-            <div id="results-list"></div>
-            <div id="download-section" style="margin-top: 20px; display: none;">
-                <button class="btn btn-success" onclick="downloadSelected()">Download Selected Files</button>
-                <button class="btn btn-primary" onclick="selectAll()">Select All</button>
-                <button class="btn btn-warning" onclick="selectNone()">Select None</button>
-            </div>
-        </div>
-
-        <div id="loading" class="loading" style="display: none;">
-            <p>⏳ Loading...</p>
-        </div>
-
-        <div id="messages"></div>
-    </div>
-
-    <script>
-        let currentRepo = null;
-        let searchResults = [];
-        let selectedProfile = null;
-
-        // Load available profiles
-        fetch('/api/profiles')
-            .then(response => response.json())
-            .then(profiles => {
-                const grid = document.getElementById('profiles-grid');
-                for (const [name, profile] of Object.entries(profiles)) {
-                    const btn = document.createElement('div');
-                    btn.className = 'profile-btn';
-                    btn.textContent = name;
-                    btn.title = profile.description;
-                    btn.onclick = () => selectProfile(name, profile);
-                    grid.appendChild(btn);
-                }
-            });
-
-        function selectProfile(name, profile) {
-            // Clear previous selection
-            document.querySelectorAll('.profile-btn').forEach(btn => btn.classList.remove('active'));
-            event.target.classList.add('active');
-            
-            selectedProfile = name;
-            
-            // Fill form fields with profile data
-            document.getElementById('extensions').value = profile.extensions ? profile.extensions.join(', ') : '';
-            document.getElementById('name-patterns').value = profile.name_patterns ? profile.name_patterns.join(', ') : '';
-            document.getElementById('path-patterns').value = profile.path_patterns ? profile.path_patterns.join(', ') : '';
-            document.getElementById('exclude-patterns').value = profile.exclude_patterns ? profile.exclude_patterns.join(', ') : '';
-        }
-
-        function showLoading(show) {
-            document.getElementById('loading').style.display = show ? 'block' : 'none';
-        }
-
-        function showMessage(message, type = 'error') {
-            const div = document.createElement('div');
-            div.className = type;
-            div.textContent = message;
-            document.getElementById('messages').appendChild(div);
-            setTimeout(() => div.remove(), 5000);
-        }
-
-        function loadRepository() {
-            const repoUrl = document.getElementById('repo-url').value.trim();
-            const branch = document.getElementById('branch').value.trim();
-            const token = document.getElementById('token').value.trim();
-
-            if (!repoUrl) {
-                showMessage('Please enter a repository URL');
-                return;
-            }
-
-            showLoading(true);
-
-            fetch('/api/repository/tree', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ repo_url: repoUrl, branch, token })
-            })
-            .then(response => response.json())
-            .then(data => {
-                showLoading(false);
-                if (data.success) {
-                    currentRepo = data;
-                    document.getElementById('search-section').style.display = 'block';
-                    showMessage(`Repository loaded: ${data.owner}/${data.repo} (${data.total_files} files)`, 'success');
-                } else {
-                    showMessage('Error loading repository: ' + data.error);
-                }
-            })
-            .catch(error => {
-                showLoading(false);
-                showMessage('Network error: ' + error.message);
-            });
-        }
-
-        function searchFiles() {
-            if (!currentRepo) {
-                showMessage('Please load a repository first');
-                return;
-            }
-
-            const searchCriteria = {
-                name_patterns: document.getElementById('name-patterns').value.split(',').map(s => s.trim()).filter(s => s),
-                extensions: document.getElementById('extensions').value.split(',').map(s => s.trim()).filter(s => s),
-                path_patterns: document.getElementById('path-patterns').value.split(',').map(s => s.trim()).filter(s => s),
-                exclude_patterns: document.getElementById('exclude-patterns').value.split(',').map(s => s.trim()).filter(s => s)
-            };
-
-            showLoading(true);
-
-            fetch('/api/search', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    repo_url: document.getElementById('repo-url').value.trim(),
-                    branch: document.getElementById('branch').value.trim(),
-                    token: document.getElementById('token').value.trim(),
-                    search_criteria: searchCriteria,
-                    profile: selectedProfile
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                showLoading(false);
-                if (data.success) {
-                    searchResults = data.matches;
-                    displayResults(data);
-                } else {
-                    showMessage('Search error: ' + data.error);
-                }
-            })
-            .catch(error => {
-                showLoading(false);
-                showMessage('Network error: ' + error.message);
-            });
-        }
-
-        function displayResults(data) {
-            const resultsSection = document.getElementById('results-section');
-            const summary = document.getElementById('results-summary');
-            const resultsList = document.getElementById('results-list');
-
-            resultsSection.style.display = 'block';
-
-            // Summary
-            const totalSizeMB = (data.total_size / (1024 * 1024)).toFixed(2);
-            summary.innerHTML = `
-                <p><strong>${data.total_files}</strong> files found (${totalSizeMB} MB total)</p>
-                <p>Profile used: <strong>${data.profile_used}</strong></p>
-            `;
-
-            // Results list
-            resultsList.innerHTML = '';
-            data.matches.forEach((file, index) => {
-                const div = document.createElement('div');
-                div.className = 'file-item';
-                div.innerHTML = `
-                    <div class="file-info">
-                        <div class="file-path">${file.path}</div>
-                        <div class="file-meta">${formatFileSize(file.size)} • ${file.extension || 'no ext'}</div>
-                    </div>
-                    <input type="checkbox" id="file-${index}" data-index="${index}">
-                `;
-                resultsList.appendChild(div);
-            });
-
-            document.getElementById('download-section').style.display = 'block';
-        }
-
-        function formatFileSize(bytes) {
-            if (bytes < 1024) return bytes + ' B';
-            if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' KB';
-            return (bytes / (1024 * 1024)).toFixed(1) + ' MB';
-        }
-
-        function selectAll() {
-            document.querySelectorAll('#results-list input[type="checkbox"]').forEach(cb => cb.checked = true);
-        }
-
-        function selectNone() {
-            document.querySelectorAll('#results-list input[type="checkbox"]').forEach(cb => cb.checked = false);
-        }
-
-        function downloadSelected() {
-            const selected = [];
-            document.querySelectorAll('#results-list input[type="checkbox"]:checked').forEach(cb => {
-                const index = parseInt(cb.dataset.index);
-                selected.push(searchResults[index]);
-            });
-
-            if (selected.length === 0) {
-                showMessage('Please select files to download');
-                return;
-            }
-
-            showLoading(true);
-
-            fetch('/api/download', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    files: selected,
-                    repo_info: currentRepo,
-                    token: document.getElementById('token').value.trim()
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                showLoading(false);
-                if (data.success) {
-                    // Create download link
-                    const a = document.createElement('a');
-                    a.href = data.download_url;
-                    a.download = data.filename;
-                    document.body.appendChild(a);
-                    a.click();
-                    document.body.removeChild(a);
-                    
-                    showMessage(`Download started: ${data.filename}`, 'success');
-                } else {
-                    showMessage('Download error: ' + data.error);
-                }
-            })
-            .catch(error => {
-                showLoading(false);
-                showMessage('Network error: ' + error.message);
-            });
-        }
+    etag = make_etag('profiles', profiles_data)
+    return response_cache.cached(request, etag) or await response_cache.json(request, profiles_data, etag)
+
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    """Allow cross-origin use of the API, answering preflight requests directly."""
+    if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+        response = web.Response()
+        response.headers['Access-Control-Allow-Methods'] = 'GET, HEAD, POST, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = request.headers.get(
+            'Access-Control-Request-Headers', 'Content-Type')
+    else:
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            e.headers['Access-Control-Allow-Origin'] = '*'
+            raise
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, Retry-After, X-File-Count, X-Total-Size'
+    return response
+
+
+async def warm_pool(app: web.Application):
+    """Share one connection pool, the hunters' caches and the tree cache for the server's lifetime."""
+    global tree_cache, job_manager, artifact_cache, response_cache, admission
+    warm = WarmState()
+    set_warm_state(warm)
+    tree_cache = TreeCache(int(os.environ.get('TREE_CACHE_MB', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024)
+    artifact_cache = ArtifactCache(
+        os.environ.get('ARTIFACT_CACHE_DIR', ARTIFACT_DIRECTORY),
+        int(os.environ.get('ARTIFACT_CACHE_MB', ARTIFACT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+    )
+    sweeper = asyncio.ensure_future(artifact_cache.run_sweeper())
+    response_cache = ResponseCache()
+    admission = Admission()
+    job_manager = JobManager()
+    downloads.start(admission, tree_cache, artifact_cache)
+    yield
+    await job_manager.close()
+    job_manager = None
+    downloads.close()
+    sweeper.cancel()
+    await asyncio.gather(sweeper, return_exceptions=True)
+    artifact_cache = None
+    response_cache = None
+    admission = None
+    tree_cache = None
+    set_warm_state(None)
+    await warm.close()
+
+
+def create_app() -> web.Application:
+    """Build the web application."""
+    app = web.Application(middlewares=[cors_middleware], client_max_size=MAX_CONTENT_LENGTH)
+    app.cleanup_ctx.append(warm_pool)
+    app.router.add_get('/', index)
+    app.router.add_post('/api/repository/tree', get_repository_tree)
+    app.router.add_post('/api/search', search_files)
+    app.router.add_post('/api/download', downloads.download_files)
+    app.router.add_get('/download/{download_id}', downloads.serve_download)
+    app.router.add_get('/api/export', downloads.export_folder)
+    app.router.add_get('/api/profiles', get_profiles)
+    app.router.add_post('/api/jobs', create_job)
+    app.router.add_get('/api/jobs/{job_id}', get_job)
+    app.router.add_get('/api/jobs/{job_id}/events', job_events)
+    app.router.add_post('/api/jobs/{job_id}/cancel', cancel_job)
+    app.router.add_get('/api/jobs/{job_id}/result', job_result)
+    return app
 
-        function clearSearch() {
-            document.getElementById('extensions').value = '';
-            document.getElementById('name-patterns').value = '';
-            document.getElementById('path-patterns').value = '';
-            document.getElementById('exclude-patterns').value = '';
-            document.querySelectorAll('.profile-btn').forEach(btn => btn.classList.remove('active'));
-            selectedProfile = null;
-        }
-    </script>
-</body>
-</html>'''
-    
-    with open(os.path.join(templates_dir, 'index.html'), 'w') as f:
-        f.write(html_content)
 
 def main():
     """Run the web interface."""
-    create_templates()
-    
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
@@ -607,7 +545,8 @@ def main():
     print(f"📱 Access at: http://localhost:{port}")
     print(f"🔧 Debug mode: {debug}")
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    web.run_app(create_app(), host='0.0.0.0', port=port, print=None)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Web Jobs
+
+Background jobs for the web interface. Long searches and downloads run as
+tasks on the server's event loop (sharing its connection pool and caches)
+instead of holding an HTTP request open; clients follow a job's progress,
+reconnect to it after a dropped connection or page reload, and cancel it.
+
+Every change bumps the job's version, so a listener that wakes up late
+simply sees the latest snapshot: progress is state, not a log to replay.
+"""
+
+import asyncio
+import contextlib
+import os
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# How long finished jobs (and their result files) are kept, in seconds
+JOB_TTL = 3600.0
+
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+
+class Job:
+    """One background search or download and its latest progress."""
+
+    def __init__(self, kind: str):
+        self.id = secrets.token_urlsafe(12)
+        self.kind = kind
+        self.state = 'queued'
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.artifact: Optional[str] = None  # Result file, removed with the job
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.version = 0
+        self.task: Optional[asyncio.Future] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def update(self, **progress: Any) -> None:
+        """Merge progress fields and wake listeners."""
+        self.progress.update(progress)
+        self._bump()
+
+    def _bump(self) -> None:
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until the job moves past version; False if timeout passed first."""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def eta_seconds(self) -> Optional[float]:
+        """Time left, extrapolated from the bytes (or files) done so far."""
+        if self.state != 'running' or not self.started:
+            return None
+        for done_key, total_key in (('bytes_done', 'bytes_total'), ('files_done', 'files_total')):
+            done, total = self.progress.get(done_key), self.progress.get(total_key)
+            if done and total:
+                elapsed = time.time() - self.started
+                return round(elapsed * (total - done) / done, 1)
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished or time.time()
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'progress': self.progress,
+            'eta_seconds': self.eta_seconds(),
+            'elapsed_seconds': round(end - self.started, 1) if self.started else 0.0,
+            'error': self.error,
+            'result_url': f"/api/jobs/{self.id}/result" if self.state == 'done' else None,
+        }
+
+    def cleanup(self) -> None:
+        if self.artifact:
+            with contextlib.suppress(OSError):
+                os.remove(self.artifact)
+            self.artifact = None
+
+
+class JobManager:
+    """Starts, tracks, cancels and expires background jobs."""
+
+    def __init__(self, ttl: float = JOB_TTL):
+        self.ttl = ttl
+        self.jobs: Dict[str, Job] = {}
+
+    def start(self, kind: str, work: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Run work(job) in the background; its return value becomes the job's result."""
+        self.purge()
+        job = Job(kind)
+        self.jobs[job.id] = job
+        job.task = asyncio.ensure_future(self._run(job, work))
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[Any]]) -> None:
+        job.state = 'running'
+        job.started = time.time()
+        job._bump()
+        try:
+            job.result = await work(job)
+            job.state = 'done'
+        except asyncio.CancelledError:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+            if job.state != 'done':
+                job.cleanup()  # Partial result files are useless
+            job._bump()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a running job; False if it had already finished."""
+        if job.done or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    def purge(self) -> None:
+        """Forget finished jobs older than the TTL, deleting their result files."""
+        now = time.time()
+        for job in [job for job in self.jobs.values() if job.done and now - job.finished > self.ttl]:
+            job.cleanup()
+            del self.jobs[job.id]
+
+    async def close(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job.cleanup()
+        self.jobs.clear()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+GitHub File Hunter - Web Responses
+
+JSON responses for the web API: serialized with orjson when it is installed
+(falling back to the standard library), compressed with brotli or gzip as
+each client accepts, and tagged with ETags derived from what the payload
+depends on (commit SHA, path, criteria) rather than from its bytes. A client
+that sends the ETag back gets 304 before the payload is even built. Errors
+are answered as {"success": false, "error": ...} with a fitting status.
+
+Encoded bodies of tagged responses are kept in a small LRU, so a repeated
+request from any client costs neither the search nor its serialization or
+compression.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from admission import OverQuota
+    from github_file_hunter import GitHubAPIError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+
+# Bodies at least this big are compressed in the default executor
+COMPRESS_EXECUTOR_BYTES = 64 * 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Memory budget for encoded bodies of tagged responses
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON encoding of obj."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def dumps_str(obj: Any) -> str:
+    """dumps() as text, for web.json_response(dumps=...)."""
+    return dumps(obj).decode()
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag for a response determined entirely by parts (JSON-serializable)."""
+    key = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return f'W/"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def error_response(message: str, status: int = 400) -> web.Response:
+    return web.json_response({'success': False, 'error': message}, status=status, dumps=dumps_str)
+
+
+def over_quota_response(e: 'OverQuota') -> web.Response:
+    response = error_response(str(e), status=429)
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def upstream_error_response(e: 'GitHubAPIError') -> web.Response:
+    """429 when GitHub is rate limiting us (it uses 403 for that too), else 502."""
+    if e.status in (403, 429):
+        response = error_response(str(e), status=429)
+        response.headers['Retry-After'] = str(int(e.retry_after or 60))
+        return response
+    return error_response(str(e), status=502)
+
+
+async def read_json(request: web.Request) -> Dict[str, Any]:
+    """The request's JSON object body; raises ValueError if it is not one."""
+    data = await request.json()
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    return data
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names etag (weak comparison)."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in header.split(','))
+
+
+def accepted_encoding(request: web.Request) -> Optional[str]:
+    """'br' or 'gzip' if the client accepts it (brotli preferred when installed), else None."""
+    accepted: Dict[str, float] = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+    if brotli is not None and allowed('br'):
+        return 'br'
+    if allowed('gzip'):
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCache:
+    """Encoded JSON bodies by (ETag, content coding), with size-bounded LRU eviction."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.not_modified = 0
+        self._bodies: 'OrderedDict[Tuple[str, Optional[str]], Tuple[bytes, Optional[str]]]' = OrderedDict()
+
+    def cached(self, request: web.Request, etag: str) -> Optional[web.Response]:
+        """304 if the client has etag, the stored body if another request built it, else None."""
+        if etag_matches(request, etag):
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag, 'Vary': 'Accept-Encoding'})
+        key = (etag, accepted_encoding(request))
+        stored = self._bodies.get(key)
+        if stored is None:
+            return None
+        self._bodies.move_to_end(key)
+        self.hits += 1
+        return self._response(*stored, etag, 200)
+
+    async def json(self, request: web.Request, payload: Any, etag: Optional[str] = None,
+                   status: int = 200) -> web.Response:
+        """Encode payload for this client, keeping the result under etag if given."""
+        encoding = accepted_encoding(request)
+        body = dumps(payload)
+        coding = None
+        if encoding and len(body) >= COMPRESS_MIN_BYTES:
+            if len(body) >= COMPRESS_EXECUTOR_BYTES:
+                body = await asyncio.get_running_loop().run_in_executor(None, compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            coding = encoding
+        if etag and status == 200:
+            self._store((etag, encoding), body, coding)
+        return self._response(body, coding, etag, status)
+
+    @staticmethod
+    def _response(body: bytes, coding: Optional[str], etag: Optional[str], status: int) -> web.Response:
+        headers = {'Vary': 'Accept-Encoding'}
+        if coding:
+            headers['Content-Encoding'] = coding
+        if etag:
+            headers['ETag'] = etag
+        return web.Response(body=body, status=status, headers=headers,
+                            content_type='application/json', charset='utf-8')
+
+    def _store(self, key: Tuple[str, Optional[str]], body: bytes, coding: Optional[str]) -> None:
+        if len(body) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        if key in self._bodies:
+            self.size -= len(self._bodies.pop(key)[0])
+        self._bodies[key] = (body, coding)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self.size -= len(self._bodies.popitem(last=False)[1][0])
+
+    def stats(self) -> Dict[str, int]:
+        return {'bodies': len(self._bodies), 'bytes': self.size, 'hits': self.hits,
+                'not_modified': self.not_modified}